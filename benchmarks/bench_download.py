@@ -0,0 +1,77 @@
+"""
+单文件下载基准测试
+
+模拟CDN单连接限速，对比单连接与分段并发下载的吞吐。
+指定 --mirrors 时主地址限速而备用镜像不限速，用于观察镜像选择与切换的效果。
+
+用法:
+    python benchmarks/bench_download.py --size 32 --bandwidth 8 --segments 1 4 8
+    python benchmarks/bench_download.py --mirrors 1
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bilibili_downloader import BilibiliDownloader  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+async def download_once(
+    downloader: BilibiliDownloader, urls: list, filepath: str
+) -> float:
+    async with downloader:
+        start = time.perf_counter()
+        await downloader._download_file(urls, filepath, "基准")
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单文件下载基准测试")
+    parser.add_argument("--size", type=int, default=32, help="文件大小（MiB）")
+    parser.add_argument(
+        "--bandwidth", type=float, default=8, help="单连接带宽（MiB/s）"
+    )
+    parser.add_argument(
+        "--segments", type=int, nargs="+", default=[1, 4, 8], help="分段数"
+    )
+    parser.add_argument("--mirrors", type=int, default=0, help="不限速的备用镜像数")
+    args = parser.parse_args()
+
+    size = args.size * 1024 * 1024
+    bandwidth = int(args.bandwidth * 1024 * 1024)
+    with StubServer(
+        latency=0,
+        stream_size=size,
+        per_connection_bandwidth=bandwidth,
+        mirrors=args.mirrors,
+    ) as server, tempfile.TemporaryDirectory() as tmp:
+        urls = [f"{server.base_url}/stream/BV1bench/video.m4s"] + [
+            f"{server.base_url}/mirror/{i}/stream/BV1bench/video.m4s"
+            for i in range(1, args.mirrors + 1)
+        ]
+        for segments in args.segments:
+            downloader = BilibiliDownloader(
+                download_dir=tmp,
+                ffmpeg_path="ffmpeg",
+                download_segments=segments,
+                min_segment_size=1024 * 1024,
+                # 限速的主地址低于该速度，会被判定为过慢并切换到备用镜像
+                mirror_min_speed=bandwidth * 2,
+            )
+            filepath = os.path.join(tmp, f"out_{segments}.m4s")
+            elapsed = asyncio.run(download_once(downloader, urls, filepath))
+            with open(filepath, "rb") as f:
+                assert f.read() == server.blob, "下载内容不一致"
+            print(
+                f"segments={segments:>2}: {elapsed:.2f}s, {args.size / elapsed:.1f} MiB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
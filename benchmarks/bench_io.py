@@ -0,0 +1,101 @@
+"""
+下载I/O微基准测试
+
+桩服务器在子进程中运行且不限速，只统计下载进程自身的CPU时间，用于衡量读取循环和写盘的开销。
+同时记录下载期间事件循环的最大延迟，写盘阻塞事件循环时该值会明显变大。
+
+用法:
+    python benchmarks/bench_io.py --size 512 --segments 1 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bilibili_downloader import BilibiliDownloader  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+def serve(size: int, port_queue, stop_event):
+    with StubServer(latency=0, stream_size=size) as server:
+        port_queue.put(server.port)
+        stop_event.wait()
+
+
+async def measure_lag(stop: asyncio.Event) -> float:
+    """每10毫秒唤醒一次，返回实际唤醒时间与预期的最大偏差（秒）"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - started - 0.01)
+    return worst
+
+
+async def download_once(downloader: BilibiliDownloader, url: str, filepath: str):
+    async with downloader:
+        stop = asyncio.Event()
+        lag_task = asyncio.ensure_future(measure_lag(stop))
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        await downloader._download_file([url], filepath, "基准")
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        stop.set()
+        return wall, cpu, await lag_task
+
+
+def main():
+    parser = argparse.ArgumentParser(description="下载I/O微基准测试")
+    parser.add_argument("--size", type=int, default=256, help="文件大小（MiB）")
+    parser.add_argument(
+        "--segments", type=int, nargs="+", default=[1, 4], help="分段数"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="每种配置的重复次数，取最快的一次"
+    )
+    args = parser.parse_args()
+
+    size = args.size * 1024 * 1024
+    port_queue = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    server = multiprocessing.Process(
+        target=serve, args=(size, port_queue, stop_event), daemon=True
+    )
+    server.start()
+    try:
+        url = f"http://127.0.0.1:{port_queue.get()}/stream/BV1bench/video.m4s"
+        with tempfile.TemporaryDirectory() as tmp:
+            for segments in args.segments:
+                downloader = BilibiliDownloader(
+                    download_dir=tmp,
+                    ffmpeg_path="ffmpeg",
+                    download_segments=segments,
+                    min_segment_size=1024 * 1024,
+                    resume_downloads=False,
+                )
+                filepath = os.path.join(tmp, f"out_{segments}.m4s")
+                wall, cpu, lag = min(
+                    asyncio.run(download_once(downloader, url, filepath))
+                    for _ in range(args.repeat)
+                )
+                if os.path.getsize(filepath) != size:
+                    raise SystemExit("下载大小不一致")
+                gib = size / 1024**3
+                print(
+                    f"segments={segments:>2}: {args.size / wall:7.1f} MiB/s, "
+                    f"CPU {cpu / gib:5.2f} s/GiB, 事件循环最大延迟 {lag * 1000:6.1f} ms"
+                )
+    finally:
+        stop_event.set()
+        server.join(5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+视频页面解析基准测试
+
+对比旧的逐个正则 + 整页解码的解析方式与 parse_watch_page 在同一批页面上的耗时。
+可以传入保存下来的真实视频页面（如 curl 下载的 HTML 文件或目录）；
+不传时使用按真实页面结构生成的三种页面：普通页面、不含 __playinfo__ 的页面、多P大页面。
+
+用法:
+    python benchmarks/bench_parse.py --repeat 200
+    python benchmarks/bench_parse.py saved_pages/ --repeat 50
+    python benchmarks/bench_parse.py --save benchmarks/fixtures   # 把生成的页面保存下来
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bilibili_downloader.page import parse_watch_page  # noqa: E402
+from stub_server import build_watch_page  # noqa: E402
+
+
+def legacy_parse(content: bytes):
+    """改动前的解析方式：先解码整个页面，再依次用四个标题正则和一个 __playinfo__ 正则搜索"""
+    html = content.decode("utf-8")
+    title = ""
+    for pattern in [
+        r'<h1 title="(.*?)" class="video-title"',
+        r'<title data-vue-meta="true">(.*?)</title>',
+        r'<meta data-vue-meta="true" itemprop="name" name="title" content="(.*?)">',
+        r'<meta data-vue-meta="true" property="og:title" content="(.*?)">',
+    ]:
+        match = re.search(pattern, html)
+        if match:
+            title = match.group(1)
+            break
+
+    playinfo = None
+    playinfo_match = re.search(r"<script>window.__playinfo__=(.*?)</script>", html)
+    if playinfo_match:
+        playinfo = json.loads(playinfo_match.group(1))
+    return title, playinfo
+
+
+def generated_pages():
+    return {
+        "normal.html": build_watch_page("BV1fixture01"),
+        "no_playinfo.html": build_watch_page("BV1fixture02", playinfo=False),
+        "multi_part.html": build_watch_page(
+            "BV1fixture03", padding=600_000, pages=50, related=200
+        ),
+    }
+
+
+def load_pages(paths):
+    pages = {}
+    for path in paths:
+        files = (
+            [os.path.join(path, name) for name in sorted(os.listdir(path))]
+            if os.path.isdir(path)
+            else [path]
+        )
+        for file in files:
+            with open(file, "rb") as f:
+                pages[os.path.basename(file)] = f.read()
+    return pages
+
+
+def measure(func, content: bytes, repeat: int) -> float:
+    """返回单次解析的平均耗时（微秒）"""
+    func(content)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(content)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视频页面解析基准测试")
+    parser.add_argument(
+        "pages", nargs="*", help="保存的视频页面文件或目录，不传时使用生成的页面"
+    )
+    parser.add_argument("--repeat", type=int, default=100, help="每个页面的解析次数")
+    parser.add_argument("--save", metavar="DIR", help="把生成的页面保存到目录后退出")
+    args = parser.parse_args()
+
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+        for name, page in generated_pages().items():
+            with open(os.path.join(args.save, name), "w", encoding="utf-8") as f:
+                f.write(page)
+        print(f"已保存到 {args.save}")
+        return
+
+    pages = (
+        load_pages(args.pages)
+        if args.pages
+        else {name: page.encode("utf-8") for name, page in generated_pages().items()}
+    )
+
+    print(
+        f"{'页面':<20} {'大小':>8} {'旧方式(us)':>12} {'新方式(us)':>12} {'加速':>6}  提取结果"
+    )
+    for name, content in pages.items():
+        legacy = measure(legacy_parse, content, args.repeat)
+        current = measure(parse_watch_page, content, args.repeat)
+        page = parse_watch_page(content)
+        found = [
+            label
+            for label, value in [
+                ("title", page.title),
+                ("playinfo", page.playinfo),
+                ("videoData", page.video_data),
+            ]
+            if value
+        ]
+        print(
+            f"{name:<20} {len(content) / 1024:>6.0f}KB {legacy:>12.0f} {current:>12.0f} "
+            f"{legacy / current:>5.1f}x  {', '.join(found) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+时长检查基准测试
+
+对比通过 get_video_info_async（下载完整视频页面）与 probe_many（只调用view接口）
+检查大量视频时长的耗时。
+
+用法:
+    python benchmarks/bench_probe.py -n 500 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bilibili_downloader import BilibiliDownloader  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+async def check_with_page(downloader: BilibiliDownloader, urls, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(url):
+        async with semaphore:
+            return (await downloader.get_video_info_async(url)).duration
+
+    return await asyncio.gather(*(one(url) for url in urls))
+
+
+async def check_with_probe(downloader: BilibiliDownloader, urls, concurrency: int):
+    return [
+        m.duration
+        for m in await downloader.probe_many(urls, max_concurrency=concurrency)
+    ]
+
+
+async def run(downloader, runner, urls, concurrency):
+    async with downloader:
+        return await runner(downloader, urls, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="时长检查基准测试")
+    parser.add_argument("-n", type=int, default=500, help="视频数量")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="并发数")
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="桩服务器响应延迟（秒）"
+    )
+    args = parser.parse_args()
+
+    with StubServer(
+        latency=args.latency
+    ) as server, tempfile.TemporaryDirectory() as tmp:
+        urls = [server.video_url(f"BV1probe{i:05d}") for i in range(args.n)]
+        for name, runner in [
+            ("watch page", check_with_page),
+            ("view probe", check_with_probe),
+        ]:
+            # 关闭缓存，保证两种方式都真正发起请求
+            downloader = BilibiliDownloader(
+                download_dir=tmp, ffmpeg_path="ffmpeg", cache=False
+            )
+            downloader.API_BASE = server.base_url
+            start = time.perf_counter()
+            durations = asyncio.run(run(downloader, runner, urls, args.concurrency))
+            elapsed = time.perf_counter() - start
+            assert len(durations) == args.n
+            print(
+                f"{name:>10}: {args.n} 个视频耗时 {elapsed:.3f}s ({args.n / elapsed:.1f} 个/秒)"
+            )
+
+
+if __name__ == "__main__":
+    main()
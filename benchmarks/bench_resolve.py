@@ -0,0 +1,69 @@
+"""
+元数据解析基准测试
+
+对比在事件循环中并发解析 N 个视频信息时，同步 get_video_info
+（阻塞事件循环，实际串行）与 get_video_info_async 的总耗时。
+
+用法:
+    python benchmarks/bench_resolve.py -n 200 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bilibili_downloader import BilibiliDownloader  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+async def resolve_blocking(downloader: BilibiliDownloader, urls):
+    async def one(url):
+        return downloader.get_video_info(url)
+
+    return await asyncio.gather(*(one(url) for url in urls))
+
+
+async def resolve_async(downloader: BilibiliDownloader, urls):
+    async with downloader:
+        return await asyncio.gather(
+            *(downloader.get_video_info_async(url) for url in urls)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="元数据解析基准测试")
+    parser.add_argument("-n", type=int, default=100, help="并发解析数量")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="桩服务器响应延迟（秒）"
+    )
+    args = parser.parse_args()
+
+    with StubServer(
+        latency=args.latency
+    ) as server, tempfile.TemporaryDirectory() as tmp:
+        urls = [server.video_url(f"BV1bench{i:04d}") for i in range(args.n)]
+
+        for name, runner in [("blocking", resolve_blocking), ("async", resolve_async)]:
+            # 每种方式使用新的下载器并关闭缓存，后一种方式不会直接命中前一种方式缓存的结果
+            downloader = BilibiliDownloader(
+                download_dir=tmp, ffmpeg_path="ffmpeg", cache=False
+            )
+            start = time.perf_counter()
+            infos = asyncio.run(runner(downloader, urls))
+            elapsed = time.perf_counter() - start
+            assert len(infos) == args.n
+            stats = downloader.connection_stats
+            print(
+                f"{name:>10}: {args.n} 个解析耗时 {elapsed:.3f}s ({args.n / elapsed:.1f} 次/秒)，"
+                f"新建连接 {stats.opened}，复用 {stats.reused}"
+            )
+            downloader.session_pool.close_sync()
+
+
+if __name__ == "__main__":
+    main()
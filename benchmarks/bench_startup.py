@@ -0,0 +1,138 @@
+"""
+导入与构造耗时基准测试
+
+每轮启动一个新的解释器，测量 import bilibili_downloader、第一次构造 BilibiliDownloader
+（含查找FFmpeg）、之后每次构造的耗时，以及FFmpeg能力探测首次和缓存后的耗时。
+取各轮的中位数与预算比较，超出预算时以返回码1退出，可以放在CI中防止启动变慢。
+
+用法:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --import-budget 200 --construct-budget 2 --ffmpeg /usr/bin/ffmpeg
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入本库时不应真正加载的依赖
+HEAVY_MODULES = (
+    "aiohttp",
+    "requests",
+    "ffmpy3",
+    "httpx",
+    "sqlite3",
+    "multiprocessing",
+)
+
+CHILD = r"""
+import json, sys, tempfile, time
+sys.path.insert(0, {root!r})
+
+started = time.perf_counter()
+import bilibili_downloader
+imported = time.perf_counter()
+
+download_dir = tempfile.mkdtemp()
+downloader = bilibili_downloader.BilibiliDownloader(download_dir=download_dir, ffmpeg_path={ffmpeg!r})
+constructed = time.perf_counter()
+for _ in range(100):
+    bilibili_downloader.BilibiliDownloader(download_dir=download_dir, ffmpeg_path={ffmpeg!r})
+repeated = time.perf_counter()
+
+loaded = [
+    name for name in {heavy!r}
+    if name in sys.modules and type(sys.modules[name]).__name__ != "_LazyModule"
+]
+
+probe = probe_cached = None
+try:
+    t = time.perf_counter()
+    downloader.check_ffmpeg()
+    probe = time.perf_counter() - t
+    t = time.perf_counter()
+    downloader.check_ffmpeg()
+    probe_cached = time.perf_counter() - t
+except bilibili_downloader.BilibiliDownloadError:
+    pass
+
+print(json.dumps({{
+    "import": imported - started,
+    "construct_first": constructed - imported,
+    "construct": (repeated - constructed) / 100,
+    "probe": probe,
+    "probe_cached": probe_cached,
+    "loaded": loaded,
+}}))
+"""
+
+
+def run_once(ffmpeg):
+    code = CHILD.format(root=ROOT, ffmpeg=ffmpeg, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median_ms(samples, key):
+    values = [s[key] for s in samples if s[key] is not None]
+    return statistics.median(values) * 1000 if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入与构造耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="启动解释器的次数")
+    parser.add_argument("--ffmpeg", help="FFmpeg路径，不指定则自动查找")
+    parser.add_argument(
+        "--import-budget", type=float, default=250.0, help="导入耗时预算（毫秒）"
+    )
+    parser.add_argument(
+        "--construct-budget",
+        type=float,
+        default=2.0,
+        help="第二次起每次构造的耗时预算（毫秒）",
+    )
+    args = parser.parse_args()
+
+    samples = [run_once(args.ffmpeg) for _ in range(args.runs)]
+    rows = [
+        (
+            "import bilibili_downloader",
+            median_ms(samples, "import"),
+            args.import_budget,
+        ),
+        ("首次构造（含查找FFmpeg）", median_ms(samples, "construct_first"), None),
+        ("之后每次构造", median_ms(samples, "construct"), args.construct_budget),
+        ("FFmpeg能力探测（首次）", median_ms(samples, "probe"), None),
+        ("FFmpeg能力探测（缓存）", median_ms(samples, "probe_cached"), None),
+    ]
+
+    failed = False
+    for name, value, budget in rows:
+        if value is None:
+            print(f"{name}: -（未找到可用的FFmpeg）")
+            continue
+        verdict = ""
+        if budget is not None:
+            over = value > budget
+            failed = failed or over
+            verdict = f"  预算 {budget:.1f}ms {'超出' if over else '通过'}"
+        print(f"{name}: {value:.3f}ms{verdict}")
+
+    loaded = sorted({name for s in samples for name in s["loaded"]})
+    if loaded:
+        failed = True
+        print(f"导入时加载了应延迟导入的依赖: {', '.join(loaded)}")
+    else:
+        print("导入时未加载 " + ", ".join(HEAVY_MODULES))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
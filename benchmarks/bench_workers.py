@@ -0,0 +1,76 @@
+"""
+多进程worker基准测试
+
+把同一批音频任务放入新的sqlite队列，分别用不同数量的worker进程处理，比较总耗时和任务吞吐。
+默认使用 fake_ffmpeg.py 代替FFmpeg；单核机器上增加进程数不会变快。
+
+用法:
+    python benchmarks/bench_workers.py --jobs 32 --processes 1 2 4
+    python benchmarks/bench_workers.py --transcode --ffmpeg /usr/bin/ffmpeg
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bilibili_downloader import SQLiteJobQueue, WorkerPool  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+from suite import make_ffmpeg_stub  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程worker基准测试")
+    parser.add_argument("--jobs", type=int, default=32, help="任务数")
+    parser.add_argument(
+        "--processes", type=int, nargs="+", default=[1, 2, 4], help="worker进程数"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="每个进程同时执行的任务数"
+    )
+    parser.add_argument("--size", type=float, default=4, help="每个音频流的大小（MiB）")
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="桩服务器的响应延迟（秒）"
+    )
+    parser.add_argument(
+        "--transcode", action="store_true", help="转码为mp3，默认免转码直接流复制"
+    )
+    parser.add_argument("--ffmpeg", help="FFmpeg路径，默认使用 fake_ffmpeg.py")
+    args = parser.parse_args()
+
+    with StubServer(
+        latency=args.latency, stream_size=int(args.size * 1024 * 1024)
+    ) as server, tempfile.TemporaryDirectory() as tmp:
+        ffmpeg = args.ffmpeg or make_ffmpeg_stub(tmp)
+        print(f"{'进程数':>6} {'耗时(s)':>8} {'任务/s':>8} {'MiB/s':>8} {'失败':>4}")
+        for processes in args.processes:
+            run_dir = os.path.join(tmp, f"run_{processes}")
+            os.makedirs(run_dir)
+            queue = SQLiteJobQueue(os.path.join(run_dir, "queue.db"))
+            queue.put_many(
+                [server.video_url(f"BV1work{i:05d}") for i in range(args.jobs)],
+                "audio",
+                {"transcode": args.transcode},
+            )
+            pool = WorkerPool(
+                queue,
+                processes=processes,
+                downloader_options={"download_dir": run_dir, "ffmpeg_path": ffmpeg},
+                concurrency=args.concurrency,
+                poll_interval=0.1,
+            )
+            start = time.perf_counter()
+            stats = pool.run()
+            elapsed = time.perf_counter() - start
+            print(
+                f"{processes:>6} {elapsed:>8.2f} {args.jobs / elapsed:>8.1f} "
+                f"{stats.bytes_downloaded / 1024 / 1024 / elapsed:>8.1f} {stats.failed:>4}"
+            )
+            queue.close()
+
+
+if __name__ == "__main__":
+    main()
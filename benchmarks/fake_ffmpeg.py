@@ -0,0 +1,78 @@
+"""
+FFmpeg桩程序，用于基准测试
+
+不做任何编解码：把所有输入（文件、标准输入或 concat 列表中的文件）依次拼接写入最后一个参数指定的输出文件。
+环境变量 FAKE_FFMPEG_DELAY 可以指定每次运行额外等待的秒数，模拟转码耗时。
+与真实的FFmpeg一样，没有 -nostdin 时会读取继承来的标准输入。
+-version 和 -encoders 输出与FFmpeg格式相同的版本和编码器列表，供下载器的能力探测使用。
+
+用法与FFmpeg相同，一般不直接调用，由 suite.py 生成的包装脚本转发参数。
+"""
+
+import os
+import shutil
+import sys
+import time
+
+
+def concat_list(path: str):
+    """读取 concat 分离器的文件列表"""
+    base = os.path.dirname(path)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("file "):
+                name = line[5:].strip().strip("'").replace("'\\''", "'")
+                yield name if os.path.isabs(name) else os.path.join(base, name)
+
+
+ENCODERS = """Encoders:
+ V..... = Video
+ A..... = Audio
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC
+ A....D aac                  AAC (Advanced Audio Coding)
+ A....D libmp3lame           libmp3lame MP3 (MPEG audio layer 3)
+"""
+
+
+def main(argv):
+    if "-version" in argv:
+        print("ffmpeg version 0.0-fake Copyright (c) benchmarks")
+        return 0
+    if "-encoders" in argv:
+        print(ENCODERS, end="")
+        return 0
+
+    output = argv[-1]
+    inputs = []
+    concat = False
+    for i, arg in enumerate(argv[:-1]):
+        if arg == "-f" and argv[i + 1] == "concat":
+            concat = True
+        if arg == "-i":
+            source = argv[i + 1]
+            inputs.extend(concat_list(source) if concat else [source])
+            concat = False
+
+    # 与真实的FFmpeg一样，没有 -nostdin 且输入不是标准输入时会读取继承来的标准输入（交互命令）
+    piped = any(source in ("pipe:0", "pipe:", "-") for source in inputs)
+    if "-nostdin" not in argv and not piped and not sys.stdin.isatty():
+        sys.stdin.buffer.read()
+
+    delay = float(os.environ.get("FAKE_FFMPEG_DELAY", 0))
+    if delay:
+        time.sleep(delay)
+
+    with open(output, "wb") as out:
+        for source in inputs:
+            if source in ("pipe:0", "pipe:", "-"):
+                shutil.copyfileobj(sys.stdin.buffer, out, 1024 * 1024)
+            else:
+                with open(source, "rb") as f:
+                    shutil.copyfileobj(f, out, 1024 * 1024)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
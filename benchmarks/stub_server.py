@@ -0,0 +1,342 @@
+"""
+本地B站桩服务器，用于基准测试
+
+在后台线程中运行一个aiohttp服务，模拟视频页面（含 __playinfo__ 和 __INITIAL_STATE__）、
+view/playurl 接口以及支持Range请求的 .m4s 媒体流。
+"""
+
+import asyncio
+import json
+import threading
+from typing import Optional
+
+from aiohttp import web
+
+
+def build_playinfo(
+    bvid: str, duration: int = 300, base_url: str = "", mirrors: int = 0
+) -> dict:
+    """构造最小化的 __playinfo__ 数据，mirrors 为每路流附带的备用镜像数"""
+
+    def stream(name: str, **fields) -> dict:
+        return dict(
+            base_url=f"{base_url}/stream/{bvid}/{name}",
+            backup_url=[
+                f"{base_url}/mirror/{i}/stream/{bvid}/{name}"
+                for i in range(1, mirrors + 1)
+            ],
+            **fields,
+        )
+
+    return {
+        "code": 0,
+        "data": {
+            "timelength": duration * 1000,
+            "dash": {
+                "duration": duration,
+                "video": [
+                    stream(
+                        "video_1080_hevc.m4s",
+                        id=80,
+                        bandwidth=1500000,
+                        codecs="hev1.1.6.L150.90",
+                        codecid=12,
+                        height=1080,
+                    ),
+                    stream(
+                        "video_1080.m4s",
+                        id=80,
+                        bandwidth=2000000,
+                        codecs="avc1.640032",
+                        codecid=7,
+                        height=1080,
+                    ),
+                    stream(
+                        "video_360.m4s",
+                        id=16,
+                        bandwidth=300000,
+                        codecs="avc1.64001E",
+                        codecid=7,
+                        height=360,
+                    ),
+                ],
+                "audio": [
+                    stream(
+                        "audio_hi.m4s", id=30280, bandwidth=320000, codecs="mp4a.40.2"
+                    ),
+                    stream("audio.m4s", id=30216, bandwidth=64000, codecs="mp4a.40.2"),
+                ],
+            },
+        },
+    }
+
+
+def build_view(bvid: str, duration: int = 300, pages: int = 1) -> dict:
+    """构造view接口的返回"""
+    page_list = [
+        {"cid": 1000 + i, "page": i, "part": f"P{i}", "duration": duration}
+        for i in range(1, pages + 1)
+    ]
+    return {
+        "code": 0,
+        "message": "0",
+        "data": {
+            "bvid": bvid,
+            "title": f"测试视频 {bvid}",
+            "duration": duration * pages,
+            "cid": page_list[0]["cid"],
+            "pages": page_list,
+        },
+    }
+
+
+def build_watch_page(
+    bvid: str,
+    duration: int = 300,
+    padding: int = 200_000,
+    base_url: str = "",
+    mirrors: int = 0,
+    pages: int = 1,
+    playinfo: bool = True,
+    related: int = 40,
+) -> str:
+    """
+    构造视频页面HTML，结构与真实页面相同
+
+    padding 模拟页面中的样式和脚本体积，related 为 __INITIAL_STATE__ 中相关推荐的条数；
+    playinfo 为False时页面不含 __playinfo__（部分视频的页面就是这样）。
+    """
+    title = f"测试视频 {bvid}"
+    state = {
+        "aid": 1,
+        "bvid": bvid,
+        "p": 1,
+        "videoData": build_view(bvid, duration, pages)["data"],
+        "related": [
+            {
+                "bvid": f"BV1rel{i:06d}",
+                "title": f"相关视频 {i}",
+                "duration": 60 + i,
+                "pic": f"{base_url}/cover/{i}.jpg",
+            }
+            for i in range(related)
+        ],
+    }
+    parts = [
+        "<!DOCTYPE html><html><head>",
+        f'<title data-vue-meta="true">{title}_哔哩哔哩_bilibili</title>',
+        f'<meta data-vue-meta="true" itemprop="name" name="title" content="{title}_哔哩哔哩_bilibili">',
+        f'<meta data-vue-meta="true" property="og:title" content="{title}_哔哩哔哩_bilibili">',
+        "<style>" + "x" * (padding // 2) + "</style>",
+        "</head><body>",
+        f'<h1 title="{title}" class="video-title">{title}</h1>',
+        "<div>" + "x" * (padding - padding // 2) + "</div>",
+    ]
+    if playinfo:
+        parts.append(
+            f"<script>window.__playinfo__={json.dumps(build_playinfo(bvid, duration, base_url, mirrors))}</script>"
+        )
+    parts.append(
+        f"<script>window.__INITIAL_STATE__={json.dumps(state)};"
+        "(function(){var s;(s=document.currentScript||document.scripts[document.scripts.length-1])"
+        ".parentNode.removeChild(s);}());</script>"
+    )
+    parts.append('<script src="/static/app.js"></script></body></html>')
+    return "".join(parts)
+
+
+class StubServer:
+    """在后台线程中运行的桩服务器"""
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        stream_size: int = 1024 * 1024,
+        per_connection_bandwidth: Optional[int] = None,
+        accept_ranges: bool = True,
+        fail_after: Optional[int] = None,
+        failures: int = 0,
+        pages: int = 1,
+        mirrors: int = 0,
+        mirror_latency: Optional[float] = None,
+        rate_limited: int = 0,
+        server_errors: int = 0,
+        blob: Optional[bytes] = None,
+        page_playinfo: bool = True,
+    ):
+        self.latency = latency
+        self.pages = pages
+        # 备用镜像（/mirror/{i}/stream/...）不限速也不注入错误，只有各自的延迟
+        self.mirrors = mirrors
+        self.mirror_latency = latency if mirror_latency is None else mirror_latency
+        # 为False时视频页面不含 __playinfo__，播放地址需要通过playurl接口获取
+        self.page_playinfo = page_playinfo
+        # 错误注入：前 rate_limited 个接口请求返回 -412，前 server_errors 个流请求返回503
+        self.rate_limited = rate_limited
+        self.server_errors = server_errors
+        self.api_requests = 0
+        self.per_connection_bandwidth = per_connection_bandwidth
+        self.accept_ranges = accept_ranges
+        # 错误注入：前 failures 个流响应在发送 fail_after 字节后断开连接
+        self.fail_after = fail_after
+        self.failures = failures
+        # 所有流都返回同一份数据；传入 blob（如真实的媒体文件）时忽略 stream_size
+        self._blob = (
+            blob
+            if blob is not None
+            else bytes(range(256)) * (stream_size // 256) + bytes(stream_size % 256)
+        )
+        self.stream_size = len(self._blob)
+        # 流响应带有 ETag，Range 请求的 If-Range 不匹配时返回200整个文件
+        self.etag = '"stub-1"'
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def video_url(self, bvid: str) -> str:
+        return f"{self.base_url}/video/{bvid}"
+
+    async def _watch_page(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        bvid = request.match_info["bvid"]
+        page = build_watch_page(
+            bvid,
+            base_url=self.base_url,
+            mirrors=self.mirrors,
+            pages=self.pages,
+            playinfo=self.page_playinfo,
+        )
+        return web.Response(text=page, content_type="text/html")
+
+    def _rate_limit(self) -> Optional[web.Response]:
+        self.api_requests += 1
+        if self.rate_limited > 0:
+            self.rate_limited -= 1
+            return web.json_response(
+                {"code": -412, "message": "请求被拦截", "data": None}
+            )
+        return None
+
+    async def _view(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        limited = self._rate_limit()
+        if limited is not None:
+            return limited
+        return web.json_response(build_view(request.query["bvid"], pages=self.pages))
+
+    async def _playurl(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        limited = self._rate_limit()
+        if limited is not None:
+            return limited
+        return web.json_response(
+            build_playinfo(
+                request.query["bvid"], base_url=self.base_url, mirrors=self.mirrors
+            )
+        )
+
+    async def _stream(self, request: web.Request) -> web.StreamResponse:
+        primary = "mirror" not in request.match_info
+        await asyncio.sleep(self.latency if primary else self.mirror_latency)
+        if primary and self.server_errors > 0:
+            self.server_errors -= 1
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        start, end, status = 0, len(self._blob) - 1, 200
+        range_header = request.headers.get("Range")
+        if_range = request.headers.get("If-Range")
+        if range_header and self.accept_ranges and if_range in (None, self.etag):
+            first, _, last = range_header.replace("bytes=", "").partition("-")
+            start = int(first)
+            end = min(int(last), end) if last else end
+            status = 206
+
+        response = web.StreamResponse(status=status)
+        response.content_length = end - start + 1
+        response.headers["ETag"] = self.etag
+        if self.accept_ranges:
+            response.headers["Accept-Ranges"] = "bytes"
+        if status == 206:
+            response.headers["Content-Range"] = f"bytes {start}-{end}/{len(self._blob)}"
+        await response.prepare(request)
+
+        fail_at = None
+        if (
+            primary
+            and self.fail_after is not None
+            and self.failures > 0
+            and end - start + 1 > self.fail_after
+        ):
+            self.failures -= 1
+            fail_at = start + self.fail_after
+
+        # 按单连接带宽限速发送，模拟CDN的单连接限速
+        block = 64 * 1024
+        for offset in range(start, end + 1, block):
+            data = self._blob[offset : min(offset + block, end + 1)]
+            if fail_at is not None and offset + len(data) > fail_at:
+                await response.write(data[: max(fail_at - offset, 0)])
+                request.transport.close()
+                return response
+            await response.write(data)
+            if primary and self.per_connection_bandwidth:
+                await asyncio.sleep(len(data) / self.per_connection_bandwidth)
+        await response.write_eof()
+        return response
+
+    @property
+    def blob(self) -> bytes:
+        return self._blob
+
+    def replace_blob(self, blob: bytes, etag: str):
+        """替换所有流的数据和 ETag，模拟CDN上的文件被更新"""
+        self._blob = blob
+        self.etag = etag
+
+    def _build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/video/{bvid}", self._watch_page)
+        app.router.add_get("/stream/{bvid}/{name}", self._stream)
+        app.router.add_get("/mirror/{mirror}/stream/{bvid}/{name}", self._stream)
+        app.router.add_get("/x/web-interface/view", self._view)
+        app.router.add_get("/x/player/playurl", self._playurl)
+        return app
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._runner = web.AppRunner(self._build_app())
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = self._runner.addresses[0][1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+        self._loop.close()
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,433 @@
+"""
+基准测试套件
+
+每个场景在独立的子进程中运行，桩服务器运行在另一个子进程中，因此峰值内存（RSS）和耗时只包含下载器本身。
+默认使用 fake_ffmpeg.py 代替FFmpeg；--ffmpeg 指定真实的FFmpeg时需要同时用 --media 提供一个真实的媒体文件，
+桩服务器会把它作为所有音视频流返回。
+
+场景:
+    resolve  并发解析视频信息（视频页面 + __playinfo__）
+    large    单个大文件下载（分段并发）
+    small    大量小文件下载（download_many，音频免转码）
+    audio    完整音频流程（下载 + 转码为mp3）
+    video    完整视频流程（音视频下载 + 合并）
+
+用法:
+    python benchmarks/suite.py
+    python benchmarks/suite.py --scenarios large small --bandwidth 16 --latency 0.02
+    python benchmarks/suite.py --server-errors 5 --failures 3 --save before.json
+    python benchmarks/suite.py --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import stat
+import sys
+import tempfile
+import time
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bilibili_downloader import BilibiliDownloader  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MiB = 1024 * 1024
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """最近秩法计算百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def peak_rss() -> Optional[int]:
+    """当前进程的峰值RSS（字节），不支持的平台返回None"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为KiB，macOS 上为字节
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def make_ffmpeg_stub(directory: str) -> str:
+    """生成调用 fake_ffmpeg.py 的可执行包装脚本"""
+    script = os.path.join(HERE, "fake_ffmpeg.py")
+    if os.name == "nt":
+        path = os.path.join(directory, "ffmpeg.cmd")
+        with open(path, "w") as f:
+            f.write(f'@"{sys.executable}" "{script}" %*\n')
+        return path
+    path = os.path.join(directory, "ffmpeg")
+    with open(path, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+# ---- 场景：在子进程中运行，返回 (每次操作的耗时列表, 失败次数, 下载字节数) ----
+
+Outcome = Tuple[List[float], int, int]
+
+
+def new_downloader(
+    base_url: str, tmp: str, ffmpeg: str, **kwargs
+) -> BilibiliDownloader:
+    downloader = BilibiliDownloader(download_dir=tmp, ffmpeg_path=ffmpeg, **kwargs)
+    downloader.API_BASE = base_url
+    return downloader
+
+
+async def scenario_resolve(base_url: str, args, tmp: str, ffmpeg: str) -> Outcome:
+    # 关闭缓存，保证每次都真正请求
+    downloader = new_downloader(base_url, tmp, ffmpeg, cache=False)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await downloader.get_video_info_async(
+                    f"{base_url}/video/BV1suite{i:05d}"
+                )
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    async with downloader:
+        await asyncio.gather(*(one(i) for i in range(args.count)))
+    return latencies, errors, 0
+
+
+async def scenario_large(base_url: str, args, tmp: str, ffmpeg: str) -> Outcome:
+    downloader = new_downloader(
+        base_url, tmp, ffmpeg, download_segments=args.segments, min_segment_size=MiB
+    )
+    latencies, errors, nbytes = [], 0, 0
+    async with downloader:
+        for i in range(args.repeat):
+            filepath = os.path.join(tmp, f"large_{i}.m4s")
+            started = time.perf_counter()
+            try:
+                nbytes += await downloader._download_file(
+                    [f"{base_url}/stream/BV1suite/video.m4s"], filepath, "基准"
+                )
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+            if os.path.exists(filepath):
+                os.remove(filepath)
+    return latencies, errors, nbytes
+
+
+async def run_batch(
+    base_url: str,
+    args,
+    tmp: str,
+    ffmpeg: str,
+    kind: str,
+    output_format: str,
+    transcode: bool,
+) -> Outcome:
+    downloader = new_downloader(base_url, tmp, ffmpeg)
+    urls = [f"{base_url}/video/BV1suite{i:05d}" for i in range(args.count)]
+    latencies, errors, nbytes = [], 0, 0
+    async with downloader:
+        batch = downloader.download_many(
+            urls,
+            kind=kind,
+            output_format=output_format,
+            transcode=transcode,
+            max_concurrency=args.concurrency,
+        )
+        async for result in batch:
+            if result.success:
+                latencies.append(result.elapsed)
+                if result.file_path and os.path.exists(result.file_path):
+                    os.remove(result.file_path)
+            else:
+                errors += 1
+            nbytes += result.bytes_downloaded
+    return latencies, errors, nbytes
+
+
+async def scenario_small(base_url: str, args, tmp: str, ffmpeg: str) -> Outcome:
+    return await run_batch(base_url, args, tmp, ffmpeg, "audio", "m4a", False)
+
+
+async def scenario_audio(base_url: str, args, tmp: str, ffmpeg: str) -> Outcome:
+    return await run_batch(base_url, args, tmp, ffmpeg, "audio", "mp3", True)
+
+
+async def scenario_video(base_url: str, args, tmp: str, ffmpeg: str) -> Outcome:
+    return await run_batch(base_url, args, tmp, ffmpeg, "video", "mp4", True)
+
+
+SCENARIOS = {
+    "resolve": scenario_resolve,
+    "large": scenario_large,
+    "small": scenario_small,
+    "audio": scenario_audio,
+    "video": scenario_video,
+}
+
+
+def stream_size(name: str, args) -> int:
+    """各场景每路流的大小"""
+    if name == "large":
+        return args.large_size * MiB
+    if name == "small":
+        return args.small_size * 1024
+    return args.media_size * MiB
+
+
+def run_scenario(name: str, base_url: str, args, ffmpeg: str, queue):
+    """子进程入口"""
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        cpu = time.process_time()
+        latencies, errors, nbytes = asyncio.run(
+            SCENARIOS[name](base_url, args, tmp, ffmpeg)
+        )
+        queue.put(
+            {
+                "scenario": name,
+                "ops": len(latencies) + errors,
+                "errors": errors,
+                "bytes": nbytes,
+                "wall": time.perf_counter() - started,
+                "cpu": time.process_time() - cpu,
+                "p50": percentile(latencies, 50),
+                "p99": percentile(latencies, 99),
+                "peak_rss": peak_rss(),
+            }
+        )
+
+
+def serve(server_kwargs: dict, port_queue, stop_event):
+    """桩服务器子进程入口"""
+    with StubServer(**server_kwargs) as server:
+        port_queue.put(server.port)
+        stop_event.wait()
+
+
+def run_isolated(ctx, name: str, args, ffmpeg: str, blob: Optional[bytes]) -> Dict:
+    server_kwargs = dict(
+        latency=args.latency,
+        stream_size=stream_size(name, args),
+        per_connection_bandwidth=int(args.bandwidth * MiB) if args.bandwidth else None,
+        fail_after=args.fail_after,
+        failures=args.failures,
+        server_errors=args.server_errors,
+        rate_limited=args.rate_limited,
+        blob=blob if name in ("audio", "video") else None,
+    )
+    port_queue, results = ctx.Queue(), ctx.Queue()
+    stop_event = ctx.Event()
+    server = ctx.Process(
+        target=serve, args=(server_kwargs, port_queue, stop_event), daemon=True
+    )
+    server.start()
+    try:
+        base_url = f"http://127.0.0.1:{port_queue.get()}"
+        worker = ctx.Process(
+            target=run_scenario, args=(name, base_url, args, ffmpeg, results)
+        )
+        worker.start()
+        worker.join()
+        if worker.exitcode != 0:
+            raise RuntimeError(f"场景 {name} 运行失败，退出码 {worker.exitcode}")
+        return results.get()
+    finally:
+        stop_event.set()
+        server.join(5)
+
+
+def pad(text: str, width: int, left: bool = False) -> str:
+    """按终端显示宽度对齐，中文占两列"""
+    space = " " * max(
+        0,
+        width
+        - sum(2 if unicodedata.east_asian_width(c) in ("W", "F") else 1 for c in text),
+    )
+    return text + space if left else space + text
+
+
+def throughput(result: Dict) -> str:
+    if result["bytes"]:
+        return f"{result['bytes'] / MiB / result['wall']:.1f} MiB/s"
+    return f"{result['ops'] / result['wall']:.1f} 次/s"
+
+
+def millis(value: Optional[float]) -> str:
+    return f"{value * 1000:.1f}" if value is not None else "-"
+
+
+def report(results: List[Dict], baseline: Optional[Dict[str, Dict]]):
+    columns = [
+        ("场景", 8),
+        ("次数", 6),
+        ("失败", 6),
+        ("吞吐", 16),
+        ("p50(ms)", 10),
+        ("p99(ms)", 10),
+        ("CPU(s)", 8),
+        ("峰值RSS", 12),
+    ]
+    print(
+        "".join(
+            pad(title, width, left=i == 0) for i, (title, width) in enumerate(columns)
+        )
+    )
+    for result in results:
+        rss = f"{result['peak_rss'] / MiB:.1f}MiB" if result["peak_rss"] else "-"
+        cells = [
+            result["scenario"],
+            str(result["ops"]),
+            str(result["errors"]),
+            throughput(result),
+            millis(result["p50"]),
+            millis(result["p99"]),
+            f"{result['cpu']:.2f}",
+            rss,
+        ]
+        print(
+            "".join(
+                pad(cell, width, left=i == 0)
+                for i, (cell, (_, width)) in enumerate(zip(cells, columns))
+            )
+        )
+
+    if not baseline:
+        return
+    print("\n与基准结果对比（正数表示变慢/变大）:")
+    for result in results:
+        before = baseline.get(result["scenario"])
+        if not before:
+            continue
+        changes = []
+        for key in ("wall", "p50", "p99", "peak_rss"):
+            if before.get(key) and result.get(key) is not None:
+                changes.append(f"{key} {100 * (result[key] / before[key] - 1):+.1f}%")
+        print(f"  {result['scenario']:<8} " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基准测试套件")
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+        help="要运行的场景",
+    )
+    parser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=50,
+        help="resolve/small/audio/video 场景的视频数量",
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="并发数")
+    parser.add_argument("--repeat", type=int, default=3, help="large 场景的下载次数")
+    parser.add_argument("--segments", type=int, default=4, help="large 场景的分段数")
+    parser.add_argument(
+        "--large-size", type=int, default=128, help="large 场景的文件大小（MiB）"
+    )
+    parser.add_argument(
+        "--small-size", type=int, default=256, help="small 场景每个文件的大小（KiB）"
+    )
+    parser.add_argument(
+        "--media-size", type=int, default=4, help="audio/video 场景每路流的大小（MiB）"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.01, help="桩服务器响应延迟（秒）"
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=None,
+        help="桩服务器单连接带宽（MiB/s），默认不限速",
+    )
+    parser.add_argument(
+        "--failures", type=int, default=0, help="错误注入：前N个流响应中途断开"
+    )
+    parser.add_argument(
+        "--fail-after", type=int, default=64 * 1024, help="中途断开前发送的字节数"
+    )
+    parser.add_argument(
+        "--server-errors", type=int, default=0, help="错误注入：前N个流请求返回503"
+    )
+    parser.add_argument(
+        "--rate-limited", type=int, default=0, help="错误注入：前N个接口请求返回-412"
+    )
+    parser.add_argument("--ffmpeg", default=None, help="真实FFmpeg路径，默认使用桩程序")
+    parser.add_argument(
+        "--media", default=None, help="audio/video 场景返回的真实媒体文件"
+    )
+    parser.add_argument(
+        "--save", default=None, help="把结果保存为JSON，供 --compare 使用"
+    )
+    parser.add_argument("--compare", default=None, help="与之前保存的结果对比")
+    args = parser.parse_args()
+
+    if args.ffmpeg and not args.media and ({"audio", "video"} & set(args.scenarios)):
+        parser.error("使用真实FFmpeg时需要通过 --media 提供媒体文件")
+    blob = None
+    if args.media:
+        with open(args.media, "rb") as f:
+            blob = f.read()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = {result["scenario"]: result for result in saved["results"]}
+        ignored = {"save", "compare", "scenarios"}
+        changed = sorted(
+            key
+            for key, value in vars(args).items()
+            if key not in ignored and saved["args"].get(key) != value
+        )
+        if changed:
+            print(
+                f"注意：以下参数与基准结果不同，对比可能没有意义: {', '.join(changed)}",
+                file=sys.stderr,
+            )
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tools:
+        ffmpeg = args.ffmpeg or make_ffmpeg_stub(tools)
+        results = []
+        for name in args.scenarios:
+            results.append(run_isolated(ctx, name, args, ffmpeg, blob))
+            print(f"{name} 完成", file=sys.stderr)
+
+    report(results, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {"args": vars(args), "results": results},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,91 @@ Bilibili Downloader SDK
 一个简单易用的B站视频下载SDK
 """
 
+import importlib
+
 from .downloader import BilibiliDownloader
-from .models import VideoInfo, DownloadResult
-from .exceptions import BilibiliDownloadError, VideoNotFoundError, DurationExceededError
+from .batch import BatchDownload
+from .selection import StreamPolicy
+from .retry import RetryPolicy
+from .progress import ConsoleProgress
+from .models import (
+    VideoInfo,
+    VideoMetadata,
+    VideoPage,
+    DownloadResult,
+    ConnectionStats,
+    BatchStats,
+    CacheStats,
+    ProgressEvent,
+    FFmpegInfo,
+    OutputEntry,
+    QueuedJob,
+    QueueStats,
+)
+from .exceptions import (
+    BilibiliDownloadError,
+    VideoNotFoundError,
+    DurationExceededError,
+    RateLimitError,
+)
 
 __version__ = "v0.0.3"
 __all__ = [
     "BilibiliDownloader",
     "VideoInfo",
+    "VideoMetadata",
+    "VideoPage",
     "DownloadResult",
+    "ConnectionStats",
+    "BatchDownload",
+    "BatchStats",
+    "StreamPolicy",
+    "RetryPolicy",
+    "ProgressEvent",
+    "ConsoleProgress",
+    "VideoInfoCache",
+    "CacheBackend",
+    "MemoryCache",
+    "SQLiteCache",
+    "CacheStats",
+    "OutputIndex",
+    "OutputEntry",
+    "JobQueue",
+    "SQLiteJobQueue",
+    "QueuedJob",
+    "QueueStats",
+    "Worker",
+    "WorkerPool",
+    "FFmpegInfo",
     "BilibiliDownloadError",
     "VideoNotFoundError",
-    "DurationExceededError"
-]
\ No newline at end of file
+    "DurationExceededError",
+    "RateLimitError",
+]
+
+# 缓存、输出索引、任务队列和多进程worker依赖sqlite3、multiprocessing，
+# 第一次访问时才导入，import bilibili_downloader 时不加载
+_LAZY_ATTRIBUTES = {
+    "VideoInfoCache": ".cache",
+    "CacheBackend": ".cache",
+    "MemoryCache": ".cache",
+    "SQLiteCache": ".cache",
+    "OutputIndex": ".index",
+    "JobQueue": ".jobqueue",
+    "SQLiteJobQueue": ".jobqueue",
+    "Worker": ".worker",
+    "WorkerPool": ".worker",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,10 @@
+"""
+python -m bilibili_downloader，等同于 bilibili-dl 命令
+"""
+
+import sys
+
+from .cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
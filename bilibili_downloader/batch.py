@@ -0,0 +1,210 @@
+"""
+批量下载与并发控制
+"""
+
+import asyncio
+import contextvars
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Optional,
+    Union,
+)
+
+from .models import BatchStats, DownloadResult
+from .throttle import TokenBucket
+from .tracing import record
+
+if TYPE_CHECKING:
+    from .downloader import BilibiliDownloader
+
+
+class StageLimits:
+    """按阶段（元数据、网络传输、FFmpeg）分别限制并发，并可限制总带宽"""
+
+    def __init__(
+        self,
+        max_metadata: Optional[int] = None,
+        max_transfers: Optional[int] = None,
+        max_ffmpeg: Optional[int] = None,
+        max_bandwidth: Optional[int] = None,
+    ):
+        """
+        初始化阶段限制
+
+        Args:
+            max_metadata: 同时获取视频信息的最大数量，None表示不限制
+            max_transfers: 同时下载的媒体流最大数量（视频任务的音视频流各占一个），None表示不限制
+            max_ffmpeg: 同时运行的FFmpeg进程最大数量，None表示不限制
+            max_bandwidth: 总下载带宽上限（字节/秒），None表示不限制
+        """
+        self._metadata = asyncio.Semaphore(max_metadata) if max_metadata else None
+        self._transfers = asyncio.Semaphore(max_transfers) if max_transfers else None
+        self._ffmpeg = asyncio.Semaphore(max_ffmpeg) if max_ffmpeg else None
+        self._bandwidth = TokenBucket(max_bandwidth)
+
+    @staticmethod
+    @asynccontextmanager
+    async def _hold(semaphore: Optional[asyncio.Semaphore]):
+        if semaphore is None:
+            yield
+            return
+        started = time.perf_counter()
+        async with semaphore:
+            # 排队等待的时间记入任务的 queue 阶段
+            record("queue", time.perf_counter() - started)
+            yield
+
+    def metadata(self):
+        """获取视频信息阶段"""
+        return self._hold(self._metadata)
+
+    def transfer(self):
+        """网络传输阶段"""
+        return self._hold(self._transfers)
+
+    def ffmpeg(self):
+        """FFmpeg处理阶段"""
+        return self._hold(self._ffmpeg)
+
+    async def throttle(self, nbytes: int):
+        """按总带宽限制消耗流量"""
+        await self._bandwidth.acquire(nbytes)
+
+    def set_bandwidth(self, max_bandwidth: Optional[int]):
+        """运行时调整总带宽上限，None表示不限制"""
+        self._bandwidth.set_rate(max_bandwidth)
+
+
+_NO_LIMITS = StageLimits()
+_current_limits: contextvars.ContextVar[Optional[StageLimits]] = contextvars.ContextVar(
+    "bilibili_downloader_stage_limits", default=None
+)
+
+
+def current_limits() -> StageLimits:
+    """当前任务所在批次的阶段限制，不在批次中时不做限制"""
+    return _current_limits.get() or _NO_LIMITS
+
+
+class BatchDownload:
+    """
+    批量下载任务
+
+    作为异步迭代器使用，按完成顺序逐个返回 DownloadResult；
+    stats 属性在迭代过程中实时更新。
+    """
+
+    def __init__(
+        self,
+        downloader: "BilibiliDownloader",
+        urls: Union[Iterable[str], AsyncIterable[str]],
+        kind: str = "audio",
+        output_format: Optional[str] = None,
+        transcode: bool = True,
+        streaming: bool = False,
+        max_concurrency: int = 8,
+        max_metadata: Optional[int] = None,
+        max_transfers: Optional[int] = None,
+        max_ffmpeg: Optional[int] = None,
+        max_bandwidth: Optional[int] = None,
+    ):
+        if kind not in ("audio", "video"):
+            raise ValueError(f"不支持的下载类型: {kind}")
+        self.downloader = downloader
+        self.urls = urls
+        self.kind = kind
+        self.output_format = output_format or ("mp3" if kind == "audio" else "mp4")
+        self.transcode = transcode
+        self.streaming = streaming
+        self.max_concurrency = max(1, max_concurrency)
+        self._limit_options = dict(
+            max_metadata=max_metadata,
+            max_transfers=max_transfers,
+            max_ffmpeg=max_ffmpeg,
+            max_bandwidth=max_bandwidth,
+        )
+        self.limits: Optional[StageLimits] = None
+        self.stats = BatchStats()
+
+    def set_bandwidth(self, max_bandwidth: Optional[int]):
+        """运行时调整本批次的总带宽上限（字节/秒），None表示不限制"""
+        self._limit_options["max_bandwidth"] = max_bandwidth
+        if self.limits is not None:
+            self.limits.set_bandwidth(max_bandwidth)
+
+    async def _run_job(self, url: str) -> DownloadResult:
+        if self.kind == "audio":
+            return await self.downloader.download_audio_async(
+                url,
+                audio_format=self.output_format,
+                transcode=self.transcode,
+                streaming=self.streaming,
+            )
+        return await self.downloader.download_video_async(
+            url, video_format=self.output_format
+        )
+
+    @staticmethod
+    async def _next_url(url_iter, lock: asyncio.Lock) -> Optional[str]:
+        """取下一个URL，没有更多URL时返回None"""
+        if not isinstance(url_iter, AsyncIterator):
+            return next(url_iter, None)
+        # 异步迭代器（如异步生成器）不能被多个worker同时调用 __anext__
+        async with lock:
+            try:
+                return await url_iter.__anext__()
+            except StopAsyncIteration:
+                return None
+
+    async def _worker(self, url_iter, lock: asyncio.Lock, results: asyncio.Queue):
+        # 每个worker是独立的任务，设置的上下文只对本worker内的下载生效
+        _current_limits.set(self.limits)
+        while True:
+            url = await self._next_url(url_iter, lock)
+            if url is None:
+                return
+            self.stats.total += 1
+            result = await self._run_job(url)
+            await results.put(result)
+
+    async def __aiter__(self) -> AsyncIterator[DownloadResult]:
+        # 所有worker共享同一个URL迭代器，避免一次性为全部URL创建任务
+        # 信号量需要在事件循环中创建
+        self.limits = StageLimits(**self._limit_options)
+        if isinstance(self.urls, AsyncIterable):
+            url_iter = self.urls.__aiter__()
+        else:
+            url_iter = iter(self.urls)
+        lock = asyncio.Lock()
+        results: asyncio.Queue = asyncio.Queue()
+        started = time.monotonic()
+        workers = [
+            asyncio.ensure_future(self._worker(url_iter, lock, results))
+            for _ in range(self.max_concurrency)
+        ]
+
+        async def wait_workers():
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                await results.put(None)
+
+        waiter = asyncio.ensure_future(wait_workers())
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                self.stats.record(result, time.monotonic() - started)
+                yield result
+            # 让worker中的异常（如果有）抛出
+            await waiter
+        finally:
+            for task in workers + [waiter]:
+                task.cancel()
+            await asyncio.gather(*workers, waiter, return_exceptions=True)
@@ -0,0 +1,207 @@
+"""
+视频信息缓存
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .models import CacheStats, VideoInfo
+from .utils import lazy_import
+
+# 只有 SQLiteCache 用到，默认的进程内缓存不加载
+sqlite3 = lazy_import("sqlite3")
+
+# 与CDN地址无关、长期有效的字段
+STATIC_FIELDS = ("bvid", "page", "title", "duration", "cid")
+
+
+class CacheBackend:
+    """缓存后端接口，自定义后端需实现以下方法"""
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取未过期的值，不存在或已过期时返回None"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        """写入值，ttl秒后过期"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """删除值"""
+        raise NotImplementedError
+
+    def clear(self):
+        """清空缓存"""
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """进程内LRU缓存"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache(CacheBackend):
+    """基于sqlite的持久化缓存，进程重启后仍然有效"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS video_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM video_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                with self._conn:
+                    self._conn.execute("DELETE FROM video_cache WHERE key = ?", (key,))
+                return None
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO video_cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time() + ttl),
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM video_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM video_cache")
+
+    def prune(self):
+        """删除所有已过期的条目"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM video_cache WHERE expires <= ?", (time.time(),)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class VideoInfoCache:
+    """
+    视频信息缓存
+
+    静态元数据（标题、时长、cid）按 (bvid, 分P) 缓存；CDN流地址会过期，
+    按 (bvid, 分P, 画质) 单独缓存并使用较短的有效期。
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        metadata_ttl: float = 86400,
+        url_ttl: float = 600,
+    ):
+        """
+        初始化缓存
+
+        Args:
+            backend: 缓存后端，默认为进程内LRU缓存
+            metadata_ttl: 静态元数据有效期（秒）
+            url_ttl: CDN流地址有效期（秒），应小于B站地址的实际有效期
+        """
+        self.backend = backend or MemoryCache()
+        self.metadata_ttl = metadata_ttl
+        self.url_ttl = url_ttl
+        self.stats = CacheStats()
+
+    @staticmethod
+    def _metadata_key(bvid: str, page: int) -> str:
+        return f"meta:{bvid}:{page}"
+
+    @staticmethod
+    def _streams_key(bvid: str, page: int, quality: str) -> str:
+        return f"streams:{bvid}:{page}:{quality}"
+
+    def get(self, bvid: str, page: int, quality: str) -> Optional[VideoInfo]:
+        """
+        读取缓存的视频信息
+
+        Returns:
+            Optional[VideoInfo]: 元数据未命中时为None；元数据命中但流地址已过期时，
+                返回的对象中 video_url/audio_url 为None
+        """
+        metadata = self.backend.get(self._metadata_key(bvid, page))
+        if metadata is None:
+            self.stats.misses += 1
+            return None
+
+        streams = self.backend.get(self._streams_key(bvid, page, quality))
+        if streams is None:
+            self.stats.url_misses += 1
+            return VideoInfo(**metadata)
+
+        self.stats.hits += 1
+        return VideoInfo(**metadata, **streams)
+
+    def set(self, video_info: VideoInfo, quality: str):
+        """写入视频信息"""
+        fields = dict(vars(video_info))
+        metadata = {name: fields.pop(name) for name in STATIC_FIELDS}
+        self.backend.set(
+            self._metadata_key(video_info.bvid, video_info.page),
+            metadata,
+            self.metadata_ttl,
+        )
+        if video_info.video_url or video_info.audio_url:
+            self.backend.set(
+                self._streams_key(video_info.bvid, video_info.page, quality),
+                fields,
+                self.url_ttl,
+            )
+
+    def invalidate_streams(self, bvid: str, page: int, quality: str):
+        """使流地址缓存失效，用于地址过期的情况"""
+        self.backend.delete(self._streams_key(bvid, page, quality))
+
+    def clear(self):
+        self.backend.clear()
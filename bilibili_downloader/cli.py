@@ -0,0 +1,242 @@
+"""
+命令行入口 bilibili-dl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, TextIO
+
+from .downloader import BilibiliDownloader
+from .models import BatchStats
+from .progress import ConsoleProgress
+from .selection import StreamPolicy
+
+
+def read_urls(lines: Iterable[str]) -> Iterator[str]:
+    """
+    逐行读取URL，跳过空行和 # 开头的注释行
+
+    每行可以是URL，也可以是带 url 字段的JSON对象（如其他工具输出的JSON lines）。
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                line = json.loads(line).get("url") or line
+            except ValueError:
+                # 无法解析的行原样交给下载器，作为失败结果输出
+                pass
+        yield line
+
+
+def _input_urls(args: argparse.Namespace) -> Iterator[str]:
+    yield from args.urls
+    for path in args.input:
+        if path == "-":
+            yield from read_urls(sys.stdin)
+            continue
+        with open(path, encoding="utf-8") as f:
+            yield from read_urls(f)
+
+
+_END = object()
+
+
+async def _read_in_thread(
+    items: Iterable[str], maxsize: int = 1024
+) -> AsyncIterator[str]:
+    """
+    在后台线程中迭代 items，逐个返回
+
+    读取标准输入或文件会阻塞，放到线程中才不会卡住事件循环上正在进行的下载；
+    读取线程是守护线程，被中断时不会等待标准输入，最多预读 maxsize 个URL。
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def put(item) -> bool:
+        # 事件循环已结束（如被中断）时返回False
+        try:
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+        except Exception:
+            return False
+        return True
+
+    def read():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except Exception as e:
+            # 读取错误（如文件编码不对）在事件循环中抛出
+            put(e)
+            return
+        put(_END)
+
+    threading.Thread(target=read, name="bilibili-dl-input", daemon=True).start()
+    while True:
+        item = await queue.get()
+        if item is _END:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="bilibili-dl",
+        description="批量下载B站音视频，每完成一个任务向标准输出写一行JSON结果",
+        epilog="示例: bilibili-dl -j 8 -k video -q 1080 BV1xx411c7mD; cat urls.txt | bilibili-dl -f m4a > results.jsonl",
+    )
+    parser.add_argument(
+        "urls", nargs="*", help="视频URL；不传且未指定 -i 时从标准输入读取"
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="从文件读取URL（每行一个URL或带 url 字段的JSON），- 表示标准输入，可指定多次",
+    )
+    parser.add_argument(
+        "-k",
+        "--kind",
+        choices=("audio", "video"),
+        default="audio",
+        help="下载类型，默认audio",
+    )
+    parser.add_argument("-f", "--format", help="输出格式，默认音频为mp3、视频为mp4")
+    parser.add_argument(
+        "-q",
+        "--quality",
+        type=int,
+        metavar="HEIGHT",
+        help="最大分辨率高度，如 720，默认选择最高画质",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default="./downloads", help="下载目录，默认 ./downloads"
+    )
+    parser.add_argument(
+        "-j", "--concurrency", type=int, default=4, help="同时进行的任务数，默认4"
+    )
+    parser.add_argument(
+        "--no-transcode",
+        action="store_true",
+        help="音频不转码，按音频流编码选择容器直接流复制",
+    )
+    parser.add_argument(
+        "--streaming", action="store_true", help="音频边下载边转码，不写临时文件"
+    )
+    parser.add_argument(
+        "--max-duration",
+        type=int,
+        default=10800,
+        help="最大允许下载时长（秒），默认10800",
+    )
+    parser.add_argument(
+        "--max-bandwidth", type=int, metavar="BYTES", help="总带宽上限（字节/秒）"
+    )
+    parser.add_argument(
+        "--index", metavar="PATH", help="输出索引文件，已下载过的内容直接返回结果"
+    )
+    parser.add_argument("--ffmpeg", help="FFmpeg路径，默认自动查找")
+    parser.add_argument(
+        "--sessdata",
+        default=os.environ.get("BILIBILI_SESSDATA"),
+        help="Cookie中的SESSDATA，默认读取环境变量 BILIBILI_SESSDATA",
+    )
+    parser.add_argument(
+        "--bili-jct",
+        default=os.environ.get("BILIBILI_BILI_JCT"),
+        help="Cookie中的bili_jct，默认读取环境变量 BILIBILI_BILI_JCT",
+    )
+    parser.add_argument(
+        "--buvid3",
+        default=os.environ.get("BILIBILI_BUVID3"),
+        help="Cookie中的buvid3，默认读取环境变量 BILIBILI_BUVID3",
+    )
+    parser.add_argument(
+        "--stream-urls",
+        action="store_true",
+        help="在JSON结果中保留CDN播放地址（带有账号签名且会过期），默认去掉",
+    )
+    parser.add_argument(
+        "--progress", action="store_true", help="在标准错误显示下载进度"
+    )
+    parser.add_argument("--quiet", action="store_true", help="不在标准错误输出汇总")
+    return parser
+
+
+async def run(args: argparse.Namespace, out: TextIO) -> BatchStats:
+    """
+    按参数执行批量下载，按完成顺序向 out 写入每个 DownloadResult 的JSON
+
+    Returns:
+        BatchStats: 汇总统计
+    """
+    downloader = BilibiliDownloader(
+        sessdata=args.sessdata,
+        bili_jct=args.bili_jct,
+        buvid3=args.buvid3,
+        download_dir=args.output_dir,
+        ffmpeg_path=args.ffmpeg,
+        max_duration=args.max_duration,
+        stream_policy=StreamPolicy(max_height=args.quality),
+        progress=ConsoleProgress() if args.progress else None,
+        output_index=args.index,
+    )
+    async with downloader:
+        batch = downloader.download_many(
+            _read_in_thread(_input_urls(args)),
+            kind=args.kind,
+            output_format=args.format,
+            transcode=not args.no_transcode,
+            streaming=args.streaming,
+            max_concurrency=args.concurrency,
+            max_bandwidth=args.max_bandwidth,
+        )
+        async for result in batch:
+            data = result.to_dict(stream_urls=args.stream_urls)
+            out.write(json.dumps(data, ensure_ascii=False) + "\n")
+            # 逐行刷新，下游工具可以立即处理
+            out.flush()
+        return batch.stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口
+
+    Returns:
+        int: 全部成功为0，有失败的任务为1，被中断为130
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.urls and not args.input:
+        if sys.stdin.isatty():
+            parser.error("请传入视频URL，或用 -i/标准输入 提供URL列表")
+        args.input = ["-"]
+    for path in args.input:
+        if path != "-" and not os.path.isfile(path):
+            parser.error(f"输入文件不存在: {path}")
+
+    try:
+        stats = asyncio.run(run(args, sys.stdout))
+    except KeyboardInterrupt:
+        return 130
+
+    if not args.quiet:
+        print(
+            f"完成 {stats.completed} 个任务：成功 {stats.succeeded}，失败 {stats.failed}，"
+            f"下载 {stats.bytes_downloaded / 1024 / 1024:.1f} MiB，用时 {stats.elapsed:.1f}s",
+            file=sys.stderr,
+        )
+    return 1 if stats.failed else 0
@@ -1,33 +1,117 @@
 """
 B站视频下载器核心实现
 """
+
 import asyncio
 import datetime
+import functools
+import hashlib
 import json
 import os
 import re
 import time
-from typing import Optional, Tuple, Dict, Any
-
-import aiohttp
-import httpx
-import requests
-from ffmpy3 import FFmpeg
+import weakref
+from dataclasses import replace
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    Tuple,
+    Dict,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Union,
+)
 
 from .exceptions import (
     BilibiliDownloadError,
     VideoNotFoundError,
     DurationExceededError,
     NetworkError,
-    FFmpegError
+    RemoteFileChangedError,
+    FFmpegError,
+)
+from .batch import BatchDownload, current_limits
+from .cache import VideoInfoCache
+from .ffmpeg import (
+    FFmpegRunner,
+    audio_container_for_codec,
+    audio_encoders,
+    audio_output_options,
+    can_copy_audio,
+    check_ffmpeg,
+)
+from .mirrors import MirrorSet, SpeedMonitor, rank_mirrors
+from .models import (
+    VideoInfo,
+    VideoMetadata,
+    VideoPage,
+    DownloadResult,
+    ConnectionStats,
+    FFmpegInfo,
+)
+from .page import WatchPage, parse_watch_page
+from .progress import (
+    NULL_TRACKER,
+    ProgressCallback,
+    ProgressTracker,
+    enter_job,
+    exit_job,
+)
+from .resume import DownloadManifest, manifest_path, url_identity
+from .retry import RetryPolicy, check_api_response
+from .selection import StreamPolicy
+from .segmented import (
+    RemoteFileInfo,
+    preallocate,
+    probe_remote_file,
+    split_missing_ranges,
 )
-from .models import VideoInfo, DownloadResult
-from .utils import extract_bvid, extract_page_number, get_ffmpeg_path, parse_bili_url
+from .session import HTTPSessionPool
+from .singleflight import Lease, SingleFlight
+from .tracing import JobTrace, count_retry, record, stage
+from .throttle import (
+    RequestLimiter,
+    TokenBucket,
+    current_job_bucket,
+    enter_job_bucket,
+    exit_job_bucket,
+)
+from .utils import (
+    get_ffmpeg_path,
+    lazy_import,
+    parse_bili_url,
+)
+from .workspace import TEMP_DIR_NAME, SharedFile, Workspace, move_into_place
+from .writer import ChunkSizer, WriteBehind
+
+if TYPE_CHECKING:
+    from .index import OutputIndex
+
+aiohttp = lazy_import("aiohttp")
+requests = lazy_import("requests")
 
 
 class BilibiliDownloader:
     """B站视频下载器"""
-    
+
+    # B站API地址
+    API_BASE = "https://api.bilibili.com"
+    # 元数据请求超时
+    REQUEST_TIMEOUT = 10  # 接口请求超时（秒）
+    # 续传清单最短保存间隔（秒）
+    RESUME_SAVE_INTERVAL = 1.0
+    # 表示流地址已过期的HTTP状态码
+    URL_EXPIRED_STATUSES = (403, 404, 410)
+    # 单个镜像首字节探测的超时（秒）
+    MIRROR_PROBE_TIMEOUT = 3.0
+    # 判断镜像是否过慢的统计窗口（秒）
+    MIRROR_SPEED_WINDOW = 5.0
+
     def __init__(
         self,
         sessdata: str = "",
@@ -35,11 +119,35 @@ class BilibiliDownloader:
         buvid3: str = "",
         download_dir: str = "./downloads",
         ffmpeg_path: Optional[str] = None,
-        max_duration: int = 10800  # 默认最大时长3小时
+        max_duration: int = 10800,  # 默认最大时长3小时
+        max_connections: int = 100,
+        max_connections_per_host: int = 10,
+        dns_cache_ttl: int = 300,
+        download_segments: int = 4,
+        min_segment_size: int = 4 * 1024 * 1024,
+        resume_downloads: bool = True,
+        cache: Union[VideoInfoCache, bool] = True,
+        max_ffmpeg_workers: Optional[int] = None,
+        ffmpeg_timeout: Optional[float] = None,
+        stream_policy: Optional[StreamPolicy] = None,
+        probe_mirrors: bool = True,
+        mirror_min_speed: Optional[int] = 64 * 1024,
+        retry_policy: Optional[RetryPolicy] = None,
+        api_rate_limit: Optional[float] = None,
+        max_bandwidth: Optional[int] = None,
+        max_job_bandwidth: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None,
+        progress_interval: float = 0.5,
+        min_chunk_size: int = 64 * 1024,
+        max_chunk_size: int = 1024 * 1024,
+        write_buffer_size: int = 1024 * 1024,
+        max_pending_writes: int = 4,
+        tracer: Optional[Any] = None,
+        output_index: Optional[Union["OutputIndex", str]] = None,
     ):
         """
         初始化下载器
-        
+
         Args:
             sessdata: B站Cookie中的SESSDATA
             bili_jct: B站Cookie中的bili_jct
@@ -47,6 +155,32 @@ class BilibiliDownloader:
             download_dir: 下载目录
             ffmpeg_path: FFmpeg路径，不指定则自动查找
             max_duration: 最大允许下载时长（秒）
+            max_connections: 连接池最大连接总数
+            max_connections_per_host: 连接池每个主机的最大连接数
+            dns_cache_ttl: DNS缓存时间（秒）
+            download_segments: 单个文件的分段并发下载数，1表示不分段
+            min_segment_size: 每个分段的最小字节数，文件较小时自动减少分段
+            resume_downloads: 是否启用断点续传（在临时文件旁保存 .part.json 清单）
+            cache: 视频信息缓存，True使用默认的进程内缓存，False不缓存，也可传入自定义的 VideoInfoCache
+            max_ffmpeg_workers: 同时运行的FFmpeg进程最大数量，默认为CPU核数
+            ffmpeg_timeout: 单次FFmpeg处理的超时时间（秒），默认不限制
+            stream_policy: 音视频流选择策略，默认选择画质最高的视频和最小的音频
+            probe_mirrors: 有备用CDN镜像时是否先探测首字节时间并选择最快的镜像
+            mirror_min_speed: 单个连接低于该速度（字节/秒）时切换到其他镜像，None表示只在出错时切换
+            retry_policy: 接口请求和CDN下载的重试策略，默认最多尝试4次
+            api_rate_limit: B站接口每秒最多请求数，在所有并发任务间共享，None表示不限制
+            max_bandwidth: 所有下载合计的带宽上限（字节/秒），None表示不限制
+            max_job_bandwidth: 单个下载任务（一次 download_* 调用）的带宽上限（字节/秒），None表示不限制
+            progress: 进度回调，参数为 ProgressEvent；默认不输出进度，可传入 ConsoleProgress() 在控制台显示
+            progress_interval: 同一个文件两次进度回调的最短间隔（秒）
+            min_chunk_size: 单次读取网络数据的最小字节数
+            max_chunk_size: 单次读取网络数据的最大字节数，实际大小在两者之间按吞吐自动调整
+            write_buffer_size: 写盘的数据块大小，读到的数据攒满一块后再写入
+            max_pending_writes: 每个文件同时在后台写盘的最大块数，写盘跟不上时暂停读取
+            tracer: 追踪钩子，需提供 start_as_current_span(name, attributes=...)，可直接传入
+                OpenTelemetry 的 Tracer；每个任务创建一个根span，各阶段为其子span
+            output_index: 输出索引，或索引数据库的路径；设置后相同内容（视频、分P、流选择策略、
+                输出格式和编码参数都相同）已有有效文件时直接返回，不再下载和转码
         """
         self.sessdata = sessdata
         self.bili_jct = bili_jct
@@ -54,30 +188,299 @@ class BilibiliDownloader:
         self.download_dir = download_dir
         self.ffmpeg_path = ffmpeg_path or get_ffmpeg_path()
         self.max_duration = max_duration
-        
-        # 创建下载目录
-        os.makedirs(self.download_dir, exist_ok=True)
-        
+        self.download_segments = download_segments
+        self.min_segment_size = min_segment_size
+        self.resume_downloads = resume_downloads
+        self.stream_policy = stream_policy or StreamPolicy()
+        self.probe_mirrors = probe_mirrors
+        self.mirror_min_speed = mirror_min_speed
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        # 接口请求限流，触发风控时所有任务一起暂停
+        self.api_limiter = RequestLimiter(api_rate_limit)
+
+        # 带宽限制：全局令牌桶由所有下载共享，每个任务另有自己的令牌桶
+        self.bandwidth = TokenBucket(max_bandwidth)
+        self.max_job_bandwidth = max_job_bandwidth
+        self._job_buckets: "weakref.WeakSet[TokenBucket]" = weakref.WeakSet()
+
+        self.progress = progress
+        self.progress_interval = progress_interval
+
+        # 读取分块和后台写盘
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.write_buffer_size = write_buffer_size
+        self.max_pending_writes = max_pending_writes
+
+        self.tracer = tracer
+
+        # 已下载文件的索引，重复请求时跳过下载
+        if isinstance(output_index, str):
+            # 索引依赖sqlite3，用到时才导入
+            from .index import OutputIndex
+
+            output_index = OutputIndex(output_index)
+        self.output_index: Optional["OutputIndex"] = output_index
+
+        # 同一视频的并发任务共享元数据解析和媒体流下载，最后一个任务用完后删除共享的临时文件
+        self._resolving: SingleFlight[VideoInfo] = SingleFlight()
+        self._transfers: SingleFlight[SharedFile] = SingleFlight(
+            release=self._release_stream
+        )
+
+        # 视频信息缓存，避免 check_duration 后下载时重复获取页面
+        if cache is True:
+            cache = VideoInfoCache()
+        self.cache: Optional[VideoInfoCache] = cache or None
+
+        # FFmpeg以子进程运行，不阻塞事件循环
+        self.ffmpeg = FFmpegRunner(
+            max_workers=max_ffmpeg_workers, timeout=ffmpeg_timeout
+        )
+
+        # 长连接池，在多次下载之间复用TCP/TLS连接
+        self.session_pool = HTTPSessionPool(
+            max_connections=max_connections,
+            max_connections_per_host=max_connections_per_host,
+            dns_cache_ttl=dns_cache_ttl,
+            read_bufsize=max(max_chunk_size, 2**16),
+        )
+
+        # 下载目录在第一次下载时创建，构造下载器不访问文件系统
+        self._download_dir_ready = False
+
         # 请求头
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Referer": "https://www.bilibili.com"
+            "Referer": "https://www.bilibili.com",
         }
-        
+
         # 如果提供了认证信息，添加到Cookie
         if sessdata:
-            self.headers["Cookie"] = f"SESSDATA={sessdata}; bili_jct={bili_jct}; buvid3={buvid3}"
-    
+            self.headers["Cookie"] = (
+                f"SESSDATA={sessdata}; bili_jct={bili_jct}; buvid3={buvid3}"
+            )
+
+    async def __aenter__(self) -> "BilibiliDownloader":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def __enter__(self) -> "BilibiliDownloader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.session_pool.close_sync()
+
+    async def close(self):
+        """关闭连接池，释放所有连接"""
+        await self.session_pool.close()
+
+    def check_ffmpeg(self, encoders: Iterable[str] = ()) -> FFmpegInfo:
+        """
+        检查FFmpeg是否可用
+
+        探测结果按路径在进程内缓存，下载音视频前会自动检查；也可以在启动时调用，尽早发现环境问题。
+
+        Args:
+            encoders: 需要的编码器，如 ["libmp3lame"]
+
+        Returns:
+            FFmpegInfo: FFmpeg的版本和可用编码器
+
+        Raises:
+            FFmpegError: FFmpeg无法运行或缺少编码器
+        """
+        return check_ffmpeg(self.ffmpeg_path, encoders)
+
+    async def _check_ffmpeg_async(self, encoders: Iterable[str] = ()) -> FFmpegInfo:
+        """在线程中检查FFmpeg，只有第一次探测会启动子进程"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.check_ffmpeg, list(encoders)
+        )
+
+    def _ensure_download_dir(self):
+        if not self._download_dir_ready:
+            os.makedirs(self.download_dir, exist_ok=True)
+            self._download_dir_ready = True
+
+    def _index_key(
+        self,
+        url: str,
+        video_info: Optional[VideoInfo],
+        kind: str,
+        output_format: str,
+        settings: str,
+    ) -> Optional[str]:
+        """输出索引的键，未启用索引或无法从URL得到BV号时返回None"""
+        if self.output_index is None:
+            return None
+        if video_info is not None:
+            bvid, page = video_info.bvid, video_info.page
+        else:
+            bvid, page = parse_bili_url(url)
+        if not bvid:
+            return None
+        return self.output_index.make_key(
+            bvid, page, kind, self._quality_key(), output_format, settings
+        )
+
+    async def _indexed_result(
+        self, key: Optional[str], url: str, output_path: Optional[str], started: float
+    ) -> Optional[DownloadResult]:
+        """输出索引中有可直接使用的文件时构造下载结果，否则返回None"""
+        if key is None:
+            return None
+        entry = await asyncio.get_running_loop().run_in_executor(
+            None, self.output_index.lookup, key
+        )
+        if entry is None:
+            return None
+        # 指定了其他输出路径，或时长限制已调低时仍按正常流程处理
+        if output_path and os.path.abspath(output_path) != entry.path:
+            return None
+        if entry.duration > self.max_duration:
+            return None
+        return DownloadResult(
+            success=True,
+            message="已有相同内容的文件，跳过下载",
+            file_path=entry.path,
+            duration=entry.duration,
+            url=url,
+            elapsed=time.monotonic() - started,
+            postprocess=entry.postprocess,
+            from_index=True,
+        )
+
+    async def _index_output(
+        self,
+        key: Optional[str],
+        video_info: VideoInfo,
+        kind: str,
+        path: str,
+        postprocess: str,
+    ):
+        """把新生成的输出文件写入索引，计算校验和在线程中进行"""
+        if key is None:
+            return
+        record_entry = functools.partial(
+            self.output_index.record,
+            key,
+            video_info.bvid,
+            video_info.page,
+            kind,
+            path,
+            title=video_info.title,
+            duration=video_info.duration,
+            postprocess=postprocess,
+        )
+        with stage("index"):
+            await asyncio.get_running_loop().run_in_executor(None, record_entry)
+
+    def _temp_root(self) -> str:
+        """所有临时工作目录的上级目录"""
+        return os.path.join(self.download_dir, TEMP_DIR_NAME)
+
+    def _job_workspace(self, video_info: VideoInfo) -> Workspace:
+        """单个任务独占的临时目录，存放FFmpeg的输出，完成后再移动到目标路径"""
+        return Workspace(
+            self._temp_root(), prefix=f"{video_info.bvid}_p{video_info.page}_"
+        )
+
+    def _join_stream(
+        self,
+        video_info: VideoInfo,
+        stream: str,
+        description: str,
+        refresh_urls: Callable[[], Awaitable[List[str]]],
+    ) -> Lease[SharedFile]:
+        """
+        发起或加入一路媒体流的下载
+
+        同一视频、同一分P、同一画质策略的同一路流同时只下载一次，下载到按这些信息命名的工作目录中，
+        中断后下次运行可以从断点继续。该目录正被其他下载器实例或进程使用时改用独立的目录。
+
+        Args:
+            video_info: 视频信息
+            stream: "video" 或 "audio"
+            description: 进度显示中的流描述
+            refresh_urls: 流地址过期时获取新地址
+
+        Returns:
+            Lease: 用 _wait_stream 等待下载完成，用完后必须 release
+        """
+        key = (video_info.bvid, video_info.page, stream, self._quality_key())
+        urls = video_info.video_urls if stream == "video" else video_info.audio_urls
+
+        async def fetch() -> SharedFile:
+            digest = hashlib.sha1(self._quality_key().encode()).hexdigest()[:8]
+            workspace = Workspace(
+                self._temp_root(),
+                name=f"{video_info.bvid}_p{video_info.page}_{stream}_{digest}",
+            )
+            path = workspace.file(f"{stream}.m4s")
+            try:
+                # 传输名额在实际下载时占用，等待共享下载的任务不占名额；
+                # 任务继承发起者的上下文，使用其所在批次的限制
+                async with current_limits().transfer():
+                    size = await self._download_file(
+                        urls, path, description, refresh_urls, stream=stream
+                    )
+            except BaseException:
+                # 启用断点续传时保留已下载的部分
+                if self.resume_downloads and workspace.resumable:
+                    workspace.release()
+                else:
+                    workspace.cleanup()
+                raise
+            return SharedFile(path=path, size=size, workspace=workspace)
+
+        return self._transfers.join(key, fetch)
+
+    @staticmethod
+    async def _wait_stream(lease: Lease[SharedFile], stream: str) -> Tuple[str, int]:
+        """等待流下载完成，返回 (临时文件路径, 本任务实际下载的字节数)；加入其他任务的下载时字节数为0"""
+        started = time.perf_counter()
+        shared_file = await lease.wait()
+        if not lease.shared:
+            return shared_file.path, shared_file.size
+        # 下载耗时记在发起下载的任务上，加入的任务记录等待的时间
+        record(f"transfer_{stream}", time.perf_counter() - started)
+        return shared_file.path, 0
+
+    @staticmethod
+    def _release_stream(shared_file: SharedFile):
+        with stage("cleanup"):
+            shared_file.workspace.cleanup()
+
+    @property
+    def connection_stats(self) -> ConnectionStats:
+        """新建连接数与复用连接数统计"""
+        return self.session_pool.stats
+
+    def _run_sync(self, coro):
+        """在新事件循环中运行协程，结束后关闭绑定在该循环上的异步会话"""
+
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await self.session_pool.close_loop_session()
+
+        return asyncio.run(runner())
+
     def get_video_info(self, url: str) -> VideoInfo:
         """
         获取视频信息
-        
+
         Args:
             url: B站视频URL
-            
+
         Returns:
             VideoInfo: 视频信息对象
-            
+
         Raises:
             VideoNotFoundError: 视频未找到
             NetworkError: 网络请求失败
@@ -85,295 +488,1550 @@ class BilibiliDownloader:
         bvid, page = parse_bili_url(url)
         if not bvid:
             raise VideoNotFoundError(f"无法从URL中提取BV号: {url}")
-        
+
+        cached = self._get_cached_info(bvid, page)
+        if cached is not None and cached.video_url:
+            return cached
+
         try:
-            # 获取视频页面
-            resp = requests.get(url, headers=self.headers, timeout=10)
-            resp.raise_for_status()
-            
-            # 提取标题
-            title = ""
-            for pattern in [
-                r'<h1 title="(.*?)" class="video-title"',
-                r'<title data-vue-meta="true">(.*?)</title>',
-                r'<meta data-vue-meta="true" itemprop="name" name="title" content="(.*?)">',
-                r'<meta data-vue-meta="true" property="og:title" content="(.*?)">'
-            ]:
-                match = re.search(pattern, resp.text)
-                if match:
-                    title = match.group(1)
-                    break
-            
-            # 提取播放信息
-            playinfo_match = re.search(r'<script>window.__playinfo__=(.*?)</script>', resp.text)
-            if playinfo_match:
-                playinfo = json.loads(playinfo_match.group(1))
-                video_url = playinfo['data']['dash']['video'][0]['base_url']
-                
-                # 选择音质最低的音频（文件最小）
-                audio_list = playinfo['data']['dash']['audio']
-                audio_url = min(audio_list, key=lambda x: x.get('bandwidth', 0))['base_url']
-                
-                duration = playinfo['data'].get('timelength', 0) // 1000
+            if cached is not None and cached.cid:
+                # 元数据仍有效，只需重新获取播放地址
+                video_info = replace(cached, **self._get_playurl(bvid, cached.cid))
+            elif page > 1:
+                # 页面中的播放信息不一定对应所请求的分P，直接按分P的cid通过API获取
+                video_info = self._get_part_info(bvid, page)
             else:
-                # 使用API获取
-                video_url, audio_url, duration = self._get_info_from_api(bvid)
-            
-            return VideoInfo(
-                bvid=bvid,
-                title=title or f"BV{bvid}",
-                duration=duration,
-                video_url=video_url,
-                audio_url=audio_url,
-                page=page
-            )
-            
+                # 获取视频页面
+                watch = parse_watch_page(self._api_get(url, as_json=False))
+                cid = self._page_cid(watch)
+                if watch.playinfo:
+                    streams = self._extract_playinfo(watch.playinfo)
+                elif cid:
+                    # 页面中已有cid，只需获取播放地址
+                    streams = self._get_playurl(bvid, cid)
+                else:
+                    # 使用API获取
+                    streams = self._get_info_from_api(bvid)
+                if cid:
+                    streams["cid"] = cid
+
+                video_info = VideoInfo(
+                    bvid=bvid, title=watch.title or f"BV{bvid}", page=page, **streams
+                )
+
+            self._cache_info(video_info)
+            return video_info
+
         except requests.RequestException as e:
             raise NetworkError(f"获取视频信息失败: {e}")
         except (json.JSONDecodeError, KeyError) as e:
             raise BilibiliDownloadError(f"解析视频信息失败: {e}")
-    
-    def _get_info_from_api(self, bvid: str) -> Tuple[str, str, int]:
-        """通过API获取视频信息"""
-        api_url = f'https://api.bilibili.com/x/web-interface/view?bvid={bvid}'
-        
+
+    async def get_video_info_async(self, url: str) -> VideoInfo:
+        """
+        异步获取视频信息，不阻塞事件循环
+
+        Args:
+            url: B站视频URL
+
+        Returns:
+            VideoInfo: 视频信息对象
+
+        Raises:
+            VideoNotFoundError: 视频未找到
+            NetworkError: 网络请求失败
+        """
+        bvid, page = parse_bili_url(url)
+        if not bvid:
+            raise VideoNotFoundError(f"无法从URL中提取BV号: {url}")
+
+        cached = self._get_cached_info(bvid, page)
+        if cached is not None and cached.video_url:
+            return cached
+
+        # 同一视频同一分P的并发请求只解析一次
+        key = (bvid, page, self._quality_key())
+        resolve = functools.partial(
+            self._resolve_video_info_async, url, bvid, page, cached
+        )
+        async with self._resolving.hold(key, resolve) as (video_info, shared):
+            # 刷新流地址会原地修改 VideoInfo，共享的结果复制一份
+            return replace(video_info) if shared else video_info
+
+    async def _resolve_video_info_async(
+        self, url: str, bvid: str, page: int, cached: Optional[VideoInfo]
+    ) -> VideoInfo:
+        """获取页面或调用接口解析视频信息并写入缓存"""
         try:
-            resp = requests.get(api_url, headers=self.headers, timeout=10)
+            if cached is not None and cached.cid:
+                # 元数据仍有效，只需重新获取播放地址
+                with stage("resolve_api"):
+                    video_info = replace(
+                        cached, **await self._get_playurl_async(bvid, cached.cid)
+                    )
+            elif page > 1:
+                # 页面中的播放信息不一定对应所请求的分P，直接按分P的cid通过API获取
+                with stage("resolve_api"):
+                    video_info = await self._get_part_info_async(bvid, page)
+            else:
+                # 获取视频页面
+                with stage("resolve_page"):
+                    watch = parse_watch_page(
+                        await self._api_get_async(url, as_json=False)
+                    )
+                cid = self._page_cid(watch)
+                if watch.playinfo:
+                    streams = self._extract_playinfo(watch.playinfo)
+                elif cid:
+                    # 页面中已有cid，只需获取播放地址
+                    with stage("resolve_api"):
+                        streams = await self._get_playurl_async(bvid, cid)
+                else:
+                    # 使用API获取
+                    with stage("resolve_api"):
+                        streams = await self._get_info_from_api_async(bvid)
+                if cid:
+                    streams["cid"] = cid
+
+                video_info = VideoInfo(
+                    bvid=bvid, title=watch.title or f"BV{bvid}", page=page, **streams
+                )
+
+            self._cache_info(video_info)
+            return video_info
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise NetworkError(f"获取视频信息失败: {e}")
+        except (json.JSONDecodeError, KeyError) as e:
+            raise BilibiliDownloadError(f"解析视频信息失败: {e}")
+
+    def probe_video(self, url: str) -> VideoMetadata:
+        """
+        轻量获取视频元数据
+
+        只调用view接口，不下载视频页面也不获取播放地址，适合大批量的时长检查。
+
+        Args:
+            url: B站视频URL或BV号
+
+        Returns:
+            VideoMetadata: 视频元数据（标题、时长、cid、分P列表）
+
+        Raises:
+            VideoNotFoundError: 视频或分P不存在
+            NetworkError: 网络请求失败
+        """
+        bvid, page = parse_bili_url(url)
+        if not bvid:
+            raise VideoNotFoundError(f"无法从URL中提取BV号: {url}")
+
+        try:
+            metadata = self._build_metadata(bvid, page, self._fetch_view(bvid))
+        except (ValueError, KeyError) as e:
+            raise BilibiliDownloadError(f"解析视频信息失败: {e}")
+        self._cache_metadata(metadata)
+        return metadata
+
+    async def probe_video_async(self, url: str) -> VideoMetadata:
+        """
+        异步轻量获取视频元数据
+
+        Args:
+            url: B站视频URL或BV号
+
+        Returns:
+            VideoMetadata: 视频元数据（标题、时长、cid、分P列表）
+
+        Raises:
+            VideoNotFoundError: 视频或分P不存在
+            NetworkError: 网络请求失败
+        """
+        bvid, page = parse_bili_url(url)
+        if not bvid:
+            raise VideoNotFoundError(f"无法从URL中提取BV号: {url}")
+
+        try:
+            metadata = self._build_metadata(
+                bvid, page, await self._fetch_view_async(bvid)
+            )
+        except (ValueError, KeyError) as e:
+            raise BilibiliDownloadError(f"解析视频信息失败: {e}")
+        self._cache_metadata(metadata)
+        return metadata
+
+    async def probe_many(
+        self, urls: Iterable[str], max_concurrency: int = 16
+    ) -> List[Union[VideoMetadata, BilibiliDownloadError]]:
+        """
+        并发轻量获取多个视频的元数据
+
+        Args:
+            urls: B站视频URL或BV号列表
+            max_concurrency: 最大并发请求数
+
+        Returns:
+            List[Union[VideoMetadata, BilibiliDownloadError]]: 与输入顺序一致，
+                获取失败的位置为对应的异常对象
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def probe_one(url: str) -> Union[VideoMetadata, BilibiliDownloadError]:
+            async with semaphore:
+                try:
+                    return await self.probe_video_async(url)
+                except BilibiliDownloadError as e:
+                    return e
+
+        return list(await asyncio.gather(*(probe_one(url) for url in urls)))
+
+    @staticmethod
+    def _build_metadata(bvid: str, page: int, view: Dict[str, Any]) -> VideoMetadata:
+        """根据view接口返回构造视频元数据"""
+        pages = [
+            VideoPage(
+                page=p["page"],
+                cid=p["cid"],
+                title=p.get("part", ""),
+                duration=p.get("duration", 0),
+            )
+            for p in view.get("pages") or []
+        ]
+        if not pages:
+            pages = [
+                VideoPage(
+                    page=1,
+                    cid=view["cid"],
+                    title=view.get("title", ""),
+                    duration=view.get("duration", 0),
+                )
+            ]
+
+        selected = next((p for p in pages if p.page == page), None)
+        if selected is None:
+            raise VideoNotFoundError(f"视频 {bvid} 没有第{page}P（共{len(pages)}P）")
+
+        return VideoMetadata(
+            bvid=bvid,
+            title=view.get("title", ""),
+            duration=selected.duration,
+            cid=selected.cid,
+            page=page,
+            pages=pages,
+        )
+
+    @staticmethod
+    def _part_title(metadata: VideoMetadata) -> str:
+        """多P视频的标题带上分P序号和分P名"""
+        if len(metadata.pages) <= 1:
+            return metadata.title
+        part = next((p for p in metadata.pages if p.page == metadata.page), None)
+        part_name = part.title if part else ""
+        return f"{metadata.title} P{metadata.page} {part_name}".strip()
+
+    def _part_video_info(
+        self, metadata: VideoMetadata, streams: Dict[str, Any]
+    ) -> VideoInfo:
+        """根据分P元数据和播放地址构造视频信息"""
+        streams = dict(streams)
+        streams["duration"] = metadata.duration
+        return VideoInfo(
+            bvid=metadata.bvid,
+            title=self._part_title(metadata),
+            page=metadata.page,
+            cid=metadata.cid,
+            **streams,
+        )
+
+    def _get_part_info(self, bvid: str, page: int) -> VideoInfo:
+        """通过API按分P的cid获取视频信息"""
+        metadata = self._build_metadata(bvid, page, self._fetch_view(bvid))
+        return self._part_video_info(metadata, self._get_playurl(bvid, metadata.cid))
+
+    async def _get_part_info_async(self, bvid: str, page: int) -> VideoInfo:
+        """通过API按分P的cid异步获取视频信息"""
+        metadata = self._build_metadata(bvid, page, await self._fetch_view_async(bvid))
+        return self._part_video_info(
+            metadata, await self._get_playurl_async(bvid, metadata.cid)
+        )
+
+    def _cache_metadata(self, metadata: VideoMetadata):
+        """把探测到的静态元数据写入缓存，之后下载时只需获取播放地址"""
+        self._cache_info(
+            VideoInfo(
+                bvid=metadata.bvid,
+                title=self._part_title(metadata),
+                duration=metadata.duration,
+                page=metadata.page,
+                cid=metadata.cid,
+            )
+        )
+
+    def _quality_key(self) -> str:
+        """流地址缓存使用的画质标识，不同选择策略选出的流分开缓存"""
+        return self.stream_policy.key
+
+    def _get_cached_info(self, bvid: str, page: int) -> Optional[VideoInfo]:
+        if self.cache is None:
+            return None
+        return self.cache.get(bvid, page, self._quality_key())
+
+    def _cache_info(self, video_info: VideoInfo):
+        if self.cache is not None:
+            self.cache.set(video_info, self._quality_key())
+
+    @staticmethod
+    def _page_cid(watch: WatchPage) -> Optional[int]:
+        """页面 __INITIAL_STATE__ 中第1P的cid，有了它就不必再调用view接口"""
+        if watch.video_data:
+            return watch.video_data.get("cid") or None
+        return None
+
+    def _extract_playinfo(self, playinfo: Dict[str, Any]) -> Dict[str, Any]:
+        """从页面播放信息中按选择策略提取流信息，返回VideoInfo的字段"""
+        streams = self.stream_policy.select(playinfo["data"]["dash"])
+        streams["duration"] = playinfo["data"].get("timelength", 0) // 1000
+        return streams
+
+    def _on_api_retry(self, exc: BaseException, delay: float):
+        """记录重试；触发限流时让所有任务的接口请求一起暂停"""
+        count_retry()
+        if self.retry_policy.is_rate_limit(exc):
+            self.api_limiter.cooldown(delay)
+
+    def _api_get(self, url: str, as_json: bool = True) -> Any:
+        """带限流和重试的GET请求，返回JSON数据或页面的原始字节"""
+
+        def attempt():
+            self.api_limiter.acquire_sync()
+            resp = self.session_pool.get_sync().get(
+                url, headers=self.headers, timeout=self.REQUEST_TIMEOUT
+            )
             resp.raise_for_status()
-            data = resp.json()
-            
-            if data['code'] != 0:
-                raise VideoNotFoundError(f"API返回错误: {data.get('message', 'Unknown error')}")
-            
-            cid = data['data']['cid']
-            
-            # 获取播放URL
-            playurl_api = f'https://api.bilibili.com/x/player/playurl?bvid={bvid}&cid={cid}&qn=127&fnval=16'
-            play_resp = requests.get(playurl_api, headers=self.headers, timeout=10)
-            play_resp.raise_for_status()
-            play_data = play_resp.json()
-            
-            if play_data['code'] != 0:
-                raise BilibiliDownloadError(f"获取播放URL失败: {play_data.get('message', 'Unknown error')}")
-            
-            dash_data = play_data['data']['dash']
-            video_url = dash_data['video'][0]['base_url']
-            audio_url = dash_data['audio'][0]['base_url']
-            duration = dash_data.get('duration', 0)
-            
-            return video_url, audio_url, duration
-            
+            return check_api_response(resp.json()) if as_json else resp.content
+
+        return self.retry_policy.run_sync(attempt, self._on_api_retry)
+
+    async def _api_get_async(self, url: str, as_json: bool = True) -> Any:
+        """带限流和重试的异步GET请求，返回JSON数据或页面的原始字节"""
+
+        async def attempt():
+            await self.api_limiter.acquire()
+            session = await self.session_pool.get()
+            async with session.get(
+                url,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.REQUEST_TIMEOUT),
+            ) as resp:
+                resp.raise_for_status()
+                if as_json:
+                    return check_api_response(await resp.json(content_type=None))
+                return await resp.read()
+
+        return await self.retry_policy.run(attempt, self._on_api_retry)
+
+    def _fetch_view(self, bvid: str) -> Dict[str, Any]:
+        """调用view接口获取视频基本信息（标题、时长、分P列表），不获取播放地址"""
+        api_url = f"{self.API_BASE}/x/web-interface/view?bvid={bvid}"
+
+        try:
+            data = self._api_get(api_url)
+        except requests.RequestException as e:
+            raise NetworkError(f"API请求失败: {e}")
+
+        if data["code"] != 0:
+            raise VideoNotFoundError(
+                f"API返回错误: {data.get('message', 'Unknown error')}"
+            )
+        return data["data"]
+
+    async def _fetch_view_async(self, bvid: str) -> Dict[str, Any]:
+        """异步调用view接口获取视频基本信息"""
+        api_url = f"{self.API_BASE}/x/web-interface/view?bvid={bvid}"
+
+        try:
+            data = await self._api_get_async(api_url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise NetworkError(f"API请求失败: {e}")
+
+        if data["code"] != 0:
+            raise VideoNotFoundError(
+                f"API返回错误: {data.get('message', 'Unknown error')}"
+            )
+        return data["data"]
+
+    def _get_info_from_api(self, bvid: str) -> Dict[str, Any]:
+        """通过API获取视频信息"""
+        cid = self._fetch_view(bvid)["cid"]
+        streams = self._get_playurl(bvid, cid)
+        streams["cid"] = cid
+        return streams
+
+    def _get_playurl(self, bvid: str, cid: int) -> Dict[str, Any]:
+        """通过playurl接口获取播放地址"""
+        playurl_api = f"{self.API_BASE}/x/player/playurl?bvid={bvid}&cid={cid}&qn=127&fnval={self.stream_policy.fnval}"
+
+        try:
+            return self._extract_playurl(self._api_get(playurl_api))
         except requests.RequestException as e:
             raise NetworkError(f"API请求失败: {e}")
-    
-    async def _download_file(self, url: str, filepath: str, description: str = "文件"):
-        """异步下载文件"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=self.headers) as response:
-                response.raise_for_status()
-                
-                total_size = int(response.headers.get('content-length', 0))
-                downloaded = 0
-                
-                with open(filepath, 'wb') as f:
-                    async for chunk in response.content.iter_chunked(8192):
-                        f.write(chunk)
+
+    async def _get_info_from_api_async(self, bvid: str) -> Dict[str, Any]:
+        """通过API异步获取视频信息"""
+        cid = (await self._fetch_view_async(bvid))["cid"]
+        streams = await self._get_playurl_async(bvid, cid)
+        streams["cid"] = cid
+        return streams
+
+    async def _get_playurl_async(self, bvid: str, cid: int) -> Dict[str, Any]:
+        """通过playurl接口异步获取播放地址"""
+        playurl_api = f"{self.API_BASE}/x/player/playurl?bvid={bvid}&cid={cid}&qn=127&fnval={self.stream_policy.fnval}"
+
+        try:
+            return self._extract_playurl(await self._api_get_async(playurl_api))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise NetworkError(f"API请求失败: {e}")
+
+    def _extract_playurl(self, play_data: Dict[str, Any]) -> Dict[str, Any]:
+        """从playurl接口返回中按选择策略提取流信息，返回VideoInfo的字段"""
+        if play_data["code"] != 0:
+            raise BilibiliDownloadError(
+                f"获取播放URL失败: {play_data.get('message', 'Unknown error')}"
+            )
+
+        dash_data = play_data["data"]["dash"]
+        streams = self.stream_policy.select(dash_data)
+        streams["duration"] = dash_data.get("duration", 0)
+        return streams
+
+    async def _download_file(
+        self,
+        urls: List[str],
+        filepath: str,
+        description: str = "文件",
+        refresh_urls: Optional[Callable[[], Awaitable[List[str]]]] = None,
+        stream: str = "file",
+    ) -> int:
+        """
+        异步下载文件，服务器支持Range时分段并发下载并支持断点续传
+
+        有备用镜像时先按首字节时间选择最快的镜像，下载中某个镜像出错或过慢时
+        从断点切换到其他镜像继续。
+
+        Args:
+            urls: 文件地址，第一个为主地址，其余为备用镜像
+            filepath: 保存路径
+            description: 进度显示中的描述
+            refresh_urls: 全部地址过期（403/404/410）时用于获取新地址的回调，已完成的部分会保留
+            stream: 计时中使用的流名称，耗时记为 connect_<stream> 和 transfer_<stream>
+
+        Returns:
+            int: 本次实际下载的字节数
+        """
+        mirrors = MirrorSet(urls)
+        refreshed = False
+        restarted = False
+        with stage(f"transfer_{stream}", stream=stream):
+            while True:
+                try:
+                    return await self._download_file_once(
+                        mirrors, filepath, description, stream
+                    )
+                except RemoteFileChangedError:
+                    if restarted:
+                        raise
+                    # 下载过程中远端文件被替换，已下载的部分作废，按新的文件重新下载
+                    count_retry()
+                    restarted = True
+                except aiohttp.ClientResponseError as e:
+                    if (
+                        refresh_urls is None
+                        or refreshed
+                        or e.status not in self.URL_EXPIRED_STATUSES
+                    ):
+                        raise
+                    # base_url过期，重新获取地址后从断点继续
+                    count_retry()
+                    mirrors.replace(await refresh_urls())
+                    refreshed = True
+
+    async def _download_file_once(
+        self, mirrors: MirrorSet, filepath: str, description: str, stream: str
+    ) -> int:
+        """下载一次文件，不处理地址过期，返回下载的字节数"""
+        session = await self.session_pool.get()
+
+        remote = None
+        if len(mirrors) > 1 and self.probe_mirrors:
+            # 探测结果同时用于分段下载，不额外增加请求
+            with stage(f"connect_{stream}", mirrors=len(mirrors)):
+                remote = await self.retry_policy.run(
+                    lambda: rank_mirrors(
+                        session, mirrors, self.headers, self.MIRROR_PROBE_TIMEOUT
+                    ),
+                    self._on_download_retry,
+                )
+        elif self.download_segments > 1 or self.resume_downloads:
+            with stage(f"connect_{stream}", mirrors=len(mirrors)):
+                remote = await self.retry_policy.run(
+                    lambda: probe_remote_file(session, mirrors.current, self.headers),
+                    self._on_download_retry,
+                )
+
+        if remote is not None and remote.accept_ranges and remote.size > 0:
+            return await self._download_ranges(mirrors, filepath, remote, description)
+
+        fd = os.open(
+            filepath,
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+            0o666,
+        )
+        writer = self._writer(fd)
+        buffer = writer.block(0)
+        # 没有探测请求时，以收到第一块数据的时间作为连接耗时
+        connect_started = time.perf_counter() if remote is None else None
+        try:
+            async for chunk in self._iter_stream(mirrors, description):
+                if connect_started is not None:
+                    record(f"connect_{stream}", time.perf_counter() - connect_started)
+                    connect_started = None
+                await buffer.write(chunk)
+            await buffer.flush()
+            await writer.flush()
+        finally:
+            await writer.close()
+            os.close(fd)
+        return buffer.offset
+
+    def _writer(
+        self, fd: int, on_written: Optional[Callable[[int, int], None]] = None
+    ) -> WriteBehind:
+        """创建文件的后台写入队列"""
+        return WriteBehind(
+            fd, self.write_buffer_size, self.max_pending_writes, on_written
+        )
+
+    def _chunk_sizer(self) -> ChunkSizer:
+        """创建单个连接的读取分块大小调节器"""
+        return ChunkSizer(self.min_chunk_size, self.max_chunk_size)
+
+    @staticmethod
+    async def _read_chunks(
+        response: "aiohttp.ClientResponse", sizer: ChunkSizer
+    ) -> AsyncIterator[bytes]:
+        """按 sizer 给出的大小逐块读取响应体"""
+        while True:
+            chunk = await response.content.read(sizer.size)
+            if not chunk:
+                return
+            sizer.record(len(chunk))
+            yield chunk
+
+    def _speed_monitor(self, can_switch: bool) -> SpeedMonitor:
+        """创建镜像测速器，没有可切换的镜像时不检测"""
+        return SpeedMonitor(
+            self.mirror_min_speed if can_switch else None, self.MIRROR_SPEED_WINDOW
+        )
+
+    async def _backoff(self, exc: BaseException, retries: int):
+        """所有镜像都试过后按重试策略退避，不应重试时抛出原异常"""
+        delay = self.retry_policy.delay_for(exc, retries)
+        if delay is None:
+            raise exc
+        count_retry()
+        await asyncio.sleep(delay)
+
+    @staticmethod
+    def _on_download_retry(exc: BaseException, delay: float):
+        """CDN请求重试时计数"""
+        count_retry()
+
+    def set_bandwidth(self, max_bandwidth: Optional[int]):
+        """
+        运行时调整全局带宽上限，正在进行的下载随即生效
+
+        Args:
+            max_bandwidth: 所有下载合计的带宽上限（字节/秒），None表示不限制
+        """
+        self.bandwidth.set_rate(max_bandwidth)
+
+    def set_job_bandwidth(self, max_job_bandwidth: Optional[int]):
+        """
+        运行时调整单个任务的带宽上限，对正在进行和之后开始的任务都生效
+
+        Args:
+            max_job_bandwidth: 单个任务的带宽上限（字节/秒），None表示不限制
+        """
+        self.max_job_bandwidth = max_job_bandwidth
+        for bucket in list(self._job_buckets):
+            bucket.set_rate(max_job_bandwidth)
+
+    def _enter_job(self, url: str, kind: str) -> Tuple[Tuple[Any, Any], JobTrace]:
+        """
+        进入一次下载任务：设置进度事件的任务标识，创建独立的带宽令牌桶和计时上下文
+
+        Returns:
+            用于退出的token，以及记录各阶段耗时的 JobTrace
+        """
+        bucket = TokenBucket(self.max_job_bandwidth)
+        self._job_buckets.add(bucket)
+        tokens = enter_job(url), enter_job_bucket(bucket)
+        trace = JobTrace(self.tracer, "download", {"url": url, "kind": kind})
+        trace.enter()
+        return tokens, trace
+
+    @staticmethod
+    def _exit_job(tokens: Tuple[Any, Any], trace: JobTrace):
+        """退出下载任务，恢复之前的上下文"""
+        trace.exit()
+        job_token, bucket_token = tokens
+        exit_job_bucket(bucket_token)
+        exit_job(job_token)
+
+    def _tracker(self, description: str, total: Optional[int] = None, initial: int = 0):
+        """创建单个文件的进度统计，未设置进度回调时不做统计"""
+        if self.progress is None:
+            return NULL_TRACKER
+        return ProgressTracker(
+            self.progress, description, total, initial, self.progress_interval
+        )
+
+    async def _throttle(self, nbytes: int):
+        """依次按任务、批次和全局带宽限制消耗流量"""
+        job = current_job_bucket()
+        if job is not None:
+            await job.acquire(nbytes)
+        await current_limits().throttle(nbytes)
+        await self.bandwidth.acquire(nbytes)
+
+    async def _iter_stream(
+        self, mirrors: MirrorSet, description: str
+    ) -> AsyncIterator[bytes]:
+        """
+        在单个连接上按顺序逐块读取文件内容
+
+        镜像出错或过慢时从断点切换到下一个镜像；所有镜像都试过后按重试策略退避重试。
+        """
+        session = await self.session_pool.get()
+        tracker = self._tracker(description)
+        chunks = self._iter_mirrors(session, mirrors, tracker)
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except BaseException:
+            tracker.finish(success=False)
+            raise
+        finally:
+            # 提前停止读取时及时释放连接
+            await chunks.aclose()
+        tracker.finish()
+
+    async def _iter_mirrors(
+        self,
+        session: "aiohttp.ClientSession",
+        mirrors: MirrorSet,
+        tracker: ProgressTracker,
+    ) -> AsyncIterator[bytes]:
+        """_iter_stream 的实现：依次尝试各镜像并从断点继续"""
+        downloaded = 0
+        attempt = 0
+        retries = 0
+        sizer = self._chunk_sizer()
+
+        while True:
+            mirror = mirrors.current
+            attempt += 1
+            untried = attempt < len(mirrors)
+            monitor = self._speed_monitor(untried)
+            headers = self.headers
+            if downloaded:
+                headers = dict(self.headers)
+                headers["Range"] = f"bytes={downloaded}-"
+
+            try:
+                async with session.get(mirror, headers=headers) as response:
+                    response.raise_for_status()
+                    if downloaded and response.status != 206:
+                        raise NetworkError(
+                            f"镜像不支持从断点继续: HTTP {response.status}"
+                        )
+                    if not downloaded:
+                        tracker.set_total(
+                            int(response.headers.get("content-length", 0))
+                        )
+
+                    async for chunk in self._read_chunks(response, sizer):
+                        yield chunk
                         downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            print(f"\r下载{description}: {progress:.1f}%", end='')
-                
-                print()  # 换行
-    
-    def _convert_to_audio(self, input_file: str, output_file: str, audio_format: str = "mp3"):
-        """转换为音频格式"""
+                        monitor.record(len(chunk))
+                        tracker.update(len(chunk))
+
+                        throttle_started = time.monotonic()
+                        await self._throttle(len(chunk))
+                        monitor.pause(time.monotonic() - throttle_started)
+
+                        if monitor.too_slow():
+                            break
+                    else:
+                        return
+            except (aiohttp.ClientError, asyncio.TimeoutError, NetworkError) as e:
+                if not untried:
+                    retries += 1
+                    await self._backoff(e, retries)
+            mirrors.demote(mirror)
+
+    def _load_manifest(
+        self, url: str, filepath: str, remote: RemoteFileInfo
+    ) -> DownloadManifest:
+        """读取可用的续传清单，没有或已失效时创建新清单并预分配文件"""
+        path = manifest_path(filepath)
+        if self.resume_downloads:
+            manifest = DownloadManifest.load(path)
+            if (
+                manifest is not None
+                and manifest.matches(
+                    url_identity(url), remote.size, remote.etag, remote.last_modified
+                )
+                and os.path.exists(filepath)
+                and os.path.getsize(filepath) == remote.size
+            ):
+                return manifest
+
+        preallocate(filepath, remote.size)
+        return DownloadManifest(
+            path=path,
+            url_id=url_identity(url),
+            total_size=remote.size,
+            etag=remote.etag,
+            last_modified=remote.last_modified,
+        )
+
+    async def _download_ranges(
+        self,
+        mirrors: MirrorSet,
+        filepath: str,
+        remote: RemoteFileInfo,
+        description: str,
+    ) -> int:
+        """
+        将文件缺失的字节区间并发下载到预分配的文件中，返回本次下载的字节数
+
+        分段出错或过慢时从已下载的位置切换到下一个镜像，所有分段共享镜像的优先顺序。
+        """
+        session = await self.session_pool.get()
+        manifest = self._load_manifest(mirrors.current, filepath, remote)
+        ranges = split_missing_ranges(
+            manifest.missing_ranges(), self.download_segments, self.min_segment_size
+        )
+        resumed = manifest.completed_bytes
+        tracker = self._tracker(description, remote.size, resumed)
+        downloaded = resumed
+        last_saved = time.monotonic()
+
+        # 续传时要求服务器上的文件未变化，否则会返回200整个文件
+        validator = manifest.etag or manifest.last_modified
+
+        def remote_changed(response) -> bool:
+            # If-Range 不匹配时服务器返回200，响应中的校验值与续传使用的不同
+            current = response.headers.get("ETag" if manifest.etag else "Last-Modified")
+            return bool(validator) and current is not None and current != validator
+
+        def save_manifest(force: bool = False):
+            nonlocal last_saved
+            if not self.resume_downloads:
+                return
+            now = time.monotonic()
+            if force or now - last_saved >= self.RESUME_SAVE_INTERVAL:
+                manifest.save()
+                last_saved = now
+
+        def on_written(offset: int, length: int):
+            # 只记录已写入磁盘的区间，中断后据此续传
+            manifest.add_range(offset, offset + length - 1)
+            save_manifest()
+
+        async def fetch_range(start: int, end: int):
+            nonlocal downloaded
+            offset = start
+            attempt = 0
+            retries = 0
+            sizer = self._chunk_sizer()
+            buffer = writer.block(start)
+            while True:
+                mirror = mirrors.current
+                attempt += 1
+                untried = attempt < len(mirrors)
+                monitor = self._speed_monitor(untried)
+                slow = False
+                headers = dict(self.headers)
+                headers["Range"] = f"bytes={offset}-{end}"
+                if validator:
+                    headers["If-Range"] = validator
+
+                try:
+                    async with session.get(mirror, headers=headers) as response:
+                        response.raise_for_status()
+                        if response.status != 206:
+                            if not untried and remote_changed(response):
+                                # 远端文件已变化：记录新的校验值，由 _download_file 重新下载，
+                                # 不能只改 If-Range 继续，否则新旧两个版本的数据会拼在同一个文件里
+                                manifest.etag = response.headers.get("ETag")
+                                manifest.last_modified = response.headers.get(
+                                    "Last-Modified"
+                                )
+                                raise RemoteFileChangedError(
+                                    f"{description}在下载过程中已变化"
+                                )
+                            if not untried:
+                                # 服务器没有按Range返回，且无法确认文件未变化，清单作废
+                                manifest.completed = []
+                            raise NetworkError(
+                                f"服务器未按Range返回分段: HTTP {response.status}"
+                            )
+
+                        async for chunk in self._read_chunks(response, sizer):
+                            await buffer.write(chunk)
+                            offset += len(chunk)
+                            downloaded += len(chunk)
+                            monitor.record(len(chunk))
+                            tracker.update(len(chunk))
+
+                            throttle_started = time.monotonic()
+                            await self._throttle(len(chunk))
+                            monitor.pause(time.monotonic() - throttle_started)
+
+                            if offset <= end and monitor.too_slow():
+                                slow = True
+                                break
+
+                    if offset == end + 1:
+                        await buffer.flush()
+                        return
+                    if not slow:
+                        raise NetworkError(
+                            f"分段下载不完整: {start}-{end}, 实际到 {offset - 1}"
+                        )
+                except RemoteFileChangedError:
+                    raise
+                except (aiohttp.ClientError, asyncio.TimeoutError, NetworkError) as e:
+                    if not untried:
+                        retries += 1
+                        await self._backoff(e, retries)
+                # 剩余部分换下一个镜像继续
+                mirrors.demote(mirror)
+
+        fd = os.open(filepath, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+        writer = self._writer(fd, on_written)
+        tasks = [
+            asyncio.ensure_future(fetch_range(start, end)) for start, end in ranges
+        ]
         try:
-            ff = FFmpeg(
-                executable=self.ffmpeg_path,
-                global_options=['-y'],
-                inputs={input_file: None},
-                outputs={output_file: f'-acodec libmp3lame -ab 128k' if audio_format == 'mp3' else None}
+            await asyncio.gather(*tasks)
+            await writer.flush()
+        except BaseException as e:
+            # 任一分段失败时取消其余分段，并等待在写的数据块完成，避免写入已关闭的文件
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await writer.close()
+            if isinstance(e, RemoteFileChangedError):
+                # 包括取消前刚写入的旧数据，全部作废
+                manifest.completed = []
+            # 保留已完成的部分，下次从断点继续
+            save_manifest(force=True)
+            tracker.finish(success=False)
+            raise
+        finally:
+            os.close(fd)
+
+        manifest.remove()
+        tracker.finish()
+        return downloaded - resumed
+
+    async def refresh_stream_urls(
+        self, video_info: VideoInfo, url: Optional[str] = None
+    ) -> VideoInfo:
+        """
+        重新获取视频流地址，用于base_url过期的情况
+
+        只更新 video_info 中的流地址，已下载的临时文件和续传清单不受影响，
+        再次下载时会从断点继续。
+
+        Args:
+            video_info: 需要刷新的视频信息
+            url: 视频页面URL，不指定则根据BV号和分P号生成
+
+        Returns:
+            VideoInfo: 更新后的视频信息（与传入的是同一个对象）
+        """
+        url = (
+            url
+            or f"https://www.bilibili.com/video/{video_info.bvid}?p={video_info.page}"
+        )
+        if self.cache is not None:
+            self.cache.invalidate_streams(
+                video_info.bvid, video_info.page, self._quality_key()
             )
-            ff.run()
-            
-            # 删除临时文件
-            if os.path.exists(input_file):
-                os.remove(input_file)
-                
+        fresh = await self.get_video_info_async(url)
+        video_info.video_url = fresh.video_url
+        video_info.audio_url = fresh.audio_url
+        video_info.video_backup_urls = fresh.video_backup_urls
+        video_info.audio_backup_urls = fresh.audio_backup_urls
+        return video_info
+
+    async def _convert_to_audio(
+        self,
+        input_file: str,
+        output_file: str,
+        audio_format: str = "mp3",
+        copy: bool = False,
+    ):
+        """转换为音频格式，copy为True时只重新封装不转码"""
+        try:
+            with stage("postprocess", method="copy" if copy else "transcode"):
+                await self.ffmpeg.run(
+                    self.ffmpeg_path,
+                    inputs={input_file: None},
+                    outputs={output_file: audio_output_options(audio_format, copy)},
+                )
         except Exception as e:
             raise FFmpegError(f"音频转换失败: {e}")
-    
-    async def download_audio_async(self, url: str, output_path: Optional[str] = None, audio_format: str = "mp3") -> DownloadResult:
+
+    async def _stream_to_audio(
+        self,
+        urls: List[str],
+        output_file: str,
+        audio_format: str,
+        copy: bool,
+        refresh_urls: Optional[Callable[[], Awaitable[List[str]]]] = None,
+    ) -> int:
+        """边下载边把音频流写入FFmpeg，不落地临时文件，返回下载的字节数"""
+        downloaded = 0
+
+        async def source(stream_urls: List[str]) -> AsyncIterator[bytes]:
+            nonlocal downloaded
+            async for chunk in self._iter_stream(MirrorSet(stream_urls), "音频"):
+                downloaded += len(chunk)
+                yield chunk
+
+        outputs = {output_file: audio_output_options(audio_format, copy)}
+        try:
+            try:
+                await self.ffmpeg.run_piped(self.ffmpeg_path, source(urls), outputs)
+            except aiohttp.ClientResponseError as e:
+                # 还没有开始传输时地址过期，刷新后重试一次
+                if (
+                    refresh_urls is None
+                    or downloaded
+                    or e.status not in self.URL_EXPIRED_STATUSES
+                ):
+                    raise
+                await self.ffmpeg.run_piped(
+                    self.ffmpeg_path, source(await refresh_urls()), outputs
+                )
+        except FFmpegError as e:
+            self._remove_partial(output_file)
+            raise FFmpegError(f"音频转换失败: {e}")
+        except BaseException:
+            # 下载中断时FFmpeg已被终止，输出文件不完整
+            self._remove_partial(output_file)
+            raise
+        return downloaded
+
+    @staticmethod
+    def _remove_partial(filepath: str):
+        """删除不完整的输出文件"""
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+    async def _merge_video(self, temp_video: str, temp_audio: str, output_path: str):
+        """合并视频和音频"""
+        try:
+            with stage("postprocess", method="merge"):
+                await self.ffmpeg.run(
+                    self.ffmpeg_path,
+                    inputs={temp_video: None, temp_audio: None},
+                    outputs={output_path: "-c:v copy -c:a copy"},
+                )
+        except Exception as e:
+            raise FFmpegError(f"视频合并失败: {e}")
+
+    async def download_audio_async(
+        self,
+        url: str,
+        output_path: Optional[str] = None,
+        audio_format: str = "mp3",
+        transcode: bool = True,
+        streaming: bool = False,
+        video_info: Optional[VideoInfo] = None,
+    ) -> DownloadResult:
         """
         异步下载音频
-        
+
+        音频流的编码与目标格式兼容时（如AAC音频输出m4a）直接流复制，不重新编码。
+
         Args:
             url: B站视频URL
             output_path: 输出文件路径，不指定则自动生成
-            audio_format: 音频格式，支持 mp3, wav, m4a
-            
+            audio_format: 音频格式，支持 mp3, wav, m4a, flac
+            transcode: 为False时忽略audio_format，按音频流编码选择容器（AAC为m4a）并直接流复制
+            streaming: 为True时边下载边通过管道交给FFmpeg处理，不写临时文件；
+                此模式使用单连接顺序下载，不支持分段下载和断点续传
+            video_info: 已获取的视频信息，传入时不再重新获取
+
         Returns:
             DownloadResult: 下载结果
         """
+        started = time.monotonic()
+        limits = current_limits()
+        bytes_downloaded = 0
+        workspace: Optional[Workspace] = None
+        job, trace = self._enter_job(url, "audio")
         try:
+            # 相同内容已经下载过时直接返回
+            index_key = self._index_key(
+                url,
+                video_info,
+                "audio",
+                audio_format if transcode else "auto",
+                (
+                    (audio_output_options(audio_format, False) or "default")
+                    if transcode
+                    else "copy"
+                ),
+            )
+            indexed = await self._indexed_result(index_key, url, output_path, started)
+            if indexed is not None:
+                return trace.finish(indexed)
+
             # 获取视频信息
-            video_info = self.get_video_info(url)
-            
+            if video_info is None:
+                async with limits.metadata():
+                    with stage("resolve"):
+                        video_info = await self.get_video_info_async(url)
+
             # 检查时长限制
             if video_info.duration > self.max_duration:
                 raise DurationExceededError(
                     f"视频时长({video_info.duration}秒)超过限制({self.max_duration}秒)"
                 )
-            
+
+            # 选择流复制或转码
+            if not transcode:
+                audio_format = audio_container_for_codec(video_info.audio_codec)
+            copy = can_copy_audio(video_info.audio_codec, audio_format)
+
+            # 下载前确认FFmpeg可用，避免下载完成后才发现无法转换
+            await self._check_ffmpeg_async(audio_encoders(audio_format, copy))
+            self._ensure_download_dir()
+
             # 生成文件名
             if not output_path:
-                safe_title = re.sub(r'[<>:"/\\|?*]', '_', video_info.title)[:50]
-                timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+                safe_title = re.sub(r'[<>:"/\\|?*]', "_", video_info.title)[:50]
+                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
                 output_path = os.path.join(
-                    self.download_dir,
-                    f"{safe_title}_{timestamp}.{audio_format}"
+                    self.download_dir, f"{safe_title}_{timestamp}.{audio_format}"
                 )
-            
-            # 下载音频流
-            temp_audio = os.path.join(self.download_dir, f"temp_audio_{video_info.bvid}.m4s")
-            await self._download_file(video_info.audio_url, temp_audio, "音频")
-            
-            # 转换格式
-            self._convert_to_audio(temp_audio, output_path, audio_format)
-            
-            return DownloadResult(
-                success=True,
-                message="下载成功",
-                file_path=output_path,
-                duration=video_info.duration,
-                video_info=video_info
+
+            async def refresh_audio_urls() -> List[str]:
+                return (await self.refresh_stream_urls(video_info, url)).audio_urls
+
+            # FFmpeg先输出到任务自己的工作目录，完成后再移动到目标路径
+            workspace = self._job_workspace(video_info)
+            staged_output = workspace.file("output" + os.path.splitext(output_path)[1])
+
+            if streaming:
+                # 下载与转换同时进行
+                async with limits.transfer(), limits.ffmpeg():
+                    # 下载和FFmpeg处理同时进行，耗时都计入 transfer_audio
+                    with stage("transfer_audio", stream="audio", streaming=True):
+                        bytes_downloaded = await self._stream_to_audio(
+                            video_info.audio_urls,
+                            staged_output,
+                            audio_format,
+                            copy,
+                            refresh_audio_urls,
+                        )
+            else:
+                # 下载音频流，同一音频流的并发任务共享一次下载
+                audio = self._join_stream(
+                    video_info, "audio", "音频", refresh_audio_urls
+                )
+                try:
+                    temp_audio, bytes_downloaded = await self._wait_stream(
+                        audio, "audio"
+                    )
+
+                    # 转换格式
+                    async with limits.ffmpeg():
+                        await self._convert_to_audio(
+                            temp_audio, staged_output, audio_format, copy
+                        )
+                finally:
+                    audio.release()
+
+            move_into_place(staged_output, output_path)
+            postprocess = "copy" if copy else "transcode"
+            await self._index_output(
+                index_key, video_info, "audio", output_path, postprocess
             )
-            
+
+            return trace.finish(
+                DownloadResult(
+                    success=True,
+                    message="下载成功",
+                    file_path=output_path,
+                    duration=video_info.duration,
+                    video_info=video_info,
+                    url=url,
+                    bytes_downloaded=bytes_downloaded,
+                    elapsed=time.monotonic() - started,
+                    postprocess=postprocess,
+                )
+            )
+
         except Exception as e:
-            return DownloadResult(
-                success=False,
-                message=str(e)
+            return trace.finish(
+                DownloadResult(
+                    success=False,
+                    message=str(e),
+                    url=url,
+                    bytes_downloaded=bytes_downloaded,
+                    elapsed=time.monotonic() - started,
+                )
             )
-    
-    def download_audio(self, url: str, output_path: Optional[str] = None, audio_format: str = "mp3") -> DownloadResult:
+        finally:
+            if workspace is not None:
+                workspace.cleanup()
+            self._exit_job(job, trace)
+
+    def download_audio(
+        self,
+        url: str,
+        output_path: Optional[str] = None,
+        audio_format: str = "mp3",
+        transcode: bool = True,
+        streaming: bool = False,
+    ) -> DownloadResult:
         """
         同步下载音频
-        
+
         Args:
             url: B站视频URL
             output_path: 输出文件路径
             audio_format: 音频格式
-            
+            transcode: 为False时按音频流编码选择容器并直接流复制
+            streaming: 为True时边下载边交给FFmpeg处理，不写临时文件
+
         Returns:
             DownloadResult: 下载结果
         """
-        return asyncio.run(self.download_audio_async(url, output_path, audio_format))
-    
-    async def download_video_async(self, url: str, output_path: Optional[str] = None, video_format: str = "mp4") -> DownloadResult:
+        return self._run_sync(
+            self.download_audio_async(
+                url, output_path, audio_format, transcode, streaming
+            )
+        )
+
+    async def download_video_async(
+        self,
+        url: str,
+        output_path: Optional[str] = None,
+        video_format: str = "mp4",
+        video_info: Optional[VideoInfo] = None,
+    ) -> DownloadResult:
         """
         异步下载视频
-        
+
         Args:
             url: B站视频URL
             output_path: 输出文件路径
             video_format: 视频格式
-            
+            video_info: 已获取的视频信息，传入时不再重新获取
+
         Returns:
             DownloadResult: 下载结果
         """
+        started = time.monotonic()
+        limits = current_limits()
+        bytes_downloaded = 0
+        workspace: Optional[Workspace] = None
+        job, trace = self._enter_job(url, "video")
         try:
+            # 相同内容已经下载过时直接返回
+            index_key = self._index_key(url, video_info, "video", video_format, "merge")
+            indexed = await self._indexed_result(index_key, url, output_path, started)
+            if indexed is not None:
+                return trace.finish(indexed)
+
             # 获取视频信息
-            video_info = self.get_video_info(url)
-            
+            if video_info is None:
+                async with limits.metadata():
+                    with stage("resolve"):
+                        video_info = await self.get_video_info_async(url)
+
             # 检查时长限制
             if video_info.duration > self.max_duration:
                 raise DurationExceededError(
                     f"视频时长({video_info.duration}秒)超过限制({self.max_duration}秒)"
                 )
-            
+
+            # 下载前确认FFmpeg可用，避免下载完成后才发现无法合并
+            await self._check_ffmpeg_async()
+            self._ensure_download_dir()
+
             # 生成文件名
             if not output_path:
-                safe_title = re.sub(r'[<>:"/\\|?*]', '_', video_info.title)[:50]
-                timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+                safe_title = re.sub(r'[<>:"/\\|?*]', "_", video_info.title)[:50]
+                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
                 output_path = os.path.join(
-                    self.download_dir,
-                    f"{safe_title}_{timestamp}.{video_format}"
+                    self.download_dir, f"{safe_title}_{timestamp}.{video_format}"
                 )
-            
-            # 下载视频和音频流
-            temp_video = os.path.join(self.download_dir, f"temp_video_{video_info.bvid}.m4s")
-            temp_audio = os.path.join(self.download_dir, f"temp_audio_{video_info.bvid}.m4s")
-            
-            # 并发下载
-            await asyncio.gather(
-                self._download_file(video_info.video_url, temp_video, "视频"),
-                self._download_file(video_info.audio_url, temp_audio, "音频")
-            )
-            
-            # 合并视频和音频
+
+            async def refresh_video_urls() -> List[str]:
+                return (await self.refresh_stream_urls(video_info, url)).video_urls
+
+            async def refresh_audio_urls() -> List[str]:
+                return (await self.refresh_stream_urls(video_info, url)).audio_urls
+
+            workspace = self._job_workspace(video_info)
+            staged_output = workspace.file("output" + os.path.splitext(output_path)[1])
+
+            # 并发下载视频和音频流，与其他任务相同的流共享一次下载
+            video = self._join_stream(video_info, "video", "视频", refresh_video_urls)
+            audio = self._join_stream(video_info, "audio", "音频", refresh_audio_urls)
             try:
-                ff = FFmpeg(
-                    executable=self.ffmpeg_path,
-                    global_options=['-y'],
-                    inputs={temp_video: None, temp_audio: None},
-                    outputs={output_path: '-c:v copy -c:a copy'}
+                (temp_video, video_bytes), (temp_audio, audio_bytes) = (
+                    await asyncio.gather(
+                        self._wait_stream(video, "video"),
+                        self._wait_stream(audio, "audio"),
+                    )
+                )
+                bytes_downloaded = video_bytes + audio_bytes
+
+                # 合并视频和音频
+                async with limits.ffmpeg():
+                    await self._merge_video(temp_video, temp_audio, staged_output)
+            finally:
+                video.release()
+                audio.release()
+
+            move_into_place(staged_output, output_path)
+            await self._index_output(
+                index_key, video_info, "video", output_path, "merge"
+            )
+
+            return trace.finish(
+                DownloadResult(
+                    success=True,
+                    message="下载成功",
+                    file_path=output_path,
+                    duration=video_info.duration,
+                    video_info=video_info,
+                    url=url,
+                    bytes_downloaded=bytes_downloaded,
+                    elapsed=time.monotonic() - started,
+                    postprocess="merge",
                 )
-                ff.run()
-                
-                # 删除临时文件
-                for temp_file in [temp_video, temp_audio]:
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                        
-            except Exception as e:
-                raise FFmpegError(f"视频合并失败: {e}")
-            
-            return DownloadResult(
-                success=True,
-                message="下载成功",
-                file_path=output_path,
-                duration=video_info.duration,
-                video_info=video_info
             )
-            
+
         except Exception as e:
-            return DownloadResult(
-                success=False,
-                message=str(e)
+            return trace.finish(
+                DownloadResult(
+                    success=False,
+                    message=str(e),
+                    url=url,
+                    bytes_downloaded=bytes_downloaded,
+                    elapsed=time.monotonic() - started,
+                )
             )
-    
-    def download_video(self, url: str, output_path: Optional[str] = None, video_format: str = "mp4") -> DownloadResult:
+        finally:
+            if workspace is not None:
+                workspace.cleanup()
+            self._exit_job(job, trace)
+
+    def download_video(
+        self, url: str, output_path: Optional[str] = None, video_format: str = "mp4"
+    ) -> DownloadResult:
         """
         同步下载视频
-        
+
         Args:
             url: B站视频URL
             output_path: 输出文件路径
             video_format: 视频格式
-            
+
         Returns:
             DownloadResult: 下载结果
         """
-        return asyncio.run(self.download_video_async(url, output_path, video_format))
-    
+        return self._run_sync(self.download_video_async(url, output_path, video_format))
+
+    async def download_parts_async(
+        self,
+        url: str,
+        pages: Optional[Iterable[int]] = None,
+        kind: str = "video",
+        output_format: Optional[str] = None,
+        max_concurrency: int = 4,
+        concat_output: Optional[str] = None,
+        keep_parts: bool = True,
+    ) -> List[DownloadResult]:
+        """
+        并发下载多P视频的多个分P
+
+        分P列表只获取一次，各分P直接按cid获取播放地址，并共享同一个连接池。
+
+        Args:
+            url: B站视频URL或BV号
+            pages: 要下载的分P序号，不指定则下载全部分P
+            kind: 下载类型，audio 或 video
+            output_format: 输出格式，默认音频为mp3、视频为mp4
+            max_concurrency: 同时下载的分P数
+            concat_output: 指定时把所有分P按顺序合并为一个文件（FFmpeg concat，不转码）
+            keep_parts: 合并成功后是否保留各分P文件
+
+        Returns:
+            List[DownloadResult]: 按分P顺序排列的下载结果；指定 concat_output 时，
+                最后一项为合并文件的结果
+        """
+        if kind not in ("audio", "video"):
+            raise ValueError(f"不支持的下载类型: {kind}")
+        output_format = output_format or ("mp3" if kind == "audio" else "mp4")
+        started = time.monotonic()
+
+        try:
+            metadata = await self.probe_video_async(url)
+        except BilibiliDownloadError as e:
+            return [DownloadResult(success=False, message=str(e), url=url)]
+
+        wanted = set(pages) if pages is not None else None
+        parts = [p for p in metadata.pages if wanted is None or p.page in wanted]
+        missing = (wanted or set()) - {p.page for p in metadata.pages}
+        if missing:
+            return [
+                DownloadResult(
+                    success=False,
+                    message=f"视频 {metadata.bvid} 没有这些分P: {sorted(missing)}",
+                    url=url,
+                )
+            ]
+
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def download_part(part: VideoPage) -> DownloadResult:
+            part_url = f"https://www.bilibili.com/video/{metadata.bvid}?p={part.page}"
+            async with semaphore:
+                try:
+                    streams = await self._get_playurl_async(metadata.bvid, part.cid)
+                except BilibiliDownloadError as e:
+                    return DownloadResult(success=False, message=str(e), url=part_url)
+
+                part_metadata = replace(
+                    metadata, page=part.page, cid=part.cid, duration=part.duration
+                )
+                video_info = self._part_video_info(part_metadata, streams)
+                if kind == "audio":
+                    return await self.download_audio_async(
+                        part_url, audio_format=output_format, video_info=video_info
+                    )
+                return await self.download_video_async(
+                    part_url, video_format=output_format, video_info=video_info
+                )
+
+        results = list(await asyncio.gather(*(download_part(part) for part in parts)))
+
+        if concat_output:
+            results.append(
+                await self._concat_parts(
+                    url, results, concat_output, keep_parts, started
+                )
+            )
+        return results
+
+    def download_parts(
+        self,
+        url: str,
+        pages: Optional[Iterable[int]] = None,
+        kind: str = "video",
+        output_format: Optional[str] = None,
+        max_concurrency: int = 4,
+        concat_output: Optional[str] = None,
+        keep_parts: bool = True,
+    ) -> List[DownloadResult]:
+        """
+        同步下载多P视频的多个分P
+
+        参数与返回值同 download_parts_async
+        """
+        return self._run_sync(
+            self.download_parts_async(
+                url,
+                pages,
+                kind,
+                output_format,
+                max_concurrency,
+                concat_output,
+                keep_parts,
+            )
+        )
+
+    async def _concat_parts(
+        self,
+        url: str,
+        results: List[DownloadResult],
+        output_path: str,
+        keep_parts: bool,
+        started: float,
+    ) -> DownloadResult:
+        """
+        把各分P文件按顺序无转码拼接为一个文件
+
+        结果的 elapsed 是从 started（time.monotonic()）到合并完成的总耗时
+        """
+        trace = JobTrace(
+            self.tracer, "concat", {"output": output_path, "parts": len(results)}
+        )
+        trace.enter()
+        try:
+            return trace.finish(
+                await self._concat_part_files(
+                    url, results, output_path, keep_parts, started
+                )
+            )
+        finally:
+            trace.exit()
+
+    async def _concat_part_files(
+        self,
+        url: str,
+        results: List[DownloadResult],
+        output_path: str,
+        keep_parts: bool,
+        started: float,
+    ) -> DownloadResult:
+        """_concat_parts 的实现"""
+        failed = [r for r in results if not r.success]
+        if failed:
+            return DownloadResult(
+                success=False,
+                message=f"有{len(failed)}个分P下载失败，未合并",
+                file_path=None,
+                url=url,
+                elapsed=time.monotonic() - started,
+            )
+
+        part_files = [r.file_path for r in results]
+        list_path = output_path + ".concat.txt"
+        try:
+            with open(list_path, "w", encoding="utf-8") as f:
+                for part_file in part_files:
+                    escaped = os.path.abspath(part_file).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+
+            async with current_limits().ffmpeg():
+                with stage("postprocess", method="concat"):
+                    await self.ffmpeg.run(
+                        self.ffmpeg_path,
+                        inputs={list_path: "-f concat -safe 0"},
+                        outputs={output_path: "-c copy"},
+                    )
+        except Exception as e:
+            return DownloadResult(
+                success=False,
+                message=f"分P合并失败: {e}",
+                url=url,
+                elapsed=time.monotonic() - started,
+            )
+        finally:
+            if os.path.exists(list_path):
+                os.remove(list_path)
+
+        if not keep_parts:
+            with stage("cleanup"):
+                for part_file in part_files:
+                    if os.path.exists(part_file):
+                        os.remove(part_file)
+
+        return DownloadResult(
+            success=True,
+            message="合并成功",
+            file_path=output_path,
+            url=url,
+            duration=sum(r.duration or 0 for r in results),
+            bytes_downloaded=sum(r.bytes_downloaded for r in results),
+            # 在合并和清理之后计时，包含FFmpeg拼接的耗时
+            elapsed=time.monotonic() - started,
+            postprocess="concat",
+        )
+
+    def download_many(
+        self,
+        urls: Union[Iterable[str], AsyncIterable[str]],
+        kind: str = "audio",
+        output_format: Optional[str] = None,
+        transcode: bool = True,
+        streaming: bool = False,
+        max_concurrency: int = 8,
+        max_metadata: Optional[int] = None,
+        max_transfers: Optional[int] = None,
+        max_ffmpeg: Optional[int] = None,
+        max_bandwidth: Optional[int] = None,
+    ) -> BatchDownload:
+        """
+        批量下载
+
+        返回的 BatchDownload 是异步迭代器，按完成顺序返回每个任务的 DownloadResult，
+        其 stats 属性提供汇总的成功数、失败数和下载速度。
+
+        Args:
+            urls: B站视频URL列表（可以是任意可迭代对象或异步可迭代对象）
+            kind: 下载类型，audio 或 video
+            output_format: 输出格式，默认音频为mp3、视频为mp4
+            transcode: 下载音频时为False则按音频流编码选择容器并直接流复制
+            streaming: 下载音频时为True则边下载边交给FFmpeg处理，不写临时文件
+            max_concurrency: 同时进行的任务数
+            max_metadata: 同时获取视频信息的最大数量
+            max_transfers: 同时下载的媒体流最大数量，视频任务的音视频流各占一个
+            max_ffmpeg: 同时运行的FFmpeg进程最大数量
+            max_bandwidth: 总下载带宽上限（字节/秒）
+
+        Returns:
+            BatchDownload: 批量下载任务
+        """
+        return BatchDownload(
+            self,
+            urls,
+            kind=kind,
+            output_format=output_format,
+            transcode=transcode,
+            streaming=streaming,
+            max_concurrency=max_concurrency,
+            max_metadata=max_metadata,
+            max_transfers=max_transfers,
+            max_ffmpeg=max_ffmpeg,
+            max_bandwidth=max_bandwidth,
+        )
+
     def check_duration(self, url: str) -> Tuple[bool, str, int]:
         """
         检查视频时长
-        
+
         Args:
             url: B站视频URL
-            
+
         Returns:
             Tuple[bool, str, int]: (是否在限制内, 消息, 时长秒数)
         """
         try:
-            video_info = self.get_video_info(url)
-            
-            if video_info.duration > self.max_duration:
-                return False, f"视频时长({video_info.duration}秒)超过限制({self.max_duration}秒)", video_info.duration
-            
-            return True, "ok", video_info.duration
-            
+            # 只需要时长，使用轻量的view接口
+            metadata = self.probe_video(url)
+
+            if metadata.duration > self.max_duration:
+                return (
+                    False,
+                    f"视频时长({metadata.duration}秒)超过限制({self.max_duration}秒)",
+                    metadata.duration,
+                )
+
+            return True, "ok", metadata.duration
+
         except Exception as e:
-            return False, str(e), 0
\ No newline at end of file
+            return False, str(e), 0
@@ -2,27 +2,48 @@
 自定义异常类
 """
 
+from typing import Optional
+
 
 class BilibiliDownloadError(Exception):
     """B站下载基础异常类"""
+
     pass
 
 
 class VideoNotFoundError(BilibiliDownloadError):
     """视频未找到异常"""
+
     pass
 
 
 class DurationExceededError(BilibiliDownloadError):
     """视频时长超出限制异常"""
+
     pass
 
 
 class NetworkError(BilibiliDownloadError):
     """网络请求异常"""
+
+    pass
+
+
+class RemoteFileChangedError(NetworkError):
+    """断点续传或分段下载过程中远端文件已变化（校验值 ETag/Last-Modified 不一致）"""
+
     pass
 
 
 class FFmpegError(BilibiliDownloadError):
     """FFmpeg处理异常"""
-    pass
\ No newline at end of file
+
+    pass
+
+
+class RateLimitError(NetworkError):
+    """请求被限流或触发风控（如 -412、-799）"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
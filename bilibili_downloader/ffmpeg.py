@@ -0,0 +1,328 @@
+"""
+异步FFmpeg执行
+"""
+
+import asyncio
+import functools
+import os
+import re
+import subprocess
+from typing import AsyncIterable, Dict, Iterable, List, Optional
+
+from .exceptions import FFmpegError
+from .models import FFmpegInfo
+from .utils import lazy_import
+
+ffmpy3 = lazy_import("ffmpy3")
+
+# 转码为mp3使用的编码器
+MP3_ENCODER = "libmp3lame"
+
+# 音频编码（DASH codecs 前缀）对应的可直接流复制的容器
+AUDIO_CODEC_CONTAINERS = {
+    "mp4a": "m4a",
+    "ec-3": "m4a",
+    "ac-3": "m4a",
+    "flac": "flac",
+}
+
+# 未知编码使用的容器，Matroska 可以容纳任意音频编码
+FALLBACK_AUDIO_CONTAINER = "mka"
+
+
+def _codec_family(codec: Optional[str]) -> str:
+    # B站DASH音频没有标注编码时按AAC处理
+    return (codec or "mp4a").split(".")[0].lower()
+
+
+def audio_container_for_codec(codec: Optional[str]) -> str:
+    """根据音频编码选择可以直接流复制的容器格式"""
+    return AUDIO_CODEC_CONTAINERS.get(_codec_family(codec), FALLBACK_AUDIO_CONTAINER)
+
+
+def can_copy_audio(codec: Optional[str], audio_format: str) -> bool:
+    """判断音频流能否不经转码直接封装为指定格式"""
+    if audio_format == FALLBACK_AUDIO_CONTAINER:
+        return True
+    return AUDIO_CODEC_CONTAINERS.get(_codec_family(codec)) == audio_format
+
+
+def audio_output_options(audio_format: str, copy: bool) -> Optional[str]:
+    """音频输出的FFmpeg选项"""
+    if copy:
+        return "-vn -c:a copy"
+    if audio_format == "mp3":
+        return f"-acodec {MP3_ENCODER} -ab 128k"
+    return None
+
+
+def audio_encoders(audio_format: str, copy: bool) -> List[str]:
+    """音频输出需要FFmpeg提供的编码器"""
+    if not copy and audio_format == "mp3":
+        return [MP3_ENCODER]
+    return []
+
+
+@functools.lru_cache(maxsize=None)
+def probe_ffmpeg(executable: str) -> FFmpegInfo:
+    """
+    探测FFmpeg的版本和可用编码器
+
+    每个路径在进程内只探测一次；探测失败不缓存，修复环境后再次调用会重新探测。
+
+    Args:
+        executable: FFmpeg可执行文件路径
+
+    Returns:
+        FFmpegInfo: 探测结果
+
+    Raises:
+        FFmpegError: 无法运行FFmpeg
+    """
+
+    def run(*args: str) -> str:
+        try:
+            process = subprocess.run(
+                [executable, "-hide_banner", *args],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=10,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise FFmpegError(f"FFmpeg不可用({executable}): {e}")
+        if process.returncode != 0:
+            raise FFmpegError(
+                f"FFmpeg不可用({executable}): 返回错误码 {process.returncode}"
+            )
+        return process.stdout.decode("utf-8", errors="replace")
+
+    match = re.search(r"version (\S+)", run("-version"))
+    # 编码器列表在 "------" 分隔行之后，每行为 " A....D libmp3lame  说明"
+    _, _, listing = run("-encoders").partition("------")
+    encoders = frozenset(
+        fields[1]
+        for fields in (line.split() for line in listing.splitlines())
+        if len(fields) >= 2
+    )
+    return FFmpegInfo(
+        path=executable, version=match.group(1) if match else "", encoders=encoders
+    )
+
+
+def check_ffmpeg(executable: str, encoders: Iterable[str] = ()) -> FFmpegInfo:
+    """
+    确认FFmpeg可用且提供所需的编码器
+
+    Args:
+        executable: FFmpeg可执行文件路径
+        encoders: 需要的编码器名称
+
+    Returns:
+        FFmpegInfo: 探测结果
+
+    Raises:
+        FFmpegError: 无法运行FFmpeg或缺少编码器
+    """
+    info = probe_ffmpeg(executable)
+    missing = [name for name in encoders if not info.has_encoder(name)]
+    if missing:
+        raise FFmpegError(
+            f"FFmpeg {info.version}({executable}) 缺少编码器: {', '.join(missing)}"
+        )
+    return info
+
+
+class FFmpegRunner:
+    """以asyncio子进程运行FFmpeg，并限制同时运行的进程数"""
+
+    def __init__(
+        self, max_workers: Optional[int] = None, timeout: Optional[float] = None
+    ):
+        """
+        初始化FFmpeg执行器
+
+        Args:
+            max_workers: 同时运行的FFmpeg进程最大数量，默认为CPU核数
+            timeout: 单次运行的超时时间（秒），None表示不限制
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 信号量与事件循环绑定，同步接口每次调用都会创建新的事件循环
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run(
+        self,
+        executable: str,
+        inputs: Dict[str, Optional[str]],
+        outputs: Dict[str, Optional[str]],
+        global_options: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> bytes:
+        """
+        运行一次FFmpeg
+
+        任务被取消或超时时会终止FFmpeg进程。
+
+        Args:
+            executable: FFmpeg可执行文件路径
+            inputs: 输入文件及其选项
+            outputs: 输出文件及其选项
+            global_options: 全局选项，默认 ['-y']，总会加上 -nostdin
+            timeout: 本次运行的超时时间（秒），默认使用执行器的设置
+
+        Returns:
+            bytes: FFmpeg的stderr输出
+
+        Raises:
+            FFmpegError: FFmpeg启动失败、返回非0或超时
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        global_options = global_options if global_options is not None else ["-y"]
+        # FFmpeg会继承标准输入并把读到的内容当作交互命令（如 q 会提前结束输出），
+        # 而命令行可能正从标准输入读取URL；ffmpy3 不能指定 stdin，用 -nostdin 关闭
+        if "-nostdin" not in global_options:
+            global_options = ["-nostdin", *global_options]
+        ff = ffmpy3.FFmpeg(
+            executable=executable,
+            global_options=global_options,
+            inputs=inputs,
+            outputs=outputs,
+        )
+
+        async with self._get_semaphore():
+            try:
+                process = await ff.run_async(
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+                )
+            except Exception as e:
+                raise FFmpegError(f"FFmpeg启动失败: {e}")
+
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                await self._kill(process)
+                raise FFmpegError(f"FFmpeg运行超时({timeout}秒): {ff.cmd}")
+            except asyncio.CancelledError:
+                await self._kill(process)
+                raise
+
+        if process.returncode != 0:
+            message = stderr.decode("utf-8", errors="replace").strip().splitlines()
+            detail = message[-1] if message else ""
+            raise FFmpegError(f"FFmpeg返回错误码 {process.returncode}: {detail}")
+        return stderr
+
+    async def run_piped(
+        self,
+        executable: str,
+        source: AsyncIterable[bytes],
+        outputs: Dict[str, Optional[str]],
+        global_options: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> bytes:
+        """
+        以管道方式运行FFmpeg，source 产生的数据依次写入FFmpeg的标准输入
+
+        FFmpeg边接收边处理，不需要先把完整输入写到磁盘。source 抛出的异常
+        （如网络错误）会原样向上抛出，同时终止FFmpeg进程。
+
+        Args:
+            executable: FFmpeg可执行文件路径
+            source: 输入数据的异步迭代器
+            outputs: 输出文件及其选项
+            global_options: 全局选项，默认 ['-y']
+            timeout: 本次运行的超时时间（秒），默认使用执行器的设置
+
+        Returns:
+            bytes: FFmpeg的stderr输出
+
+        Raises:
+            FFmpegError: FFmpeg启动失败、返回非0或超时
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        ff = ffmpy3.FFmpeg(
+            executable=executable,
+            global_options=global_options if global_options is not None else ["-y"],
+            inputs={"pipe:0": None},
+            outputs=outputs,
+        )
+
+        async with self._get_semaphore():
+            chunks = source.__aiter__()
+            try:
+                # 先取得第一块数据再启动FFmpeg，连接失败时不会留下FFmpeg进程
+                try:
+                    first = await chunks.__anext__()
+                except StopAsyncIteration:
+                    raise FFmpegError("FFmpeg输入数据为空")
+
+                try:
+                    process = await ff.run_async(
+                        input_data=first,
+                        stdout=asyncio.subprocess.DEVNULL,
+                        stderr=asyncio.subprocess.PIPE,
+                    )
+                except Exception as e:
+                    raise FFmpegError(f"FFmpeg启动失败: {e}")
+
+                try:
+                    stderr = await asyncio.wait_for(
+                        self._feed(process, chunks), timeout
+                    )
+                except asyncio.TimeoutError:
+                    await self._kill(process)
+                    raise FFmpegError(f"FFmpeg运行超时({timeout}秒): {ff.cmd}")
+                except BaseException:
+                    await self._kill(process)
+                    raise
+            finally:
+                if hasattr(chunks, "aclose"):
+                    await chunks.aclose()
+
+        if process.returncode != 0:
+            message = stderr.decode("utf-8", errors="replace").strip().splitlines()
+            detail = message[-1] if message else ""
+            raise FFmpegError(f"FFmpeg返回错误码 {process.returncode}: {detail}")
+        return stderr
+
+    @staticmethod
+    async def _feed(process: asyncio.subprocess.Process, chunks) -> bytes:
+        """向FFmpeg写入剩余数据，同时读取stderr避免管道写满死锁"""
+        stderr_task = asyncio.ensure_future(process.stderr.read())
+        try:
+            try:
+                await process.stdin.drain()
+                async for chunk in chunks:
+                    process.stdin.write(chunk)
+                    await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # FFmpeg提前退出，具体原因见stderr和返回码
+                pass
+            finally:
+                process.stdin.close()
+
+            stderr = await stderr_task
+            await process.wait()
+            return stderr
+        except BaseException:
+            stderr_task.cancel()
+            raise
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process):
+        """终止FFmpeg进程并等待其退出"""
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
@@ -0,0 +1,218 @@
+"""
+已下载文件的输出索引
+"""
+
+import dataclasses
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from .models import OutputEntry
+
+_FIELDS = [f.name for f in dataclasses.fields(OutputEntry)]
+
+
+def file_checksum(path: str) -> str:
+    """计算文件内容的SHA-256（十六进制）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class OutputIndex:
+    """
+    已下载文件的持久化索引（sqlite）
+
+    以 BV号、分P、类型、流选择策略、输出格式和编码参数为键，记录输出文件的路径、大小和SHA-256。
+    再次请求相同内容时，文件仍然有效就直接返回结果，不再下载和转码。多个进程可以共用同一个索引文件。
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 索引数据库文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # WAL模式下读写互不阻塞，适合多个进程共用
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outputs ("
+                "key TEXT PRIMARY KEY, bvid TEXT NOT NULL, page INTEGER NOT NULL, kind TEXT NOT NULL, "
+                "path TEXT NOT NULL, size INTEGER NOT NULL, checksum TEXT NOT NULL, mtime REAL NOT NULL, "
+                "title TEXT, duration INTEGER, postprocess TEXT, created REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS outputs_bvid ON outputs (bvid, page)"
+            )
+
+    @staticmethod
+    def make_key(
+        bvid: str, page: int, kind: str, policy: str, output_format: str, settings: str
+    ) -> str:
+        """
+        生成索引键
+
+        Args:
+            bvid: BV号
+            page: 分P号
+            kind: audio 或 video
+            policy: 流选择策略的标识（StreamPolicy.key）
+            output_format: 输出格式
+            settings: 编码参数，如FFmpeg输出选项
+        """
+        return "|".join([bvid, str(page), kind, policy, output_format, settings])
+
+    def get(self, key: str) -> Optional[OutputEntry]:
+        """读取记录，不检查文件"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_FIELDS)} FROM outputs WHERE key = ?", (key,)
+            ).fetchone()
+        return OutputEntry(*row) if row else None
+
+    def put(self, entry: OutputEntry):
+        """写入或覆盖记录"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO outputs ({', '.join(_FIELDS)}) VALUES ({', '.join('?' * len(_FIELDS))})",
+                dataclasses.astuple(entry),
+            )
+
+    def remove(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM outputs WHERE key = ?", (key,))
+
+    def entries(self, bvid: Optional[str] = None) -> List[OutputEntry]:
+        """列出所有记录，指定 bvid 时只列出该视频的记录"""
+        query = f"SELECT {', '.join(_FIELDS)} FROM outputs"
+        with self._lock:
+            if bvid is None:
+                rows = self._conn.execute(query).fetchall()
+            else:
+                rows = self._conn.execute(query + " WHERE bvid = ?", (bvid,)).fetchall()
+        return [OutputEntry(*row) for row in rows]
+
+    def record(
+        self,
+        key: str,
+        bvid: str,
+        page: int,
+        kind: str,
+        path: str,
+        title: str = "",
+        duration: int = 0,
+        postprocess: Optional[str] = None,
+    ) -> OutputEntry:
+        """
+        记录刚生成的输出文件，会读取整个文件计算校验和
+
+        Returns:
+            OutputEntry: 写入的记录
+        """
+        stat = os.stat(path)
+        entry = OutputEntry(
+            key=key,
+            bvid=bvid,
+            page=page,
+            kind=kind,
+            path=os.path.abspath(path),
+            size=stat.st_size,
+            checksum=file_checksum(path),
+            mtime=stat.st_mtime,
+            title=title,
+            duration=duration,
+            postprocess=postprocess,
+            created=time.time(),
+        )
+        self.put(entry)
+        return entry
+
+    def check(self, entry: OutputEntry, checksum: bool = False) -> bool:
+        """
+        检查记录对应的文件是否仍然有效
+
+        文件大小不符即无效；修改时间变化或 checksum 为True时再比较校验和，
+        内容未变则更新记录中的修改时间。
+
+        Args:
+            entry: 索引记录
+            checksum: 是否总是比较校验和
+
+        Returns:
+            bool: 文件存在且内容与记录一致
+        """
+        try:
+            stat = os.stat(entry.path)
+        except OSError:
+            return False
+        if stat.st_size != entry.size:
+            return False
+        if not checksum and stat.st_mtime == entry.mtime:
+            return True
+        try:
+            if file_checksum(entry.path) != entry.checksum:
+                return False
+        except OSError:
+            return False
+        if stat.st_mtime != entry.mtime:
+            self.put(dataclasses.replace(entry, mtime=stat.st_mtime))
+        return True
+
+    def lookup(self, key: str) -> Optional[OutputEntry]:
+        """
+        查找仍然有效的输出文件
+
+        Returns:
+            OutputEntry: 文件有效时返回记录；没有记录或文件已失效时返回None，失效的记录会被删除
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        if not self.check(entry):
+            self.remove(key)
+            return None
+        return entry
+
+    def prune(self) -> List[OutputEntry]:
+        """
+        删除文件已不存在或大小不符的记录，不读取文件内容
+
+        Returns:
+            List[OutputEntry]: 被删除的记录
+        """
+        removed = []
+        for entry in self.entries():
+            try:
+                valid = os.stat(entry.path).st_size == entry.size
+            except OSError:
+                valid = False
+            if not valid:
+                self.remove(entry.key)
+                removed.append(entry)
+        return removed
+
+    def verify(self) -> List[OutputEntry]:
+        """
+        重新计算所有文件的校验和，删除文件缺失或内容不一致的记录
+
+        Returns:
+            List[OutputEntry]: 被删除的记录
+        """
+        removed = []
+        for entry in self.entries():
+            if not self.check(entry, checksum=True):
+                self.remove(entry.key)
+                removed.append(entry)
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
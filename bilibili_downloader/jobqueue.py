@@ -0,0 +1,326 @@
+"""
+持久化的下载任务队列
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from .models import DownloadResult, QueuedJob, QueueStats
+
+JOB_KINDS = ("audio", "video")
+
+_COLUMNS = "id, url, kind, options, status, attempts, worker, lease_expires, result, error, created, updated"
+
+
+class JobQueue:
+    """
+    任务队列接口，自定义后端（如接入自己的消息队列）需实现以下方法
+
+    worker 领取任务时获得一个有期限的租约，运行期间定期续约；worker 崩溃后租约到期，
+    任务重新排队。多进程运行时队列对象会被 pickle 传给子进程，自定义后端需要支持 pickle。
+    """
+
+    def put(
+        self, url: str, kind: str = "audio", options: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        添加任务
+
+        Args:
+            url: B站视频URL
+            kind: audio 或 video
+            options: 传给 download_audio_async/download_video_async 的参数，需可JSON序列化
+
+        Returns:
+            int: 任务ID
+        """
+        raise NotImplementedError
+
+    def put_many(
+        self,
+        urls: Iterable[str],
+        kind: str = "audio",
+        options: Optional[Dict[str, Any]] = None,
+    ) -> List[int]:
+        """添加多个参数相同的任务"""
+        return [self.put(url, kind, options) for url in urls]
+
+    def claim(self, worker: str, lease: float) -> Optional[QueuedJob]:
+        """
+        领取下一个待处理的任务（包括租约已到期的任务）
+
+        Args:
+            worker: worker标识
+            lease: 租约时长（秒）
+
+        Returns:
+            Optional[QueuedJob]: 领取到的任务，没有可领取的任务时返回None
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: int, worker: str, lease: float) -> bool:
+        """续约，返回False表示租约已失效（任务已被其他worker领取或已结束）"""
+        raise NotImplementedError
+
+    def complete(self, job_id: int, worker: str, result: DownloadResult) -> bool:
+        """写入任务结果，返回False表示租约已失效，结果被丢弃"""
+        raise NotImplementedError
+
+    def release(self, job_id: int, worker: str):
+        """放弃任务（如worker正常退出），任务立即重新排队，本次领取不计入尝试次数"""
+        raise NotImplementedError
+
+    def get(self, job_id: int) -> Optional[QueuedJob]:
+        """读取任务"""
+        raise NotImplementedError
+
+    def stats(self) -> QueueStats:
+        """各状态的任务数及已完成任务的汇总"""
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    基于sqlite的任务队列
+
+    同一台机器上的多个进程可以共用一个队列文件；领取任务在写事务中完成，同一任务不会被两个worker同时领取。
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        """
+        Args:
+            path: 队列数据库文件路径
+            max_attempts: 每个任务最多被领取的次数，租约到期（worker崩溃）且达到该次数时任务标记为失败
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # 自动提交模式，事务由 _transaction 显式开启
+        self._conn = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._transaction():
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, kind TEXT NOT NULL, "
+                "options TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "worker TEXT, lease_expires REAL, result TEXT, error TEXT, "
+                "bytes_downloaded INTEGER NOT NULL DEFAULT 0, elapsed REAL NOT NULL DEFAULT 0, "
+                "created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)"
+            )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 连接不能跨进程，子进程中重新打开
+        return {"path": self.path, "max_attempts": self.max_attempts}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(**state)
+
+    @contextmanager
+    def _transaction(self):
+        """加锁并开启写事务（BEGIN IMMEDIATE），其他进程的写事务会等待"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _to_job(row) -> QueuedJob:
+        (
+            job_id,
+            url,
+            kind,
+            options,
+            status,
+            attempts,
+            worker,
+            lease_expires,
+            result,
+            error,
+            created,
+            updated,
+        ) = row
+        return QueuedJob(
+            id=job_id,
+            url=url,
+            kind=kind,
+            options=json.loads(options),
+            status=status,
+            attempts=attempts,
+            worker=worker,
+            lease_expires=lease_expires,
+            result=json.loads(result) if result else None,
+            error=error,
+            created=created,
+            updated=updated,
+        )
+
+    def put(
+        self, url: str, kind: str = "audio", options: Optional[Dict[str, Any]] = None
+    ) -> int:
+        return self.put_many([url], kind, options)[0]
+
+    def put_many(
+        self,
+        urls: Iterable[str],
+        kind: str = "audio",
+        options: Optional[Dict[str, Any]] = None,
+    ) -> List[int]:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"不支持的下载类型: {kind}")
+        encoded = json.dumps(options or {}, ensure_ascii=False)
+        now = time.time()
+        ids = []
+        with self._transaction():
+            for url in urls:
+                cursor = self._conn.execute(
+                    "INSERT INTO jobs (url, kind, options, status, created, updated) VALUES (?, ?, ?, 'pending', ?, ?)",
+                    (url, kind, encoded, now, now),
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def _expire(self, now: float) -> int:
+        """处理租约到期的任务：达到最大尝试次数的标记为失败，其余重新排队。需在事务中调用"""
+        self._conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, worker = NULL, lease_expires = NULL, updated = ? "
+            "WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+            (
+                f"worker未按时续约，已尝试{self.max_attempts}次",
+                now,
+                now,
+                self.max_attempts,
+            ),
+        )
+        return self._conn.execute(
+            "UPDATE jobs SET status = 'pending', worker = NULL, lease_expires = NULL, updated = ? "
+            "WHERE status = 'running' AND lease_expires < ?",
+            (now, now),
+        ).rowcount
+
+    def requeue_expired(self) -> int:
+        """
+        立即处理租约已到期的任务，claim 时也会自动处理
+
+        Returns:
+            int: 重新排队的任务数
+        """
+        with self._transaction():
+            return self._expire(time.time())
+
+    def claim(self, worker: str, lease: float) -> Optional[QueuedJob]:
+        now = time.time()
+        with self._transaction():
+            self._expire(now)
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (worker, now + lease, now, row[0]),
+            )
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (row[0],)
+            ).fetchone()
+        return self._to_job(row)
+
+    def heartbeat(self, job_id: int, worker: str, lease: float) -> bool:
+        now = time.time()
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + lease, now, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: DownloadResult) -> bool:
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, bytes_downloaded = ?, elapsed = ?, "
+                "worker = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (
+                    "succeeded" if result.success else "failed",
+                    json.dumps(result.to_dict(), ensure_ascii=False),
+                    None if result.success else result.message,
+                    result.bytes_downloaded,
+                    result.elapsed,
+                    time.time(),
+                    job_id,
+                    worker,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, job_id: int, worker: str):
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', worker = NULL, lease_expires = NULL, "
+                "attempts = MAX(attempts - 1, 0), updated = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), job_id, worker),
+            )
+
+    def retry_failed(self) -> int:
+        """
+        把所有失败的任务重新排队，尝试次数清零
+
+        Returns:
+            int: 重新排队的任务数
+        """
+        with self._transaction():
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, result = NULL, error = NULL, "
+                "bytes_downloaded = 0, elapsed = 0, updated = ? WHERE status = 'failed'",
+                (time.time(),),
+            ).rowcount
+
+    def get(self, job_id: int) -> Optional[QueuedJob]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def jobs(self, status: Optional[str] = None) -> List[QueuedJob]:
+        """按添加顺序列出任务，指定 status 时只列出该状态的任务"""
+        query = f"SELECT {_COLUMNS} FROM jobs"
+        with self._lock:
+            if status is None:
+                rows = self._conn.execute(query + " ORDER BY id").fetchall()
+            else:
+                rows = self._conn.execute(
+                    query + " WHERE status = ? ORDER BY id", (status,)
+                ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def stats(self) -> QueueStats:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*), SUM(bytes_downloaded), SUM(elapsed) FROM jobs GROUP BY status"
+            ).fetchall()
+        stats = QueueStats()
+        for status, count, nbytes, elapsed in rows:
+            setattr(stats, status, count)
+            if status in ("succeeded", "failed"):
+                stats.bytes_downloaded += nbytes or 0
+                stats.elapsed += elapsed or 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,137 @@
+"""
+CDN镜像选择与切换
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+from .segmented import RemoteFileInfo, probe_remote_file
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class MirrorSet:
+    """
+    同一文件的一组CDN地址
+
+    按优先级排列，第一个为当前使用的地址；同一文件的各分段共享一个实例，
+    某个地址出错或过慢时移到末尾，其余分段随之切换。
+    """
+
+    def __init__(self, urls: Iterable[str]):
+        # 去重并保持顺序
+        self.urls: List[str] = list(dict.fromkeys(url for url in urls if url))
+        if not self.urls:
+            raise ValueError("至少需要一个下载地址")
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    @property
+    def current(self) -> str:
+        """当前优先使用的地址"""
+        return self.urls[0]
+
+    def demote(self, url: str):
+        """把出错或过慢的地址移到末尾"""
+        if url in self.urls and len(self.urls) > 1:
+            self.urls.remove(url)
+            self.urls.append(url)
+
+    def replace(self, urls: Iterable[str]):
+        """地址过期刷新后替换全部地址"""
+        fresh = list(dict.fromkeys(url for url in urls if url))
+        if fresh:
+            self.urls = fresh
+
+
+async def rank_mirrors(
+    session: "aiohttp.ClientSession", mirrors: MirrorSet, headers: dict, timeout: float
+) -> RemoteFileInfo:
+    """
+    并发探测所有镜像的首字节时间（TTFB），按从快到慢重新排列
+
+    探测使用 Range: bytes=0-0 请求，同时得到文件大小和校验信息；
+    超时或出错的镜像排在最后，仍可作为备用。
+
+    Args:
+        session: HTTP会话
+        mirrors: 待排序的镜像，原地重新排列
+        headers: 请求头
+        timeout: 单个镜像的探测超时（秒）
+
+    Returns:
+        RemoteFileInfo: 最快镜像的探测结果
+
+    Raises:
+        aiohttp.ClientError: 全部镜像都探测失败时抛出第一个地址的异常
+    """
+
+    async def probe(url: str) -> Tuple[float, RemoteFileInfo]:
+        started = time.monotonic()
+        info = await asyncio.wait_for(probe_remote_file(session, url, headers), timeout)
+        return time.monotonic() - started, info
+
+    urls = list(mirrors.urls)
+    results = await asyncio.gather(
+        *(probe(url) for url in urls), return_exceptions=True
+    )
+
+    succeeded = sorted(
+        (
+            (result[0], url, result[1])
+            for url, result in zip(urls, results)
+            if not isinstance(result, BaseException)
+        ),
+        key=lambda item: item[0],
+    )
+    if not succeeded:
+        raise results[0]
+
+    fastest = [url for _, url, _ in succeeded]
+    mirrors.urls = fastest + [url for url in urls if url not in fastest]
+    return succeeded[0][2]
+
+
+class SpeedMonitor:
+    """
+    统计单个连接的实际网络速度，用于判断当前镜像是否过慢
+
+    限速等待的时间不计入统计，避免把主动限速误判为镜像过慢。
+    """
+
+    def __init__(self, min_speed: Optional[float], window: float):
+        """
+        Args:
+            min_speed: 最低速度（字节/秒），为None时不检测
+            window: 统计窗口（秒）
+        """
+        self.min_speed = min_speed
+        self.window = window
+        self._reset()
+
+    def _reset(self):
+        self._started = time.monotonic()
+        self._bytes = 0
+        self._paused = 0.0
+
+    def record(self, nbytes: int):
+        """记录收到的字节数"""
+        self._bytes += nbytes
+
+    def pause(self, seconds: float):
+        """扣除不属于网络传输的等待时间"""
+        self._paused += seconds
+
+    def too_slow(self) -> bool:
+        """统计窗口结束时判断速度是否低于下限，并开始下一个窗口"""
+        if not self.min_speed:
+            return False
+        elapsed = time.monotonic() - self._started - self._paused
+        if elapsed < self.window:
+            return False
+        slow = self._bytes / elapsed < self.min_speed
+        self._reset()
+        return slow
@@ -1,26 +1,242 @@
 """
 数据模型定义
 """
-from dataclasses import dataclass
-from typing import Optional
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional
+
+# VideoInfo 中带签名的CDN播放地址字段
+STREAM_URL_FIELDS = ("video_url", "audio_url", "video_backup_urls", "audio_backup_urls")
 
 
 @dataclass
 class VideoInfo:
     """视频信息"""
+
     bvid: str
     title: str
     duration: int  # 秒
     video_url: Optional[str] = None
     audio_url: Optional[str] = None
     page: int = 1
+    audio_codec: Optional[str] = None  # 如 mp4a.40.2、fLaC、ec-3
+    cid: Optional[int] = None
+    video_codec: Optional[str] = None  # avc、hevc 或 av1
+    quality: Optional[int] = None  # 画质编号（qn），如 16=360P、80=1080P
+    height: Optional[int] = None  # 视频分辨率高度
+    video_bandwidth: Optional[int] = None  # 视频码率（bps）
+    audio_bandwidth: Optional[int] = None  # 音频码率（bps）
+    video_backup_urls: List[str] = field(default_factory=list)  # 视频流备用CDN地址
+    audio_backup_urls: List[str] = field(default_factory=list)  # 音频流备用CDN地址
+
+    @property
+    def video_urls(self) -> List[str]:
+        """视频流的全部地址，主地址在前"""
+        return [self.video_url, *self.video_backup_urls] if self.video_url else []
+
+    @property
+    def audio_urls(self) -> List[str]:
+        """音频流的全部地址，主地址在前"""
+        return [self.audio_url, *self.audio_backup_urls] if self.audio_url else []
+
+
+@dataclass
+class VideoPage:
+    """分P信息"""
+
+    page: int
+    cid: int
+    title: str
+    duration: int  # 秒
+
+
+@dataclass
+class VideoMetadata:
+    """轻量探测得到的视频元数据，不含播放地址"""
+
+    bvid: str
+    title: str
+    duration: int  # 所选分P的时长（秒）
+    cid: int
+    page: int = 1
+    pages: List[VideoPage] = field(default_factory=list)
 
 
 @dataclass
 class DownloadResult:
     """下载结果"""
+
     success: bool
     message: str
     file_path: Optional[str] = None
     duration: Optional[int] = None
-    video_info: Optional[VideoInfo] = None
\ No newline at end of file
+    video_info: Optional[VideoInfo] = None
+    url: Optional[str] = None
+    bytes_downloaded: int = 0
+    elapsed: float = 0.0  # 任务总耗时（秒）
+    postprocess: Optional[str] = (
+        None  # 后处理方式: copy（流复制）、transcode（转码）、merge（音视频合并）、concat（分P拼接）
+    )
+    # 各阶段耗时（秒）：queue、resolve、resolve_page、resolve_api、connect_*、transfer_*、postprocess、cleanup
+    timings: Dict[str, float] = field(default_factory=dict)
+    retries: int = 0  # 接口请求和CDN下载的重试次数
+    from_index: bool = False  # 输出索引中已有有效文件，直接返回而没有重新下载
+
+    @property
+    def throughput(self) -> float:
+        """平均下载速度（字节/秒）"""
+        return self.bytes_downloaded / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self, stream_urls: bool = True) -> Dict[str, Any]:
+        """
+        转换为可以JSON序列化的字典，包含 throughput
+
+        Args:
+            stream_urls: 为False时去掉 video_info 中的CDN播放地址（带有账号签名，且会过期）
+        """
+        data = asdict(self)
+        data["throughput"] = self.throughput
+        if not stream_urls and data["video_info"]:
+            for key in STREAM_URL_FIELDS:
+                data["video_info"].pop(key)
+        return data
+
+
+@dataclass
+class ConnectionStats:
+    """连接复用统计"""
+
+    opened: int = 0
+    reused: int = 0
+
+
+@dataclass
+class BatchStats:
+    """批量下载汇总统计"""
+
+    total: int = 0
+    completed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    bytes_downloaded: int = 0
+    elapsed: float = 0.0  # 批次已运行时间（秒）
+
+    def record(self, result: DownloadResult, elapsed: float):
+        """记录一个已完成的任务"""
+        self.completed += 1
+        if result.success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.bytes_downloaded += result.bytes_downloaded
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self) -> float:
+        """总体下载速度（字节/秒）"""
+        return self.bytes_downloaded / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class CacheStats:
+    """视频信息缓存命中统计"""
+
+    hits: int = 0
+    misses: int = 0
+    url_misses: int = 0  # 元数据命中但流地址已过期
+
+
+@dataclass
+class ProgressEvent:
+    """下载进度事件"""
+
+    job: str  # 任务标识（请求的视频URL）
+    stream: str  # 流的描述，如 音频、视频
+    downloaded: int  # 已下载字节数（含续传前已完成的部分）
+    total: Optional[int] = None  # 总字节数，未知时为None
+    rate: float = 0.0  # 最近的下载速度（字节/秒）
+    eta: Optional[float] = None  # 预计剩余时间（秒），未知时为None
+    elapsed: float = 0.0  # 本次下载已用时间（秒）
+    status: str = "downloading"  # downloading、finished 或 failed
+
+    @property
+    def percent(self) -> Optional[float]:
+        """完成百分比，总大小未知时为None"""
+        if not self.total:
+            return None
+        return self.downloaded / self.total * 100
+
+
+@dataclass(frozen=True)
+class FFmpegInfo:
+    """FFmpeg能力探测结果"""
+
+    path: str  # 可执行文件路径
+    version: str  # 版本号，如 6.1.1
+    encoders: FrozenSet[str] = frozenset()  # 可用的编码器名称，如 libmp3lame、aac
+
+    def has_encoder(self, name: str) -> bool:
+        return name in self.encoders
+
+
+@dataclass
+class OutputEntry:
+    """输出索引中的一条记录"""
+
+    key: str  # 由BV号、分P、类型、流选择策略、输出格式和编码参数组成
+    bvid: str
+    page: int
+    kind: str  # audio 或 video
+    path: str  # 输出文件路径
+    size: int  # 文件大小（字节）
+    checksum: str  # 文件内容的SHA-256
+    mtime: float  # 记录时文件的修改时间
+    title: str = ""
+    duration: int = 0  # 秒
+    postprocess: Optional[str] = (
+        None  # 生成文件时的后处理方式，同 DownloadResult.postprocess
+    )
+    created: float = 0.0  # 记录时间（时间戳）
+
+
+@dataclass
+class QueuedJob:
+    """任务队列中的一个任务"""
+
+    id: int
+    url: str
+    kind: str = "audio"  # audio 或 video
+    options: Dict[str, Any] = field(
+        default_factory=dict
+    )  # 传给 download_audio/download_video 的参数
+    status: str = "pending"  # pending、running、succeeded 或 failed
+    attempts: int = 0  # 已被领取的次数
+    worker: Optional[str] = None  # 持有租约的worker
+    lease_expires: Optional[float] = (
+        None  # 租约到期时间（时间戳），到期未续约时任务重新排队
+    )
+    result: Optional[Dict[str, Any]] = None  # DownloadResult.to_dict() 的结果
+    error: Optional[str] = None
+    created: float = 0.0
+    updated: float = 0.0
+
+
+@dataclass
+class QueueStats:
+    """任务队列汇总统计"""
+
+    pending: int = 0
+    running: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    bytes_downloaded: int = 0  # 已完成任务的下载字节数合计
+    elapsed: float = 0.0  # 已完成任务的耗时合计（秒）
+
+    @property
+    def total(self) -> int:
+        return self.pending + self.running + self.succeeded + self.failed
+
+    @property
+    def unfinished(self) -> int:
+        """尚未结束的任务数"""
+        return self.pending + self.running
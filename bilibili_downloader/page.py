@@ -0,0 +1,99 @@
+"""
+视频页面解析
+"""
+
+import html
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+# 所有需要的标记都以 "<" 开头，正则引擎可以先快速定位 "<" 再匹配，整个页面只扫描一遍
+_MARKER_RE = re.compile(
+    rb"<(?:script>window\.(?P<data>__playinfo__|__INITIAL_STATE__)="
+    rb'|(?P<h1>h1 title=")'
+    rb"|(?P<title>title(?: [^>]*)?>)"
+    rb'|(?P<meta>meta [^>]*?(?:name="title"|property="og:title") content="))'
+)
+
+# 标题的来源按可靠程度排列
+_TITLE_SOURCES = ("h1", "title", "meta")
+_TITLE_END = {"h1": b'"', "title": b"<", "meta": b'"'}
+
+_decoder = json.JSONDecoder()
+
+
+@dataclass
+class WatchPage:
+    """视频页面中提取出的数据"""
+
+    title: str = ""
+    playinfo: Optional[Dict[str, Any]] = None  # window.__playinfo__
+    video_data: Optional[Dict[str, Any]] = (
+        None  # window.__INITIAL_STATE__.videoData，结构与view接口相同
+    )
+
+
+def _read_json(content: bytes, start: int) -> Optional[Any]:
+    """解析从 start 开始、在 </script> 之前的一个JSON值，忽略其后的脚本"""
+    end = content.find(b"</script>", start)
+    while True:
+        try:
+            value, _ = _decoder.raw_decode(
+                content[start : end if end >= 0 else None].decode("utf-8")
+            )
+            return value
+        except (UnicodeDecodeError, ValueError):
+            if end < 0:
+                return None
+        # JSON字符串中含有 "</script>" 时截断位置有误，继续找下一个
+        end = content.find(b"</script>", end + 1)
+
+
+def parse_watch_page(content: Union[bytes, str]) -> WatchPage:
+    """
+    从视频页面中提取标题、__playinfo__ 和 __INITIAL_STATE__ 中的视频数据
+
+    直接在原始字节上查找标记，只解码需要的部分；播放信息和视频数据都找到后立即停止扫描。
+
+    Args:
+        content: 页面内容，建议直接传入响应的原始字节
+
+    Returns:
+        WatchPage: 提取结果，缺少的部分为空
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    page = WatchPage()
+    titles: Dict[str, str] = {}
+    pos = 0
+    while page.playinfo is None or page.video_data is None:
+        match = _MARKER_RE.search(content, pos)
+        if match is None:
+            break
+        kind = match.lastgroup
+        pos = match.end()
+
+        if kind == "data":
+            value = _read_json(content, pos)
+            if match.group("data") == b"__playinfo__":
+                page.playinfo = value if isinstance(value, dict) else None
+            elif isinstance(value, dict) and isinstance(value.get("videoData"), dict):
+                page.video_data = value["videoData"]
+            continue
+
+        if kind not in titles:
+            end = content.find(_TITLE_END[kind], pos)
+            if end >= 0:
+                titles[kind] = html.unescape(
+                    content[pos:end].decode("utf-8", errors="replace")
+                ).strip()
+
+    if page.video_data and page.video_data.get("title"):
+        page.title = page.video_data["title"]
+    else:
+        page.title = next(
+            (titles[kind] for kind in _TITLE_SOURCES if titles.get(kind)), ""
+        )
+    return page
@@ -0,0 +1,244 @@
+"""
+下载进度事件与控制台渲染
+"""
+
+import contextvars
+import shutil
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Optional, TextIO, Tuple
+
+from .models import ProgressEvent
+from .utils import parse_bili_url
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+_current_job: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "bilibili_downloader_job", default=""
+)
+
+
+def enter_job(job: str) -> contextvars.Token:
+    """设置当前任务的标识，进度事件中的 job 字段取自这里"""
+    return _current_job.set(job)
+
+
+def exit_job(token: contextvars.Token):
+    """恢复进入任务前的任务标识"""
+    _current_job.reset(token)
+
+
+class ProgressTracker:
+    """
+    单个文件的进度统计
+
+    update 在每个数据块上调用，只做计数；距上次回调超过 interval 秒时才生成事件并回调。
+    """
+
+    # 速度的指数平滑系数
+    RATE_SMOOTHING = 0.3
+
+    def __init__(
+        self,
+        callback: ProgressCallback,
+        stream: str,
+        total: Optional[int] = None,
+        initial: int = 0,
+        interval: float = 0.5,
+    ):
+        self.callback = callback
+        self.job = _current_job.get()
+        self.stream = stream
+        self.total = total or None
+        self.downloaded = initial
+        self.interval = interval
+        self.rate = 0.0
+        self._started = time.monotonic()
+        self._last_time = self._started
+        self._last_bytes = initial
+
+    def update(self, nbytes: int):
+        """记录新下载的字节数，按间隔回调"""
+        self.downloaded += nbytes
+        now = time.monotonic()
+        if now - self._last_time >= self.interval:
+            self._measure(now)
+            self._emit("downloading", now)
+
+    def set_total(self, total: Optional[int]):
+        """总大小在开始下载后才知道时补充"""
+        self.total = total or None
+
+    def finish(self, success: bool = True):
+        """下载结束（成功或失败）时回调一次"""
+        now = time.monotonic()
+        self._measure(now)
+        self._emit("finished" if success else "failed", now)
+
+    def _measure(self, now: float):
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            return
+        current = (self.downloaded - self._last_bytes) / elapsed
+        self.rate = (
+            current
+            if not self.rate
+            else (self.RATE_SMOOTHING * current + (1 - self.RATE_SMOOTHING) * self.rate)
+        )
+        self._last_time = now
+        self._last_bytes = self.downloaded
+
+    def _emit(self, status: str, now: float):
+        eta = None
+        if self.total and self.rate > 0:
+            eta = max(self.total - self.downloaded, 0) / self.rate
+        self.callback(
+            ProgressEvent(
+                job=self.job,
+                stream=self.stream,
+                downloaded=self.downloaded,
+                total=self.total,
+                rate=self.rate,
+                eta=eta,
+                elapsed=now - self._started,
+                status=status,
+            )
+        )
+
+
+class _NullTracker:
+    """未设置进度回调时使用，不做任何统计"""
+
+    def update(self, nbytes: int):
+        pass
+
+    def set_total(self, total: Optional[int]):
+        pass
+
+    def finish(self, success: bool = True):
+        pass
+
+
+NULL_TRACKER = _NullTracker()
+
+
+def _format_size(value: float) -> str:
+    if value < 1024:
+        return f"{value:.0f}B"
+    for unit in ("KiB", "MiB"):
+        value /= 1024
+        if value < 1024:
+            return f"{value:.1f}{unit}"
+    return f"{value / 1024:.1f}GiB"
+
+
+def _display_width(text: str) -> int:
+    """终端显示宽度，中文等全角字符占两列"""
+    return sum(2 if unicodedata.east_asian_width(c) in ("W", "F") else 1 for c in text)
+
+
+def _truncate(text: str, width: int) -> str:
+    """按显示宽度截断"""
+    if _display_width(text) <= width:
+        return text
+    result, used = [], 0
+    for c in text:
+        w = _display_width(c)
+        if used + w > width - 3:
+            break
+        result.append(c)
+        used += w
+    return "".join(result) + "..."
+
+
+class ConsoleProgress:
+    """
+    控制台进度显示，可作为 progress 回调传给下载器
+
+    所有进行中的下载汇总在同一行显示，完成或失败的下载单独输出一行；
+    输出不是终端时只输出完成行。可在多个线程和事件循环间共享。
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, refresh_interval: float = 0.2):
+        """
+        初始化控制台进度显示
+
+        Args:
+            stream: 输出位置，默认为标准错误
+            refresh_interval: 状态行的最短刷新间隔（秒）
+        """
+        self.stream = stream or sys.stderr
+        self.refresh_interval = refresh_interval
+        self._active: "OrderedDict[Tuple[str, str], ProgressEvent]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_render = 0.0
+        self._line_width = 0
+        self._is_tty = hasattr(self.stream, "isatty") and self.stream.isatty()
+
+    def __call__(self, event: ProgressEvent):
+        key = (event.job, event.stream)
+        with self._lock:
+            if event.status == "downloading":
+                self._active[key] = event
+                now = time.monotonic()
+                if now - self._last_render < self.refresh_interval:
+                    return
+                self._last_render = now
+            else:
+                self._active.pop(key, None)
+                self._clear_line()
+                mark = "完成" if event.status == "finished" else "失败"
+                self.stream.write(
+                    f"{mark} {self._label(event)}: {_format_size(event.downloaded)}，用时 {event.elapsed:.1f}s\n"
+                )
+            self._render()
+
+    @staticmethod
+    def _label(event: ProgressEvent) -> str:
+        """用BV号和分P号代替完整URL"""
+        bvid, page = parse_bili_url(event.job) if event.job else (None, 1)
+        if not bvid:
+            return f"{event.job} {event.stream}".strip()
+        return f"{bvid}{f' P{page}' if page > 1 else ''} {event.stream}"
+
+    def _describe(self, event: ProgressEvent) -> str:
+        percent = event.percent
+        label = self._label(event)
+        text = (
+            f"{label} {percent:.0f}%"
+            if percent is not None
+            else f"{label} {_format_size(event.downloaded)}"
+        )
+        text += f" {_format_size(event.rate)}/s"
+        if event.eta is not None:
+            text += f" 剩余{event.eta:.0f}s"
+        return text
+
+    def _clear_line(self):
+        if self._is_tty and self._line_width:
+            self.stream.write("\r" + " " * self._line_width + "\r")
+            self._line_width = 0
+
+    def _render(self):
+        if not self._is_tty:
+            self.stream.flush()
+            return
+        if not self._active:
+            self._clear_line()
+            self.stream.flush()
+            return
+
+        width = shutil.get_terminal_size((100, 20)).columns - 1
+        line = _truncate(
+            f"[{len(self._active)}] "
+            + " | ".join(self._describe(e) for e in self._active.values()),
+            width,
+        )
+        line_width = _display_width(line)
+        padding = max(self._line_width - line_width, 0)
+        self.stream.write("\r" + line + " " * padding)
+        self._line_width = line_width
+        self.stream.flush()
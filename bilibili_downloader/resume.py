@@ -0,0 +1,140 @@
+"""
+断点续传状态管理
+"""
+
+import json
+import os
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# 清单文件后缀，与临时文件放在一起
+MANIFEST_SUFFIX = ".part.json"
+
+
+def url_identity(url: str) -> str:
+    """
+    返回URL的身份标识
+
+    B站CDN的base_url带有会过期的签名参数，且不同镜像主机不同，
+    因此只用路径部分判断是否为同一个媒体流。
+    """
+    return urlsplit(url).path
+
+
+def manifest_path(filepath: str) -> str:
+    """获取临时文件对应的清单文件路径"""
+    return filepath + MANIFEST_SUFFIX
+
+
+class DownloadManifest:
+    """记录临时文件已完成字节区间的清单"""
+
+    def __init__(
+        self,
+        path: str,
+        url_id: str,
+        total_size: int,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        completed: Optional[List[Tuple[int, int]]] = None,
+    ):
+        self.path = path
+        self.url_id = url_id
+        self.total_size = total_size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.completed: List[Tuple[int, int]] = [tuple(r) for r in completed or []]
+
+    @classmethod
+    def load(cls, path: str) -> Optional["DownloadManifest"]:
+        """读取清单，不存在或损坏时返回None"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(
+                path=path,
+                url_id=data["url_id"],
+                total_size=data["total_size"],
+                etag=data.get("etag"),
+                last_modified=data.get("last_modified"),
+                completed=data.get("completed", []),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self):
+        """原子地写入清单"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "url_id": self.url_id,
+                    "total_size": self.total_size,
+                    "etag": self.etag,
+                    "last_modified": self.last_modified,
+                    "completed": [list(r) for r in self.completed],
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        """删除清单文件"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def matches(
+        self,
+        url_id: str,
+        total_size: int,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> bool:
+        """判断清单是否对应同一个远端文件"""
+        if self.url_id != url_id or self.total_size != total_size:
+            return False
+        if self.etag and etag and self.etag != etag:
+            return False
+        if self.last_modified and last_modified and self.last_modified != last_modified:
+            return False
+        return True
+
+    def add_range(self, start: int, end: int):
+        """记录已完成的闭区间 [start, end]，与已有区间合并"""
+        if end < start:
+            return
+        # 绝大多数情况是顺着某个分段继续写，直接延长该区间
+        for i, (s, e) in enumerate(self.completed):
+            if e + 1 == start:
+                end = max(end, e)
+                start = s
+                del self.completed[i]
+                break
+
+        merged = []
+        for s, e in sorted(self.completed + [(start, end)]):
+            if merged and s <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+            else:
+                merged.append((s, e))
+        self.completed = merged
+
+    def missing_ranges(self) -> List[Tuple[int, int]]:
+        """尚未完成的闭区间列表"""
+        missing = []
+        position = 0
+        for s, e in sorted(self.completed):
+            if s > position:
+                missing.append((position, s - 1))
+            position = max(position, e + 1)
+        if position < self.total_size:
+            missing.append((position, self.total_size - 1))
+        return missing
+
+    @property
+    def completed_bytes(self) -> int:
+        return sum(e - s + 1 for s, e in self.completed)
+
+    @property
+    def is_complete(self) -> bool:
+        return not self.missing_ranges()
@@ -0,0 +1,177 @@
+"""
+请求重试策略
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Tuple, TypeVar
+
+from .exceptions import RateLimitError
+from .utils import lazy_import
+
+aiohttp = lazy_import("aiohttp")
+requests = lazy_import("requests")
+
+T = TypeVar("T")
+
+# B站接口表示请求过于频繁或被风控拦截的返回码
+RATE_LIMIT_CODES = (-412, -509, -799)
+# 表示限流的HTTP状态码
+RATE_LIMIT_STATUSES = (412, 429)
+
+
+def check_api_response(data: Any) -> Any:
+    """检查B站接口返回码，遇到限流/风控码时抛出 RateLimitError"""
+    if isinstance(data, dict) and data.get("code") in RATE_LIMIT_CODES:
+        raise RateLimitError(f"请求被限流({data['code']}): {data.get('message', '')}")
+    return data
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    重试策略
+
+    采用带完全抖动（full jitter）的指数退避；服务器给出 Retry-After 时至少等待该时长。
+    连接错误、超时和 retry_statuses 中的状态码可以重试，其余错误（如404、解析失败）立即失败。
+
+    Attributes:
+        max_attempts: 最多尝试次数（包括第一次），1表示不重试
+        base_delay: 第一次重试的最大退避时间（秒），之后每次翻倍
+        max_delay: 单次退避时间上限（秒）
+        retry_statuses: 可以重试的HTTP状态码
+        rate_limit_delay: 触发限流但没有 Retry-After 时的最短等待时间（秒）
+        max_retry_after: 服务器要求的等待时间超过该值时不再重试（秒）
+    """
+
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    retry_statuses: Tuple[int, ...] = (408, 412, 429, 500, 502, 503, 504)
+    rate_limit_delay: float = 5.0
+    max_retry_after: float = 120.0
+
+    def backoff(self, retry: int) -> float:
+        """第 retry 次重试（从1开始）前的退避时间"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (retry - 1)))
+        return random.uniform(0, ceiling)
+
+    def classify(self, exc: BaseException) -> Tuple[bool, Optional[float], bool]:
+        """
+        判断异常是否可以重试
+
+        Returns:
+            Tuple[bool, Optional[float], bool]: (是否可重试, 服务器要求的等待秒数, 是否为限流)
+        """
+        if isinstance(exc, RateLimitError):
+            return True, exc.retry_after, True
+        if isinstance(exc, aiohttp.ClientResponseError):
+            retry_after = parse_retry_after((exc.headers or {}).get("Retry-After"))
+            return (
+                exc.status in self.retry_statuses,
+                retry_after,
+                exc.status in RATE_LIMIT_STATUSES,
+            )
+        if isinstance(exc, requests.HTTPError):
+            response = exc.response
+            if response is None:
+                return False, None, False
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            return (
+                response.status_code in self.retry_statuses,
+                retry_after,
+                response.status_code in RATE_LIMIT_STATUSES,
+            )
+        if isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError)):
+            return True, None, False
+        if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+            return True, None, False
+        return False, None, False
+
+    def delay_for(self, exc: BaseException, retry: int) -> Optional[float]:
+        """
+        计算第 retry 次重试前的等待时间
+
+        Returns:
+            Optional[float]: 等待秒数，不应重试时返回None
+        """
+        if retry >= self.max_attempts:
+            return None
+        retryable, retry_after, rate_limited = self.classify(exc)
+        if not retryable:
+            return None
+        delay = self.backoff(retry)
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            delay = max(delay, retry_after)
+        elif rate_limited:
+            delay = max(delay, self.rate_limit_delay)
+        return delay
+
+    def is_rate_limit(self, exc: BaseException) -> bool:
+        """是否为限流/风控错误"""
+        return self.classify(exc)[2]
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[T]],
+        on_retry: Optional[Callable[[BaseException, float], None]] = None,
+    ) -> T:
+        """
+        按策略异步执行并在可重试的错误上重试
+
+        Args:
+            func: 每次尝试时调用的协程函数
+            on_retry: 重试前的回调，参数为异常和即将等待的秒数
+
+        Returns:
+            func 的返回值；重试用尽或遇到不可重试的错误时抛出最后一次的异常
+        """
+        retry = 0
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                retry += 1
+                delay = self.delay_for(e, retry)
+                if delay is None:
+                    raise
+                if on_retry is not None:
+                    on_retry(e, delay)
+                await asyncio.sleep(delay)
+
+    def run_sync(
+        self,
+        func: Callable[[], T],
+        on_retry: Optional[Callable[[BaseException, float], None]] = None,
+    ) -> T:
+        """按策略同步执行并在可重试的错误上重试，参数同 run"""
+        retry = 0
+        while True:
+            try:
+                return func()
+            except Exception as e:
+                retry += 1
+                delay = self.delay_for(e, retry)
+                if delay is None:
+                    raise
+                if on_retry is not None:
+                    on_retry(e, delay)
+                time.sleep(delay)
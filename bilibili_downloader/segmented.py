@@ -0,0 +1,170 @@
+"""
+分段（HTTP Range）下载辅助函数
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import aiohttp
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+# 不支持 os.pwrite 的平台（Windows）上用锁保护 seek+write
+_pwrite_lock = threading.Lock()
+
+
+@dataclass
+class RemoteFileInfo:
+    """远端文件探测结果"""
+
+    size: int
+    accept_ranges: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def parse_content_range(value: str) -> Optional[Tuple[int, int, Optional[int]]]:
+    """解析 Content-Range 头，返回 (起始, 结束, 总大小)"""
+    match = _CONTENT_RANGE_RE.match(value or "")
+    if not match:
+        return None
+    total = match.group(3)
+    return (
+        int(match.group(1)),
+        int(match.group(2)),
+        None if total == "*" else int(total),
+    )
+
+
+def split_ranges(
+    total_size: int, segments: int, min_segment_size: int
+) -> List[Tuple[int, int]]:
+    """
+    将文件切分为若干字节区间
+
+    Args:
+        total_size: 文件总大小
+        segments: 期望的分段数
+        min_segment_size: 每段最小字节数
+
+    Returns:
+        List[Tuple[int, int]]: 闭区间 (start, end) 列表
+    """
+    if total_size <= 0:
+        return []
+
+    count = max(1, min(segments, total_size // max(min_segment_size, 1)))
+    size, remainder = divmod(total_size, count)
+
+    ranges = []
+    start = 0
+    for i in range(count):
+        length = size + (1 if i < remainder else 0)
+        ranges.append((start, start + length - 1))
+        start += length
+    return ranges
+
+
+def split_missing_ranges(
+    missing: List[Tuple[int, int]], segments: int, min_segment_size: int
+) -> List[Tuple[int, int]]:
+    """
+    将若干缺失区间切分为大致均匀的分段，总段数不超过 segments
+
+    缺口多于 segments 时合并间隔最小的相邻缺口（重新下载其间少量已完成的数据），
+    其余分段数按各区间大小成比例分配。
+
+    Args:
+        missing: 缺失的闭区间列表
+        segments: 期望的分段数
+        min_segment_size: 每段最小字节数
+
+    Returns:
+        List[Tuple[int, int]]: 闭区间 (start, end) 列表
+    """
+    missing = sorted(missing)
+    segments = max(segments, 1)
+    while len(missing) > segments:
+        i = min(
+            range(len(missing) - 1), key=lambda j: missing[j + 1][0] - missing[j][1]
+        )
+        missing[i : i + 2] = [(missing[i][0], missing[i + 1][1])]
+
+    lengths = [end - start + 1 for start, end in missing]
+    total_missing = sum(lengths)
+    if total_missing <= 0:
+        return []
+
+    count = max(len(missing), min(segments, total_missing // max(min_segment_size, 1)))
+    # 每个区间至少一段，剩余分段依次分给当前每段最长的区间
+    counts = [1] * len(missing)
+    for _ in range(count - len(missing)):
+        i = max(range(len(missing)), key=lambda j: lengths[j] / counts[j])
+        counts[i] += 1
+
+    ranges = []
+    for (start, _), length, parts in zip(missing, lengths, counts):
+        for sub_start, sub_end in split_ranges(length, parts, 1):
+            ranges.append((start + sub_start, start + sub_end))
+    return ranges
+
+
+async def probe_remote_file(
+    session: "aiohttp.ClientSession", url: str, headers: dict
+) -> RemoteFileInfo:
+    """
+    探测文件大小、校验信息以及服务器是否支持Range请求
+
+    通过请求第一个字节实现，比HEAD请求在CDN上更可靠。
+
+    Returns:
+        RemoteFileInfo: 探测结果，大小未知时为0
+    """
+    probe_headers = dict(headers)
+    probe_headers["Range"] = "bytes=0-0"
+    async with session.get(url, headers=probe_headers) as response:
+        response.raise_for_status()
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if response.status == 206:
+            parsed = parse_content_range(response.headers.get("content-range", ""))
+            if parsed and parsed[2] is not None:
+                return RemoteFileInfo(parsed[2], True, etag, last_modified)
+        total_size = int(response.headers.get("content-length", 0))
+        return RemoteFileInfo(total_size, False, etag, last_modified)
+
+
+def preallocate(filepath: str, size: int):
+    """创建（或截断）并预分配指定大小的文件"""
+    with open(filepath, "wb") as f:
+        if size <= 0:
+            return
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+                return
+            except OSError:
+                pass
+        f.truncate(size)
+
+
+def pwrite(fd: int, data: bytes, offset: int):
+    """在指定偏移处写入数据"""
+    if hasattr(os, "pwrite"):
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+        return
+
+    with _pwrite_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
@@ -0,0 +1,186 @@
+"""
+DASH流选择策略
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .exceptions import BilibiliDownloadError
+
+# 画质编号（qn）对应的分辨率高度，用于缺少 height 字段的流
+QUALITY_HEIGHTS = {
+    6: 240,
+    16: 360,
+    32: 480,
+    64: 720,
+    74: 720,
+    80: 1080,
+    112: 1080,
+    116: 1080,
+    120: 2160,
+    125: 2160,
+    126: 2160,
+    127: 4320,
+}
+
+# codecs 字符串前缀与 codecid 对应的编码名称
+CODEC_PREFIXES = {
+    "avc1": "avc",
+    "hev1": "hevc",
+    "hvc1": "hevc",
+    "av01": "av1",
+}
+CODEC_IDS = {7: "avc", 12: "hevc", 13: "av1"}
+
+# playurl接口 fnval 标志位
+FNVAL_DASH = 16
+FNVAL_AV1 = 2048
+
+
+def video_codec_name(stream: Dict[str, Any]) -> Optional[str]:
+    """返回视频流的编码名称（avc/hevc/av1），无法识别时返回None"""
+    codecs = stream.get("codecs") or ""
+    name = CODEC_PREFIXES.get(codecs.split(".", 1)[0])
+    return name or CODEC_IDS.get(stream.get("codecid"))
+
+
+def video_height(stream: Dict[str, Any]) -> int:
+    """返回视频流的分辨率高度"""
+    return stream.get("height") or QUALITY_HEIGHTS.get(stream.get("id"), 0)
+
+
+@dataclass(frozen=True)
+class StreamPolicy:
+    """
+    流选择策略
+
+    视频先按分辨率和码率限制筛选，再按编码优先级取最靠前的编码，最后按 prefer 选出一路；
+    没有流满足限制时退而选择最接近限制的流，不会因此失败。
+
+    Attributes:
+        max_height: 最大分辨率高度，如 720
+        min_height: 最小分辨率高度，配合 prefer="smallest" 表示“满足该分辨率的最小流”
+        max_video_bandwidth: 视频码率上限（bps）
+        codecs: 视频编码优先级，如 ("avc", "hevc", "av1")，为空表示不限制编码
+        prefer: highest 选择满足条件中画质最高的，smallest 选择满足条件中最小的
+        audio: 音频选择方式，smallest 或 highest
+        max_audio_bandwidth: 音频码率上限（bps）
+    """
+
+    max_height: Optional[int] = None
+    min_height: Optional[int] = None
+    max_video_bandwidth: Optional[int] = None
+    codecs: Tuple[str, ...] = ()
+    prefer: str = "highest"
+    audio: str = "smallest"
+    max_audio_bandwidth: Optional[int] = None
+
+    def __post_init__(self):
+        if self.prefer not in ("highest", "smallest"):
+            raise ValueError(f"不支持的视频选择方式: {self.prefer}")
+        if self.audio not in ("highest", "smallest"):
+            raise ValueError(f"不支持的音频选择方式: {self.audio}")
+        # 允许传入列表
+        object.__setattr__(self, "codecs", tuple(self.codecs))
+
+    @property
+    def key(self) -> str:
+        """策略标识，用作流地址缓存的画质键"""
+        return (
+            f"h{self.min_height or ''}-{self.max_height or ''}"
+            f"_vb{self.max_video_bandwidth or ''}"
+            f"_c{','.join(self.codecs)}"
+            f"_{self.prefer}"
+            f"_a{self.audio}{self.max_audio_bandwidth or ''}"
+        )
+
+    @property
+    def fnval(self) -> int:
+        """请求playurl接口时使用的 fnval，需要AV1时额外请求AV1流"""
+        if "av1" in self.codecs:
+            return FNVAL_DASH | FNVAL_AV1
+        return FNVAL_DASH
+
+    def select_video(self, streams: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """从DASH视频流列表中选出一路"""
+        if not streams:
+            raise BilibiliDownloadError("没有可用的视频流")
+
+        def size(stream: Dict[str, Any]) -> Tuple[int, int]:
+            return video_height(stream), stream.get("bandwidth", 0)
+
+        candidates = [
+            s
+            for s in streams
+            if (self.max_height is None or video_height(s) <= self.max_height)
+            and (
+                self.max_video_bandwidth is None
+                or s.get("bandwidth", 0) <= self.max_video_bandwidth
+            )
+        ]
+        if not candidates:
+            # 全部超出上限时选择最小的流
+            candidates = [min(streams, key=size)]
+
+        if self.min_height is not None:
+            tall_enough = [s for s in candidates if video_height(s) >= self.min_height]
+            candidates = tall_enough or [max(candidates, key=size)]
+
+        if self.codecs:
+            for codec in self.codecs:
+                matched = [s for s in candidates if video_codec_name(s) == codec]
+                if matched:
+                    candidates = matched
+                    break
+
+        if self.prefer == "smallest":
+            return min(candidates, key=size)
+        return max(candidates, key=size)
+
+    def select_audio(self, streams: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """从DASH音频流列表中选出一路"""
+        if not streams:
+            raise BilibiliDownloadError("没有可用的音频流")
+
+        candidates = [
+            s
+            for s in streams
+            if self.max_audio_bandwidth is None
+            or s.get("bandwidth", 0) <= self.max_audio_bandwidth
+        ] or streams
+
+        def bandwidth(stream: Dict[str, Any]) -> int:
+            return stream.get("bandwidth", 0)
+
+        if self.audio == "highest":
+            return max(candidates, key=bandwidth)
+        return min(candidates, key=bandwidth)
+
+    def select(self, dash: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        从DASH数据中选出音视频流
+
+        Args:
+            dash: playinfo/playurl 返回中的 dash 对象
+
+        Returns:
+            Dict[str, Any]: VideoInfo 中与流相关的字段
+        """
+        video = self.select_video(dash.get("video") or [])
+        audio = self.select_audio(dash.get("audio") or [])
+        return {
+            "video_url": video.get("base_url") or video.get("baseUrl"),
+            "audio_url": audio.get("base_url") or audio.get("baseUrl"),
+            "audio_codec": audio.get("codecs"),
+            "video_codec": video_codec_name(video),
+            "quality": video.get("id"),
+            "height": video_height(video) or None,
+            "video_bandwidth": video.get("bandwidth"),
+            "audio_bandwidth": audio.get("bandwidth"),
+            "video_backup_urls": list(
+                video.get("backup_url") or video.get("backupUrl") or []
+            ),
+            "audio_backup_urls": list(
+                audio.get("backup_url") or audio.get("backupUrl") or []
+            ),
+        }
@@ -0,0 +1,159 @@
+"""
+HTTP连接池管理
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+from .models import ConnectionStats
+from .utils import lazy_import
+
+# 只用同步接口时不会加载aiohttp，反之亦然
+aiohttp = lazy_import("aiohttp")
+requests = lazy_import("requests")
+
+
+class HTTPSessionPool:
+    """同时管理同步(requests)和异步(aiohttp)会话的长连接池"""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_connections_per_host: int = 10,
+        dns_cache_ttl: int = 300,
+        read_bufsize: int = 2**16,
+    ):
+        """
+        初始化连接池
+
+        Args:
+            max_connections: 最大连接总数
+            max_connections_per_host: 每个主机的最大连接数
+            dns_cache_ttl: DNS缓存时间（秒）
+            read_bufsize: 每个响应的读缓冲区大小，决定单次读取最多能拿到多少数据
+        """
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.read_bufsize = read_bufsize
+
+        # 会话与创建时的事件循环绑定，每个事件循环各用一个会话
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._sync_session: Optional[requests.Session] = None
+        self._async_stats = ConnectionStats()
+        # 已关闭的同步会话留下的统计
+        self._closed_sync_stats = ConnectionStats()
+
+    async def get(self) -> "aiohttp.ClientSession":
+        """获取当前事件循环上的异步会话，不存在则创建"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            # 已关闭的事件循环上的会话无法再关闭，丢弃后其连接随对象回收关闭
+            for owner in list(self._sessions):
+                if owner.is_closed():
+                    self._sessions.pop(owner, None)
+
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_create)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+            )
+            # 不设置总超时，避免长视频下载被中断
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+                trace_configs=[trace_config],
+                read_bufsize=self.read_bufsize,
+            )
+            self._sessions[loop] = session
+        return session
+
+    def get_sync(self) -> "requests.Session":
+        """获取同步会话，不存在则创建"""
+        if self._sync_session is None:
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=self.max_connections,
+                pool_maxsize=self.max_connections_per_host,
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._sync_session = session
+        return self._sync_session
+
+    async def _on_connection_create(self, session, context, params):
+        self._async_stats.opened += 1
+
+    async def _on_connection_reuse(self, session, context, params):
+        self._async_stats.reused += 1
+
+    def _sync_stats(self) -> ConnectionStats:
+        """根据urllib3连接池计数估算同步会话的连接统计"""
+        stats = ConnectionStats()
+        if self._sync_session is None:
+            return stats
+
+        adapter = self._sync_session.get_adapter("https://")
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats.opened += pool.num_connections
+            stats.reused += max(pool.num_requests - pool.num_connections, 0)
+        return stats
+
+    @property
+    def stats(self) -> ConnectionStats:
+        """累计的新建连接数与复用连接数"""
+        sync_stats = self._sync_stats()
+        return ConnectionStats(
+            opened=self._async_stats.opened
+            + self._closed_sync_stats.opened
+            + sync_stats.opened,
+            reused=self._async_stats.reused
+            + self._closed_sync_stats.reused
+            + sync_stats.reused,
+        )
+
+    async def close_loop_session(self):
+        """关闭当前事件循环上的异步会话"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def close_async(self):
+        """关闭所有事件循环上的异步会话"""
+        loop = asyncio.get_running_loop()
+        sessions, self._sessions = self._sessions, {}
+        for owner, session in sessions.items():
+            if session.closed:
+                continue
+            if owner is loop:
+                await session.close()
+            elif owner.is_running():
+                # 其他线程中的事件循环：在会话所属的循环上关闭
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(session.close(), owner)
+                )
+
+    def close_sync(self):
+        """关闭同步会话"""
+        if self._sync_session is not None:
+            sync_stats = self._sync_stats()
+            self._closed_sync_stats.opened += sync_stats.opened
+            self._closed_sync_stats.reused += sync_stats.reused
+            self._sync_session.close()
+            self._sync_session = None
+
+    async def close(self):
+        """关闭所有会话"""
+        await self.close_async()
+        self.close_sync()
@@ -0,0 +1,138 @@
+"""
+并发调用合并
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+def _failed(task: asyncio.Task) -> bool:
+    return task.done() and (task.cancelled() or task.exception() is not None)
+
+
+class _Flight:
+    """一次正在进行（或已完成但仍有人使用）的调用"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.holders = 0
+
+
+class Lease(Generic[T]):
+    """调用方对一次调用的占用，release 之前调用结果保持有效"""
+
+    def __init__(
+        self, group: "SingleFlight[T]", key: Hashable, flight: _Flight, shared: bool
+    ):
+        self._group = group
+        self._key = key
+        self._flight = flight
+        self._released = False
+        # 是否加入了其他调用方发起的调用
+        self.shared = shared
+
+    async def wait(self) -> T:
+        """
+        等待调用完成并返回结果；本调用方被取消不会取消调用本身
+
+        Raises:
+            调用抛出的异常会传给所有等待它的调用方
+        """
+        return await asyncio.shield(self._flight.task)
+
+    def release(self):
+        """结束占用，可以重复调用"""
+        if self._released:
+            return
+        self._released = True
+        self._flight.holders -= 1
+        if not self._flight.holders:
+            self._group._land(self._key, self._flight)
+
+
+class SingleFlight(Generic[T]):
+    """
+    合并同一个键上的并发调用
+
+    同一个键同时只执行一次调用，期间加入的调用方共享同一个结果；结果在最后一个调用方离开前一直有效，
+    之后再调用会重新执行。调用失败后新加入的调用方会重新发起调用，不会拿到旧的异常。
+    某个调用方被取消不影响其他调用方；所有调用方都离开时，尚未完成的调用会被取消。
+    """
+
+    def __init__(self, release: Optional[Callable[[T], None]] = None):
+        """
+        Args:
+            release: 最后一个调用方离开时对成功的结果执行的清理，如删除共享的临时文件
+        """
+        self.release = release
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def __len__(self) -> int:
+        """正在进行或仍被使用的调用数"""
+        return len(self._flights)
+
+    def join(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> Lease[T]:
+        """
+        发起或加入 key 上的调用，需要在事件循环中调用
+
+        调用在单独的任务中运行，继承第一个调用方的上下文（如阶段计时、带宽限制）。
+        返回的 Lease 用完后必须 release。
+
+        Args:
+            key: 调用的标识
+            func: 没有可加入的调用时执行的协程函数
+
+        Returns:
+            Lease: 对调用的占用
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        # 同步接口每次使用新的事件循环，其他循环上的调用不能加入
+        shared = (
+            flight is not None
+            and flight.task.get_loop() is loop
+            and not _failed(flight.task)
+        )
+        if not shared:
+            flight = _Flight(loop.create_task(func()))
+            self._flights[key] = flight
+        flight.holders += 1
+        return Lease(self, key, flight, shared)
+
+    @asynccontextmanager
+    async def hold(
+        self, key: Hashable, func: Callable[[], Awaitable[T]]
+    ) -> AsyncIterator[Tuple[T, bool]]:
+        """
+        发起或加入 key 上的调用并等待结果，with 块内结果保持有效
+
+        Yields:
+            (调用结果, 是否加入了其他调用方发起的调用)
+        """
+        lease = self.join(key, func)
+        try:
+            yield await lease.wait(), lease.shared
+        finally:
+            lease.release()
+
+    def _land(self, key: Hashable, flight: _Flight):
+        """最后一个调用方离开：移除记录，取消未完成的调用或清理结果"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.done():
+            flight.task.cancel()
+        elif self.release is not None and not _failed(flight.task):
+            self.release(flight.task.result())
@@ -0,0 +1,180 @@
+"""
+令牌桶限流
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    令牌桶，支持异步和同步两种获取方式
+
+    等待者按先来先到的顺序获取令牌，多个并发流按块轮流得到配额；单次请求超过桶容量时
+    以“欠账”方式处理，即先扣除令牌再等到欠账还清。速率可以在运行时调整，
+    正在等待的请求最迟在 MAX_SLEEP 秒后按新速率重新计算。
+    """
+
+    # 等待欠账时单次睡眠的上限（秒）
+    MAX_SLEEP = 0.25
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数，None表示不限制
+            capacity: 桶容量，默认等于 rate（即允许1秒的突发）
+        """
+        # 令牌计数在线程间共享，排队锁分别用于异步（按事件循环创建）和同步调用
+        self._state_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._capacity = capacity
+        self.rate: Optional[float] = None
+        self.capacity = 0.0
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: Optional[float], capacity: Optional[float] = None):
+        """
+        调整速率
+
+        Args:
+            rate: 每秒补充的令牌数，None表示不限制
+            capacity: 新的桶容量，不指定则沿用创建时的设置（默认等于 rate）
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError("rate 必须大于0")
+        with self._state_lock:
+            was_limited = self.rate is not None
+            if was_limited:
+                self._refill()
+            if capacity is not None:
+                self._capacity = capacity
+            self.rate = float(rate) if rate is not None else None
+            self.capacity = float(
+                self._capacity if self._capacity is not None else (rate or 0)
+            )
+            # 从不限制切换为限制时从满桶开始
+            self._tokens = (
+                min(self._tokens, self.capacity) if was_limited else self.capacity
+            )
+            self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def _take(self, amount: float):
+        """扣除令牌，允许欠账"""
+        with self._state_lock:
+            if self.rate is None:
+                return
+            self._refill()
+            self._tokens -= amount
+
+    def _deficit(self) -> float:
+        """还清欠账需要等待的秒数"""
+        with self._state_lock:
+            if self.rate is None:
+                return 0.0
+            self._refill()
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def _loop_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self, amount: float = 1):
+        """获取指定数量的令牌，不足时等待"""
+        if self.rate is None:
+            return
+        async with self._loop_lock():
+            self._take(amount)
+            wait = self._deficit()
+            while wait > 0:
+                await asyncio.sleep(min(wait, self.MAX_SLEEP))
+                wait = self._deficit()
+
+    def acquire_sync(self, amount: float = 1):
+        """同步获取令牌，不足时阻塞当前线程"""
+        if self.rate is None:
+            return
+        with self._sync_lock:
+            self._take(amount)
+            wait = self._deficit()
+            while wait > 0:
+                time.sleep(min(wait, self.MAX_SLEEP))
+                wait = self._deficit()
+
+
+class RequestLimiter:
+    """
+    API请求限流器
+
+    可选地按固定速率限制请求数；收到风控响应后进入冷却，冷却期间所有任务的
+    API请求都会等待，避免并发任务继续触发风控。
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        """
+        初始化限流器
+
+        Args:
+            rate: 每秒允许的请求数，None表示不限制
+            burst: 允许的突发请求数，默认等于 rate
+        """
+        self._bucket = TokenBucket(rate, burst) if rate else None
+        self._blocked_until = 0.0
+
+    def cooldown(self, seconds: float):
+        """在接下来的 seconds 秒内暂停所有API请求"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        """等待冷却结束并获取一个请求配额"""
+        wait = self._blocked_until - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if self._bucket is not None:
+            await self._bucket.acquire()
+
+    def acquire_sync(self):
+        """同步等待冷却结束并获取一个请求配额"""
+        wait = self._blocked_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        if self._bucket is not None:
+            self._bucket.acquire_sync()
+
+
+_job_bucket: contextvars.ContextVar[Optional[TokenBucket]] = contextvars.ContextVar(
+    "bilibili_downloader_job_bucket", default=None
+)
+
+
+def current_job_bucket() -> Optional[TokenBucket]:
+    """当前下载任务的带宽限制，不在任务中或未限制时为None"""
+    return _job_bucket.get()
+
+
+def enter_job_bucket(bucket: Optional[TokenBucket]) -> contextvars.Token:
+    """为当前任务（及其创建的子任务）设置带宽限制，返回用于恢复的token"""
+    return _job_bucket.set(bucket)
+
+
+def exit_job_bucket(token: contextvars.Token):
+    """恢复进入任务前的带宽限制"""
+    _job_bucket.reset(token)
@@ -0,0 +1,131 @@
+"""
+下载任务的阶段计时与追踪钩子
+"""
+
+import contextvars
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from .models import DownloadResult
+
+# span名称的前缀
+SPAN_PREFIX = "bilibili_downloader."
+
+
+class JobMetrics:
+    """单个下载任务的各阶段耗时和重试次数"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.retries = 0
+
+    def add(self, stage: str, seconds: float):
+        """累加阶段耗时，同一阶段多次进入时合计"""
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+
+_current_metrics: contextvars.ContextVar[Optional[JobMetrics]] = contextvars.ContextVar(
+    "bilibili_downloader_metrics", default=None
+)
+_current_tracer: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar(
+    "bilibili_downloader_tracer", default=None
+)
+
+
+def record(stage: str, seconds: float):
+    """直接记录一段耗时，不创建span；不在任务中时忽略"""
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.add(stage, seconds)
+
+
+def count_retry():
+    """当前任务的重试次数加一"""
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.retries += 1
+
+
+@contextmanager
+def stage(name: str, **attributes) -> Iterator[Optional[Any]]:
+    """
+    记录一个阶段的耗时；任务设置了 tracer 时同时创建一个子span
+
+    只能在协程或普通函数中使用，不能跨越异步生成器的 yield。
+
+    Args:
+        name: 阶段名称，同时作为 DownloadResult.timings 的键
+        attributes: span的属性
+
+    Yields:
+        span对象，未设置 tracer 时为None
+    """
+    tracer = _current_tracer.get()
+    started = time.perf_counter()
+    try:
+        if tracer is None:
+            yield None
+        else:
+            with tracer.start_as_current_span(
+                SPAN_PREFIX + name, attributes=attributes
+            ) as span:
+                yield span
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+class JobTrace:
+    """
+    一次下载任务的计时上下文
+
+    enter 之后，当前任务（及其创建的子任务）中的 stage/record/count_retry 都记到这里；
+    设置了 tracer 时还会创建任务的根span，各阶段的span都是它的子span。
+    tracer 只需提供 OpenTelemetry Tracer 的 start_as_current_span(name, attributes=...) 方法。
+    """
+
+    def __init__(
+        self,
+        tracer: Optional[Any],
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes or {}
+        self.metrics = JobMetrics()
+        self.span: Optional[Any] = None
+        self._stack = ExitStack()
+        self._tokens = None
+
+    def enter(self):
+        """进入任务：设置当前任务的计时对象和 tracer，创建根span"""
+        self._tokens = (
+            _current_metrics.set(self.metrics),
+            _current_tracer.set(self.tracer),
+        )
+        if self.tracer is not None:
+            self.span = self._stack.enter_context(
+                self.tracer.start_as_current_span(
+                    SPAN_PREFIX + self.name, attributes=self.attributes
+                )
+            )
+
+    def exit(self):
+        """结束根span并恢复进入任务前的上下文"""
+        self._stack.close()
+        metrics_token, tracer_token = self._tokens
+        _current_tracer.reset(tracer_token)
+        _current_metrics.reset(metrics_token)
+
+    def finish(self, result: DownloadResult) -> DownloadResult:
+        """把计时结果写入 DownloadResult，并在根span上记录结果"""
+        result.timings = dict(self.metrics.timings)
+        result.retries = self.metrics.retries
+        if self.span is not None:
+            self.span.set_attribute("success", result.success)
+            self.span.set_attribute("bytes_downloaded", result.bytes_downloaded)
+            self.span.set_attribute("retries", result.retries)
+            if not result.success:
+                self.span.set_attribute("error", result.message)
+        return result
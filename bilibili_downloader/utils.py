@@ -1,10 +1,47 @@
 """
 工具函数
 """
+
+import functools
+import importlib.util
 import re
 import os
+import shutil
+import sys
+import threading
+from types import ModuleType
 from typing import Optional, Tuple
 
+_lazy_lock = threading.Lock()
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    延迟导入模块，第一次访问其属性时才真正执行导入
+
+    aiohttp、requests 等依赖的导入耗时远大于本库自身，只做同步请求或只探测元数据时不必全部加载。
+    模块已导入或未安装时直接按普通方式导入（未安装时抛出 ImportError）。
+
+    Args:
+        name: 模块名
+
+    Returns:
+        ModuleType: 模块对象
+    """
+    with _lazy_lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        spec = importlib.util.find_spec(name)
+        if spec is None or spec.loader is None:
+            return importlib.import_module(name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        return module
+
 
 def extract_bvid(url: str) -> Optional[str]:
     """从URL中提取BV号"""
@@ -24,7 +61,7 @@ def extract_page_number(url: str) -> int:
             if "=" in param:
                 key, value = param.split("=", 1)
                 query_params[key] = value
-    
+
     page = query_params.get("p", "1")
     try:
         return int(page)
@@ -34,11 +71,11 @@ def extract_page_number(url: str) -> int:
 
 def get_url_from_text(text: str) -> str:
     """从文本中提取URL"""
-    url_pattern = r'https?://[\w\-]+\.[\w\-]+[/?\S]*'
+    url_pattern = r"https?://[\w\-]+\.[\w\-]+[/?\S]*"
     match = re.search(url_pattern, text)
     if match:
         return match.group()
-    return ''
+    return ""
 
 
 def parse_bili_url(url: str) -> Tuple[Optional[str], int]:
@@ -49,22 +86,25 @@ def parse_bili_url(url: str) -> Tuple[Optional[str], int]:
 
 
 def get_ffmpeg_path() -> str:
-    """获取FFmpeg路径"""
-    # 尝试从环境变量获取
-    ffmpeg_path = os.environ.get('FFMPEG_PATH')
-    if ffmpeg_path and os.path.exists(ffmpeg_path):
-        return ffmpeg_path
-    
+    """获取FFmpeg路径，查找结果在进程内缓存"""
+    return _find_ffmpeg(os.environ.get("FFMPEG_PATH"))
+
+
+@functools.lru_cache(maxsize=None)
+def _find_ffmpeg(env_path: Optional[str]) -> str:
+    # 优先使用环境变量指定的路径
+    if env_path and os.path.exists(env_path):
+        return env_path
+
     # 常见路径
     common_paths = [
-        '/usr/bin/ffmpeg',
-        '/usr/local/bin/ffmpeg',
-        '/opt/homebrew/bin/ffmpeg',
-        'ffmpeg'  # 系统PATH中
+        "/usr/bin/ffmpeg",
+        "/usr/local/bin/ffmpeg",
+        "/opt/homebrew/bin/ffmpeg",
     ]
-    
+
     for path in common_paths:
-        if os.path.exists(path) or os.system(f'which {path} > /dev/null 2>&1') == 0:
+        if os.path.exists(path):
             return path
-    
-    return 'ffmpeg'  # 默认假设在PATH中
\ No newline at end of file
+
+    return shutil.which("ffmpeg") or "ffmpeg"  # 默认假设在PATH中
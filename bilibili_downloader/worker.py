@@ -0,0 +1,242 @@
+"""
+多进程下载worker
+"""
+
+import asyncio
+import functools
+import os
+import socket
+import time
+from typing import Any, Dict, Optional
+
+from .downloader import BilibiliDownloader
+from .jobqueue import JobQueue
+from .models import DownloadResult, QueuedJob, QueueStats
+
+
+class Worker:
+    """
+    从任务队列领取并执行下载任务
+
+    在一个事件循环中使用一个 BilibiliDownloader 同时处理 concurrency 个任务；
+    执行期间定期续约，租约被其他worker接管时放弃该任务。
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        downloader_options: Optional[Dict[str, Any]] = None,
+        concurrency: int = 4,
+        name: Optional[str] = None,
+        lease_seconds: float = 60.0,
+        heartbeat_interval: Optional[float] = None,
+        poll_interval: float = 1.0,
+        exit_when_empty: bool = True,
+    ):
+        """
+        Args:
+            queue: 任务队列
+            downloader_options: 创建 BilibiliDownloader 的参数
+            concurrency: 同时执行的任务数
+            name: worker标识，默认为 主机名:进程号
+            lease_seconds: 租约时长（秒），worker崩溃后任务最多等待这么久重新排队
+            heartbeat_interval: 续约间隔（秒），默认为租约时长的1/3
+            poll_interval: 队列为空时的轮询间隔（秒）
+            exit_when_empty: 队列中没有未结束的任务时退出；为False时一直等待新任务
+        """
+        self.queue = queue
+        self.downloader_options = downloader_options or {}
+        self.concurrency = max(1, concurrency)
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval or lease_seconds / 3
+        self.poll_interval = poll_interval
+        self.exit_when_empty = exit_when_empty
+        # 已处理（写入结果）的任务数
+        self.processed = 0
+        self._stopping = False
+
+    def stop(self):
+        """不再领取新任务，正在执行的任务完成后 run 返回"""
+        self._stopping = True
+
+    async def _call(self, func, *args):
+        # 队列操作可能阻塞（如等待sqlite写锁），放到线程中执行
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(func, *args)
+        )
+
+    async def run(self) -> int:
+        """
+        运行直到队列为空（exit_when_empty）或调用 stop
+
+        Returns:
+            int: 本worker处理的任务数
+        """
+        async with BilibiliDownloader(**self.downloader_options) as downloader:
+            await asyncio.gather(
+                *(self._slot(downloader) for _ in range(self.concurrency))
+            )
+        return self.processed
+
+    async def _slot(self, downloader: BilibiliDownloader):
+        while not self._stopping:
+            job = await self._call(self.queue.claim, self.name, self.lease_seconds)
+            if job is None:
+                # 其他worker的任务仍可能因租约到期重新排队，全部结束才退出
+                if (
+                    self.exit_when_empty
+                    and not (await self._call(self.queue.stats)).unfinished
+                ):
+                    return
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self._process(downloader, job)
+
+    async def _process(self, downloader: BilibiliDownloader, job: QueuedJob):
+        download = asyncio.ensure_future(self._download(downloader, job))
+        lease = asyncio.ensure_future(self._keep_lease(job))
+        try:
+            await asyncio.wait([download, lease], return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            # worker被中断：交还任务，不计入尝试次数
+            download.cancel()
+            lease.cancel()
+            self.queue.release(job.id, self.name)
+            raise
+        lease.cancel()
+        if not download.done():
+            # 租约已失效，任务由其他worker执行
+            download.cancel()
+            await asyncio.gather(download, return_exceptions=True)
+            return
+        if await self._call(self.queue.complete, job.id, self.name, download.result()):
+            self.processed += 1
+
+    async def _download(
+        self, downloader: BilibiliDownloader, job: QueuedJob
+    ) -> DownloadResult:
+        started = time.monotonic()
+        try:
+            if job.kind == "audio":
+                return await downloader.download_audio_async(job.url, **job.options)
+            return await downloader.download_video_async(job.url, **job.options)
+        except Exception as e:
+            # 参数错误等未被下载方法处理的异常也作为失败结果写入队列
+            return DownloadResult(
+                success=False,
+                message=str(e),
+                url=job.url,
+                elapsed=time.monotonic() - started,
+            )
+
+    async def _keep_lease(self, job: QueuedJob):
+        """定期续约，租约失效时返回"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not await self._call(
+                self.queue.heartbeat, job.id, self.name, self.lease_seconds
+            ):
+                return
+
+
+def _run_process(queue: JobQueue, options: Dict[str, Any]):
+    """子进程入口"""
+    try:
+        asyncio.run(Worker(queue, **options).run())
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerPool:
+    """
+    在多个进程中运行 Worker
+
+    每个进程有自己的事件循环和 BilibiliDownloader，FFmpeg处理和数据读写分摊到多个CPU核上；
+    多台机器共用同一个队列后端时，每台机器各运行一个 WorkerPool 即可。
+    子进程以 spawn 方式启动，调用 run 的脚本需要放在 if __name__ == "__main__": 下。
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        processes: Optional[int] = None,
+        downloader_options: Optional[Dict[str, Any]] = None,
+        concurrency: int = 4,
+        lease_seconds: float = 60.0,
+        heartbeat_interval: Optional[float] = None,
+        poll_interval: float = 1.0,
+        exit_when_empty: bool = True,
+        restart_crashed: bool = True,
+    ):
+        """
+        Args:
+            queue: 任务队列，会被 pickle 传给每个子进程
+            processes: worker进程数，默认为CPU核数
+            downloader_options: 每个进程创建 BilibiliDownloader 的参数，需可 pickle
+            concurrency: 每个进程同时执行的任务数
+            lease_seconds: 租约时长（秒）
+            heartbeat_interval: 续约间隔（秒），默认为租约时长的1/3
+            poll_interval: 队列为空时的轮询间隔（秒），也是检查子进程状态的间隔
+            exit_when_empty: 队列中没有未结束的任务时退出
+            restart_crashed: 子进程被信号终止且仍有未结束的任务时启动新的进程代替
+        """
+        self.queue = queue
+        self.processes = processes or os.cpu_count() or 1
+        self.restart_crashed = restart_crashed
+        self.poll_interval = poll_interval
+        self._worker_options = dict(
+            downloader_options=downloader_options,
+            concurrency=concurrency,
+            lease_seconds=lease_seconds,
+            heartbeat_interval=heartbeat_interval,
+            poll_interval=poll_interval,
+            exit_when_empty=exit_when_empty,
+        )
+        # 异常退出的子进程数
+        self.crashed = 0
+
+    def run(self) -> QueueStats:
+        """
+        启动worker进程并等待全部退出
+
+        Returns:
+            QueueStats: 结束时队列的汇总统计
+        """
+        import multiprocessing
+
+        # fork 会复制父进程中的线程和事件循环状态，统一使用 spawn
+        context = multiprocessing.get_context("spawn")
+
+        def start():
+            process = context.Process(
+                target=_run_process,
+                args=(self.queue, self._worker_options),
+                daemon=True,
+            )
+            process.start()
+            return process
+
+        running = [start() for _ in range(self.processes)]
+        try:
+            while running:
+                time.sleep(self.poll_interval)
+                for process in [p for p in running if not p.is_alive()]:
+                    running.remove(process)
+                    if process.exitcode == 0:
+                        continue
+                    # 该进程的任务在租约到期后由其他进程重新领取
+                    self.crashed += 1
+                    # 被信号终止（如OOM、段错误）才重启；Python异常多为参数错误，重启也会再次失败
+                    if (
+                        self.restart_crashed
+                        and process.exitcode < 0
+                        and self.queue.stats().unfinished
+                    ):
+                        running.append(start())
+        finally:
+            for process in running:
+                process.join(self.poll_interval)
+                if process.is_alive():
+                    process.terminate()
+        return self.queue.stats()
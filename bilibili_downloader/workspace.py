@@ -0,0 +1,152 @@
+"""
+下载任务的临时工作目录
+"""
+
+import errno
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 临时目录在下载目录中的名称
+TEMP_DIR_NAME = ".bilibili_tmp"
+# 固定名称的目录中的锁文件，持有者进程退出时操作系统自动释放
+LOCK_NAME = ".lock"
+
+
+def _try_lock(path: str) -> Optional[int]:
+    """以非阻塞方式对文件加排他锁，成功时返回文件描述符，已被其他进程或对象锁住时返回None"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock(fd: int):
+    if fcntl is None:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+    os.close(fd)
+
+
+def _lock_directory(path: str) -> Optional[int]:
+    """
+    创建目录并锁定其中的锁文件
+
+    Returns:
+        Optional[int]: 锁文件的描述符；目录正被其他下载器（包括其他进程）使用时返回None
+    """
+    lock_path = os.path.join(path, LOCK_NAME)
+    while True:
+        os.makedirs(path, exist_ok=True)
+        try:
+            fd = _try_lock(lock_path)
+        except FileNotFoundError:
+            # 目录刚被上一个持有者删除
+            continue
+        if fd is None:
+            return None
+        try:
+            if os.path.samestat(os.fstat(fd), os.stat(lock_path)):
+                return fd
+        except FileNotFoundError:
+            pass
+        # 加锁前上一个持有者已删除目录，锁住的是旧文件，重新创建
+        _unlock(fd)
+
+
+class Workspace:
+    """
+    存放临时文件的独立目录
+
+    每个下载任务、每路共享的媒体流各用一个目录，同一视频的并发任务不会互相覆盖文件；
+    cleanup 删除整个目录。固定名称的目录用锁文件保证同一时间只有一个下载器（跨进程）使用，
+    已被占用时改用唯一的新目录。
+    """
+
+    def __init__(
+        self, root: str, name: Optional[str] = None, prefix: Optional[str] = None
+    ):
+        """
+        Args:
+            root: 所有工作目录的上级目录，不存在时自动创建
+            name: 固定的目录名，同名目录在下次运行时可以继续使用（断点续传）；
+                为None时创建一个唯一的新目录
+            prefix: 唯一目录名的前缀，便于排查
+        """
+        os.makedirs(root, exist_ok=True)
+        self._lock: Optional[int] = None
+        # 是否为固定名称、可以在下次运行时继续使用的目录
+        self.resumable = False
+        if name is not None:
+            path = os.path.join(root, name)
+            self._lock = _lock_directory(path)
+            if self._lock is not None:
+                self.path = path
+                self.resumable = True
+                return
+            # 同名目录正被其他下载器实例或进程使用，不能共用
+            prefix = f"{name}_{os.getpid()}_"
+        self.path = tempfile.mkdtemp(prefix=prefix, dir=root)
+
+    def file(self, name: str) -> str:
+        """工作目录中的文件路径"""
+        return os.path.join(self.path, name)
+
+    def release(self):
+        """保留目录中的文件，释放固定名称目录的锁，供之后的下载继续使用"""
+        if self._lock is not None:
+            _unlock(self._lock)
+            self._lock = None
+
+    def cleanup(self):
+        """删除工作目录及其中所有文件"""
+        # 先删除再释放锁，等待锁的下载器不会拿到即将被删除的目录
+        shutil.rmtree(self.path, ignore_errors=True)
+        if self._lock is not None:
+            self.release()
+            if fcntl is None:
+                # Windows 上打开的锁文件无法删除，释放后再删除；目录已被其他下载器重新使用时不会成功
+                try:
+                    os.remove(os.path.join(self.path, LOCK_NAME))
+                    os.rmdir(self.path)
+                except OSError:
+                    pass
+
+
+@dataclass
+class SharedFile:
+    """多个任务共用的已下载文件，最后一个任务用完后删除其工作目录"""
+
+    path: str
+    size: int
+    workspace: Workspace
+
+
+def move_into_place(source: str, destination: str):
+    """
+    把工作目录中生成的文件移动到最终位置
+
+    同一文件系统内为原子替换，读取方不会看到写了一半的文件；跨文件系统时退化为复制后删除。
+    """
+    try:
+        os.replace(source, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(source, destination)
@@ -0,0 +1,216 @@
+"""
+下载数据的读取分块与后台写盘
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .segmented import pwrite
+
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _write_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """写盘专用的线程池，与事件循环无关，在所有下载器间共享"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(32, (os.cpu_count() or 1) + 4),
+                thread_name_prefix="bilibili_downloader_writer",
+            )
+        return _executor
+
+
+class ChunkSizer:
+    """
+    根据实测吞吐调整单次读取的大小
+
+    每次读取的数据量大致等于 target_interval 秒内收到的数据，高速连接上用大块减少循环次数，
+    低速或限速的连接上用小块，使限速和进度更平滑。
+    """
+
+    # 吞吐的指数平滑系数
+    SMOOTHING = 0.3
+
+    def __init__(self, min_size: int, max_size: int, target_interval: float = 0.02):
+        """
+        Args:
+            min_size: 单次读取的最小字节数
+            max_size: 单次读取的最大字节数，等于 min_size 时固定不变
+            target_interval: 期望每次读取覆盖的时间（秒）
+        """
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size)
+        self.target_interval = target_interval
+        self.size = min_size
+        self._rate = 0.0
+        self._last = time.monotonic()
+
+    def record(self, nbytes: int):
+        """记录一次读取得到的字节数并更新下次读取的大小"""
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        if self.min_size == self.max_size or elapsed <= 0:
+            return
+        current = nbytes / elapsed
+        self._rate = (
+            current
+            if not self._rate
+            else self.SMOOTHING * current + (1 - self.SMOOTHING) * self._rate
+        )
+
+        target = int(self._rate * self.target_interval)
+        # 取2的幂，避免大小频繁抖动
+        size = self.min_size
+        while size < target and size < self.max_size:
+            size *= 2
+        self.size = min(size, self.max_size)
+
+
+class WriteBehind:
+    """
+    单个文件的后台写入队列
+
+    数据先在可复用的 bytearray 中凑成整块，再交给线程池按偏移写入，事件循环不会被磁盘阻塞；
+    每个文件最多有 max_pending 块在写，写盘慢时只有该文件的读取会等待。
+    同一文件的多个分段各自通过 block() 获得缓冲区，共享写入队列和缓冲池。
+    """
+
+    def __init__(
+        self,
+        fd: int,
+        block_size: int,
+        max_pending: int,
+        on_written: Optional[Callable[[int, int], None]] = None,
+    ):
+        """
+        Args:
+            fd: 以写方式打开的文件描述符
+            block_size: 每次写盘的数据块大小
+            max_pending: 同时在写的最大块数
+            on_written: 数据块写入磁盘后在事件循环中调用，参数为 (起始偏移, 长度)
+        """
+        self.fd = fd
+        self.block_size = block_size
+        self.on_written = on_written
+        self._slots = asyncio.Semaphore(max_pending)
+        # 在写的数据块：事件循环中的future -> 线程池中的future
+        self._pending: Dict[asyncio.Future, concurrent.futures.Future] = {}
+        self._free: List[bytearray] = []
+        self._error: Optional[BaseException] = None
+
+    def block(self, offset: int) -> "BlockBuffer":
+        """从 offset 开始顺序写入的缓冲区"""
+        return BlockBuffer(self, offset)
+
+    def _take_buffer(self) -> bytearray:
+        return self._free.pop() if self._free else bytearray(self.block_size)
+
+    async def submit(self, data, length: int, offset: int):
+        """
+        提交一块数据写入，队列已满时等待
+
+        Args:
+            data: bytes，或 _take_buffer 取得的 bytearray（写完后放回缓冲池）
+            length: 有效数据长度
+            offset: 文件中的偏移
+
+        Raises:
+            OSError: 之前提交的数据写入失败
+        """
+        await self._slots.acquire()
+        if self._error is not None:
+            self._slots.release()
+            raise self._error
+
+        job = _write_executor().submit(
+            pwrite, self.fd, memoryview(data)[:length], offset
+        )
+        future = asyncio.wrap_future(job)
+        self._pending[future] = job
+
+        def done(f: asyncio.Future):
+            self._pending.pop(f, None)
+            self._slots.release()
+            if f.cancelled():
+                return
+            error = f.exception()
+            if error is not None:
+                self._error = self._error or error
+                return
+            if isinstance(data, bytearray):
+                self._free.append(data)
+            if self.on_written is not None:
+                self.on_written(offset, length)
+
+        future.add_done_callback(done)
+
+    async def flush(self):
+        """
+        等待已提交的数据全部写入磁盘
+
+        Raises:
+            OSError: 写入失败
+        """
+        await self.close()
+        if self._error is not None:
+            raise self._error
+
+    async def close(self):
+        """等待所有在写的数据块完成，不抛出写入错误；关闭文件描述符前必须调用"""
+        if not self._pending:
+            return
+        jobs = list(self._pending.values())
+        try:
+            await asyncio.wait(list(self._pending))
+        except asyncio.CancelledError:
+            # 线程中的写入无法取消，必须等它们结束后才能关闭文件
+            concurrent.futures.wait(jobs)
+            raise
+
+
+class BlockBuffer:
+    """从固定偏移开始顺序写入的缓冲区，攒满一块后提交给 WriteBehind"""
+
+    def __init__(self, writer: WriteBehind, offset: int):
+        self.writer = writer
+        # 下一块数据在文件中的偏移
+        self.offset = offset
+        self._buffer: Optional[bytearray] = None
+        self._length = 0
+
+    async def write(self, data: bytes):
+        """追加数据，攒满一块时提交写入"""
+        size = self.writer.block_size
+        if not self._length and len(data) >= size:
+            # 本身就足够大的数据直接写入，不再复制
+            await self.writer.submit(data, len(data), self.offset)
+            self.offset += len(data)
+            return
+
+        view = memoryview(data)
+        while view:
+            if self._buffer is None:
+                self._buffer = self.writer._take_buffer()
+            n = min(len(view), size - self._length)
+            self._buffer[self._length : self._length + n] = view[:n]
+            self._length += n
+            view = view[n:]
+            if self._length == size:
+                await self.flush()
+
+    async def flush(self):
+        """提交缓冲区中剩余的数据"""
+        if self._length:
+            buffer, length = self._buffer, self._length
+            self._buffer = None
+            self._length = 0
+            await self.writer.submit(buffer, length, self.offset)
+            self.offset += length
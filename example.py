@@ -1,20 +1,25 @@
 """
 Bilibili Downloader SDK 使用示例
 """
+
 import asyncio
-from bilibili_downloader import BilibiliDownloader, VideoNotFoundError, DurationExceededError
+from bilibili_downloader import (
+    BilibiliDownloader,
+    VideoNotFoundError,
+    DurationExceededError,
+)
 
 
 def example_basic():
     """基础使用示例"""
     print("=== 基础使用示例 ===")
-    
+
     # 创建下载器
     downloader = BilibiliDownloader()
-    
+
     # 测试URL
     test_url = "https://www.bilibili.com/video/BV1xx411c7mD"
-    
+
     # 获取视频信息
     try:
         video_info = downloader.get_video_info(test_url)
@@ -24,7 +29,7 @@ def example_basic():
     except VideoNotFoundError:
         print("视频未找到")
         return
-    
+
     # 下载音频
     print("\n开始下载音频...")
     result = downloader.download_audio(test_url, audio_format="mp3")
@@ -37,20 +42,19 @@ def example_basic():
 def example_advanced():
     """高级使用示例"""
     print("\n=== 高级使用示例 ===")
-    
+
     # 使用自定义配置创建下载器
     downloader = BilibiliDownloader(
-        download_dir="./my_downloads",
-        max_duration=1800  # 30分钟限制
+        download_dir="./my_downloads", max_duration=1800  # 30分钟限制
     )
-    
+
     # 检查多个视频
     urls = [
         "https://www.bilibili.com/video/BV1xx411c7mD",
         "https://b23.tv/abcdefg",  # 短链接示例
-        "https://www.bilibili.com/video/BV1xx411c7mD?p=2"  # 分P视频
+        "https://www.bilibili.com/video/BV1xx411c7mD?p=2",  # 分P视频
     ]
-    
+
     for url in urls:
         print(f"\n检查视频: {url}")
         ok, msg, duration = downloader.check_duration(url)
@@ -63,15 +67,15 @@ def example_advanced():
 async def example_async():
     """异步下载示例"""
     print("\n=== 异步下载示例 ===")
-    
+
     downloader = BilibiliDownloader()
-    
+
     # 多个视频URL
     urls = [
         "https://www.bilibili.com/video/BV1xx411c7mD",
         "https://www.bilibili.com/video/BV1yy4y1k7VD",
     ]
-    
+
     # 创建异步任务
     tasks = []
     for i, url in enumerate(urls):
@@ -79,11 +83,11 @@ async def example_async():
         output_path = f"./downloads/video_{i+1}.mp3"
         task = downloader.download_audio_async(url, output_path)
         tasks.append(task)
-    
+
     # 并发执行下载
     print("开始并发下载...")
     results = await asyncio.gather(*tasks, return_exceptions=True)
-    
+
     # 处理结果
     for i, result in enumerate(results):
         if isinstance(result, Exception):
@@ -94,19 +98,52 @@ async def example_async():
             print(f"视频{i+1} 下载失败: {result.message}")
 
 
+async def example_batch():
+    """批量下载示例"""
+    print("\n=== 批量下载示例 ===")
+
+    urls = [
+        "https://www.bilibili.com/video/BV1xx411c7mD",
+        "https://www.bilibili.com/video/BV1yy4y1k7VD",
+    ]
+
+    async with BilibiliDownloader() as downloader:
+        batch = downloader.download_many(
+            urls,
+            kind="audio",
+            max_concurrency=4,  # 同时进行的任务数
+            max_ffmpeg=2,  # 同时运行的FFmpeg进程数
+            max_bandwidth=10 * 1024 * 1024,  # 总带宽上限 10MiB/s
+        )
+
+        # 按完成顺序返回结果
+        async for result in batch:
+            if result.success:
+                print(
+                    f"下载成功: {result.file_path} ({result.throughput / 1024:.0f} KiB/s)"
+                )
+            else:
+                print(f"下载失败: {result.url} - {result.message}")
+
+        stats = batch.stats
+        print(
+            f"完成 {stats.completed} 个，成功 {stats.succeeded} 个，平均 {stats.throughput / 1024:.0f} KiB/s"
+        )
+
+
 def example_error_handling():
     """错误处理示例"""
     print("\n=== 错误处理示例 ===")
-    
+
     # 设置严格的时长限制
     downloader = BilibiliDownloader(max_duration=60)  # 1分钟
-    
+
     test_cases = [
         "https://www.bilibili.com/video/invalid_url",  # 无效URL
         "https://www.bilibili.com/video/BV1234567890",  # 不存在的视频
         "https://www.bilibili.com/video/BV1xx411c7mD",  # 可能超时长的视频
     ]
-    
+
     for url in test_cases:
         print(f"\n测试URL: {url}")
         try:
@@ -126,14 +163,14 @@ def example_error_handling():
 def example_video_download():
     """视频下载示例"""
     print("\n=== 视频下载示例 ===")
-    
+
     downloader = BilibiliDownloader()
-    
+
     test_url = "https://www.bilibili.com/video/BV1xx411c7mD"
-    
+
     print("开始下载视频（包含画面）...")
     result = downloader.download_video(test_url, video_format="mp4")
-    
+
     if result.success:
         print(f"视频下载成功: {result.file_path}")
         print(f"视频信息:")
@@ -153,4 +190,5 @@ if __name__ == "__main__":
     #
     # # 运行异步示例
     # print("\n" + "="*50)
-    # asyncio.run(example_async())
\ No newline at end of file
+    # asyncio.run(example_async())
+    # asyncio.run(example_batch())
@@ -1,6 +1,7 @@
 """
 Bilibili Downloader SDK setup.py
 """
+
 from setuptools import setup, find_packages
 import os
 
@@ -9,11 +10,13 @@ here = os.path.abspath(os.path.dirname(__file__))
 with open(os.path.join(here, "README.md"), "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
+
 # 读取requirements.txt
 def read_requirements():
     with open(os.path.join(here, "requirements.txt"), "r", encoding="utf-8") as f:
         return [line.strip() for line in f if line.strip() and not line.startswith("#")]
 
+
 setup(
     name="bilibili-downloader",
     version="v0.0.3",
@@ -38,6 +41,11 @@ setup(
     keywords="bilibili video download audio api",
     python_requires=">=3.9",
     install_requires=read_requirements(),
+    entry_points={
+        "console_scripts": [
+            "bilibili-dl=bilibili_downloader.cli:main",
+        ]
+    },
     extras_require={
         "dev": [
             "pytest>=7.0.0",
@@ -56,4 +64,4 @@ setup(
     },
     include_package_data=True,
     zip_safe=False,
-)
\ No newline at end of file
+)
@@ -0,0 +1,38 @@
+"""
+测试公共夹具：复用 benchmarks 中的桩服务器和FFmpeg桩程序
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from stub_server import StubServer  # noqa: E402
+from suite import make_ffmpeg_stub  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def ffmpeg_stub(tmp_path_factory):
+    """调用 fake_ffmpeg.py 的可执行FFmpeg"""
+    return make_ffmpeg_stub(str(tmp_path_factory.mktemp("ffmpeg")))
+
+
+@pytest.fixture
+def stub_server():
+    """启动桩服务器的工厂，测试结束后统一关闭"""
+    servers = []
+
+    def start(server_class=StubServer, **kwargs):
+        kwargs.setdefault("latency", 0.01)
+        server = server_class(**kwargs)
+        server.__enter__()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
@@ -0,0 +1,113 @@
+"""
+视频信息缓存测试
+"""
+
+import pytest
+
+from bilibili_downloader import cache as cache_module
+from bilibili_downloader.cache import MemoryCache, SQLiteCache, VideoInfoCache
+from bilibili_downloader.models import VideoInfo
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryCache()
+    else:
+        backend = SQLiteCache(str(tmp_path / "cache.db"))
+        yield backend
+        backend.close()
+
+
+def make_info(**kwargs):
+    kwargs.setdefault("audio_url", "https://cdn/audio.m4s")
+    return VideoInfo(bvid="BV1cache01", title="标题", duration=60, cid=1, **kwargs)
+
+
+def test_lru_eviction():
+    backend = MemoryCache(max_entries=2)
+    backend.set("a", {"v": 1}, 60)
+    backend.set("b", {"v": 2}, 60)
+    # 读取后 a 成为最近使用的，写入 c 时淘汰 b
+    assert backend.get("a") == {"v": 1}
+    backend.set("c", {"v": 3}, 60)
+    assert backend.get("b") is None
+    assert backend.get("a") == {"v": 1}
+    assert backend.get("c") == {"v": 3}
+
+
+def test_backend_expiry(backend, clock):
+    backend.set("a", {"v": 1}, 10)
+    clock.now += 9
+    assert backend.get("a") == {"v": 1}
+    clock.now += 1
+    assert backend.get("a") is None
+    backend.set("b", {"v": 2}, 10)
+    backend.delete("b")
+    assert backend.get("b") is None
+
+
+def test_metadata_and_url_ttl(backend, clock):
+    cache = VideoInfoCache(backend, metadata_ttl=100, url_ttl=10)
+    info = make_info(audio_backup_urls=["https://backup/audio.m4s"])
+    cache.set(info, "q")
+    assert cache.get("BV1cache01", 1, "q") == info
+    # 其他画质的流地址未缓存
+    assert cache.get("BV1cache01", 1, "other").audio_url is None
+
+    # 流地址过期后仍返回元数据
+    clock.now += 10
+    partial = cache.get("BV1cache01", 1, "q")
+    assert (partial.title, partial.cid, partial.audio_url) == ("标题", 1, None)
+    assert partial.audio_backup_urls == []
+
+    clock.now += 90
+    assert cache.get("BV1cache01", 1, "q") is None
+    assert (cache.stats.hits, cache.stats.url_misses, cache.stats.misses) == (1, 2, 1)
+
+
+def test_invalidate_streams(clock):
+    cache = VideoInfoCache()
+    cache.set(make_info(), "q")
+    cache.invalidate_streams("BV1cache01", 1, "q")
+    info = cache.get("BV1cache01", 1, "q")
+    assert info.title == "标题" and info.audio_url is None
+
+
+def test_metadata_only_info_does_not_cache_urls():
+    cache = VideoInfoCache()
+    cache.set(make_info(audio_url=None), "q")
+    assert cache.get("BV1cache01", 1, "q").audio_url is None
+    assert cache.stats.url_misses == 1
+
+
+def test_sqlite_cache_persists(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    first = VideoInfoCache(SQLiteCache(path))
+    first.set(make_info(), "q")
+    first.backend.close()
+
+    backend = SQLiteCache(path)
+    second = VideoInfoCache(backend)
+    assert second.get("BV1cache01", 1, "q") == make_info()
+
+    # 过期条目在 prune 时删除
+    clock.now += second.metadata_ttl
+    backend.prune()
+    assert backend._conn.execute("SELECT COUNT(*) FROM video_cache").fetchone()[0] == 0
+    backend.close()
@@ -0,0 +1,116 @@
+"""
+命令行 bilibili-dl 测试
+"""
+
+import asyncio
+import json
+import queue
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from bilibili_downloader.cli import _read_in_thread, build_parser, main, read_urls
+from conftest import ROOT
+
+
+def test_read_urls():
+    lines = [
+        "BV1xx411c7mD\n",
+        "\n",
+        "# 注释\n",
+        "  https://www.bilibili.com/video/BV1yy411c7mD?p=2  \n",
+        '{"url": "BV1zz411c7mD", "title": "x"}\n',
+        "{not json\n",
+    ]
+    assert list(read_urls(lines)) == [
+        "BV1xx411c7mD",
+        "https://www.bilibili.com/video/BV1yy411c7mD?p=2",
+        "BV1zz411c7mD",
+        # 无法解析的行原样返回，由下载器报告失败
+        "{not json",
+    ]
+
+
+def test_parser_defaults_and_options():
+    args = build_parser().parse_args([])
+    assert (args.kind, args.concurrency, args.input, args.stream_urls) == (
+        "audio",
+        4,
+        [],
+        False,
+    )
+    args = build_parser().parse_args(
+        ["-k", "video", "-q", "720", "-i", "a.txt", "-i", "-", "--stream-urls", "u1"]
+    )
+    assert args.kind == "video" and args.quality == 720
+    assert args.input == ["a.txt", "-"]
+    assert args.urls == ["u1"] and args.stream_urls
+
+
+def test_missing_input_file_is_usage_error(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(["-i", str(tmp_path / "missing.txt")])
+    assert exc.value.code == 2
+    assert "输入文件不存在" in capsys.readouterr().err
+
+
+def test_read_in_thread_keeps_order_and_errors():
+    def items():
+        yield from ["a", "b", "c"]
+        raise UnicodeDecodeError("utf-8", b"", 0, 1, "bad")
+
+    async def run():
+        received = []
+        with pytest.raises(UnicodeDecodeError):
+            async for item in _read_in_thread(items(), maxsize=1):
+                received.append(item)
+        return received
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+
+
+def start_cli(*args):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "bilibili_downloader", *args],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        cwd=ROOT,
+        text=True,
+        encoding="utf-8",
+    )
+    # Windows 上不能对管道使用 select，用线程读取输出以便设置超时
+    lines: queue.Queue = queue.Queue()
+    threading.Thread(
+        target=lambda: [lines.put(line) for line in process.stdout], daemon=True
+    ).start()
+    return process, lines
+
+
+def test_stdin_urls_start_before_input_ends(stub_server, tmp_path, ffmpeg_stub):
+    server = stub_server(stream_size=64 * 1024)
+    process, lines = start_cli(
+        "-o", str(tmp_path), "--ffmpeg", ffmpeg_stub, "--quiet", "-i", "-"
+    )
+    try:
+        # 标准输入保持打开：第一个URL的结果应在输入结束前输出，
+        # 读取输入阻塞事件循环或FFmpeg读取标准输入时会超时
+        process.stdin.write(server.video_url("BV1cli00001") + "\n")
+        process.stdin.flush()
+        first = json.loads(lines.get(timeout=20))
+        assert first["success"], first["message"]
+        assert first["url"] == server.video_url("BV1cli00001")
+        # 默认不输出带签名的CDN地址
+        assert first["video_info"]["bvid"] == "BV1cli00001"
+        assert "audio_url" not in first["video_info"]
+
+        process.stdin.write(server.video_url("BV1cli00002") + "\n")
+        process.stdin.close()
+        second = json.loads(lines.get(timeout=20))
+        assert second["success"], second["message"]
+        assert process.wait(timeout=20) == 0
+    finally:
+        process.kill()
+        process.wait()
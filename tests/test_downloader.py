@@ -0,0 +1,199 @@
+"""
+下载器与桩服务器的集成测试
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from bilibili_downloader import BilibiliDownloader
+from bilibili_downloader.retry import RetryPolicy
+from bilibili_downloader.workspace import Workspace
+from stub_server import StubServer
+
+
+class InFlightServer(StubServer):
+    """记录同时进行的流请求数的桩服务器"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.stream_requests = 0
+
+    async def _stream(self, request):
+        # 不计入探测文件大小的 bytes=0-0 请求
+        if request.headers.get("Range") == "bytes=0-0":
+            return await super()._stream(request)
+        self.stream_requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await super()._stream(request)
+        finally:
+            self.in_flight -= 1
+
+
+def make_downloader(server, tmp_path, ffmpeg, **kwargs):
+    kwargs.setdefault("download_segments", 1)
+    downloader = BilibiliDownloader(
+        download_dir=str(tmp_path), ffmpeg_path=ffmpeg, **kwargs
+    )
+    downloader.API_BASE = server.base_url
+    return downloader
+
+
+def test_max_transfers_limits_stream_downloads(stub_server, tmp_path, ffmpeg_stub):
+    # 不限速：服务端在发出最后一块数据后不再等待，计数与客户端看到的一致
+    server = stub_server(InFlightServer, latency=0.05, stream_size=256 * 1024)
+    urls = [server.video_url(f"BV1lim{i:04d}") for i in range(12)]
+
+    async def run():
+        async with make_downloader(server, tmp_path, ffmpeg_stub) as downloader:
+            batch = downloader.download_many(
+                urls, kind="video", max_concurrency=12, max_transfers=2
+            )
+            return [result async for result in batch]
+
+    results = asyncio.run(run())
+    assert all(r.success for r in results), [r.message for r in results]
+    assert server.stream_requests == 24
+    assert server.max_in_flight <= 2
+
+
+def test_duplicate_jobs_share_one_download(stub_server, tmp_path, ffmpeg_stub):
+    server = stub_server(InFlightServer, stream_size=512 * 1024)
+    url = server.video_url("BV1dup0001")
+
+    async def run():
+        async with make_downloader(server, tmp_path, ffmpeg_stub) as downloader:
+            results = await asyncio.gather(
+                *[downloader.download_audio_async(url) for _ in range(3)],
+                downloader.download_video_async(url),
+            )
+            return results, len(downloader._transfers)
+
+    results, flights = asyncio.run(run())
+    assert all(r.success for r in results), [r.message for r in results]
+    # 音频流和视频流各下载一次
+    assert server.stream_requests == 2
+    assert sum(r.bytes_downloaded for r in results) == 2 * server.stream_size
+    assert flights == 0
+    assert os.listdir(tmp_path / ".bilibili_tmp") == []
+
+
+def test_instances_sharing_download_dir(
+    stub_server, tmp_path, ffmpeg_stub, monkeypatch
+):
+    # FFmpeg处理较慢：后开始的实例转换时，先开始的实例已经结束并清理临时文件
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "0.5")
+    server = stub_server(InFlightServer, stream_size=512 * 1024)
+    url = server.video_url("BV1shared01")
+
+    async def run(downloader, delay):
+        async with downloader:
+            await asyncio.sleep(delay)
+            return await downloader.download_audio_async(url)
+
+    def run_in_thread(delay):
+        downloader = make_downloader(server, tmp_path, ffmpeg_stub)
+        return asyncio.run(run(downloader, delay))
+
+    # 两个实例在各自的线程和事件循环中同时下载同一路流，互不删除对方的临时文件
+    with ThreadPoolExecutor(2) as pool:
+        results = list(pool.map(run_in_thread, [0, 0.2]))
+    assert all(r.success for r in results), [r.message for r in results]
+    assert {os.path.getsize(r.file_path) for r in results} == {server.stream_size}
+    assert os.listdir(tmp_path / ".bilibili_tmp") == []
+
+
+class ChangingServer(StubServer):
+    """第二个分段请求到达时替换文件内容，模拟下载过程中CDN上的文件被更新"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.data_requests = 0
+        self.new_blob = bytes(reversed(self.blob))
+
+    async def _stream(self, request):
+        if request.headers.get("Range") != "bytes=0-0":
+            self.data_requests += 1
+            if self.data_requests == 2:
+                self.replace_blob(self.new_blob, '"stub-2"')
+        return await super()._stream(request)
+
+
+def test_remote_change_restarts_ranged_download(stub_server, tmp_path, ffmpeg_stub):
+    server = stub_server(ChangingServer, stream_size=1024 * 1024)
+    url = server.video_url("BV1change01")
+
+    async def run():
+        downloader = make_downloader(
+            server,
+            tmp_path,
+            ffmpeg_stub,
+            download_segments=4,
+            min_segment_size=256 * 1024,
+        )
+        async with downloader:
+            return await downloader.download_audio_async(url, transcode=False)
+
+    result = asyncio.run(run())
+    assert result.success, result.message
+    # 不能是新旧两个版本拼接的文件
+    with open(result.file_path, "rb") as f:
+        assert f.read() == server.new_blob
+    assert result.retries >= 1
+
+
+def test_concat_elapsed_includes_concat(
+    stub_server, tmp_path, ffmpeg_stub, monkeypatch
+):
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "0.3")
+    server = stub_server(pages=2, stream_size=64 * 1024)
+    url = server.video_url("BV1concat01")
+
+    async def run():
+        async with make_downloader(server, tmp_path, ffmpeg_stub) as downloader:
+            return await downloader.download_parts_async(
+                url, kind="audio", concat_output=str(tmp_path / "all.mp3")
+            )
+
+    *parts, merged = asyncio.run(run())
+    assert merged.success, merged.message
+    assert merged.url == url
+    # 合并本身的FFmpeg运行也计入总耗时
+    assert merged.elapsed >= max(r.elapsed for r in parts) + 0.3
+
+
+def test_concat_failure_keeps_url(stub_server, tmp_path, ffmpeg_stub):
+    server = stub_server(pages=2, stream_size=64 * 1024, server_errors=100)
+    url = server.video_url("BV1concat02")
+
+    async def run():
+        downloader = make_downloader(
+            server, tmp_path, ffmpeg_stub, retry_policy=RetryPolicy(max_attempts=1)
+        )
+        async with downloader:
+            return await downloader.download_parts_async(
+                url, kind="audio", concat_output=str(tmp_path / "all.mp3")
+            )
+
+    *parts, merged = asyncio.run(run())
+    assert not any(r.success for r in parts)
+    assert not merged.success
+    assert merged.url == url
+
+
+def test_workspace_lock(tmp_path):
+    first = Workspace(str(tmp_path), name="BV1_p1_audio")
+    second = Workspace(str(tmp_path), name="BV1_p1_audio")
+    assert first.resumable and not second.resumable
+    assert first.path != second.path
+    second.cleanup()
+    first.release()
+    # 释放后同名目录可以再次使用（断点续传）
+    third = Workspace(str(tmp_path), name="BV1_p1_audio")
+    assert third.resumable and third.path == first.path
+    third.cleanup()
+    assert os.listdir(tmp_path) == []
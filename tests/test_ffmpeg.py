@@ -0,0 +1,40 @@
+"""
+FFmpeg执行器测试
+"""
+
+import subprocess
+import sys
+
+from conftest import ROOT
+
+# 在子进程中运行，标准输入是一个一直不关闭的管道
+RUN_SCRIPT = """
+import asyncio, sys
+from bilibili_downloader.ffmpeg import FFmpegRunner
+ffmpeg, source, target = sys.argv[1:]
+asyncio.run(FFmpegRunner(timeout=5).run(ffmpeg, {source: None}, {target: None}))
+print("done", flush=True)
+"""
+
+
+def test_run_does_not_read_inherited_stdin(tmp_path, ffmpeg_stub):
+    source = tmp_path / "in.m4s"
+    source.write_bytes(b"x" * 1024)
+    target = tmp_path / "out.mp3"
+    process = subprocess.Popen(
+        [sys.executable, "-c", RUN_SCRIPT, ffmpeg_stub, str(source), str(target)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=ROOT,
+    )
+    try:
+        # communicate 会关闭标准输入，这里只等待进程退出；读取标准输入的FFmpeg会一直等到超时
+        returncode = process.wait(timeout=10)
+        assert returncode == 0, process.stderr.read().decode(errors="replace")
+        assert process.stdout.read().strip() == b"done"
+        assert target.read_bytes() == source.read_bytes()
+    finally:
+        process.stdin.close()
+        process.kill()
+        process.wait()
@@ -0,0 +1,89 @@
+"""
+OutputIndex 测试
+"""
+
+import os
+
+from bilibili_downloader import OutputIndex
+
+
+def make_index(tmp_path):
+    return OutputIndex(str(tmp_path / "index.db"))
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_record_and_lookup(tmp_path):
+    index = make_index(tmp_path)
+    key = OutputIndex.make_key("BV1idx", 1, "audio", "default", "mp3", "-q:a 0")
+    path = write(tmp_path / "a.mp3", b"audio")
+    entry = index.record(key, "BV1idx", 1, "audio", path, title="标题", duration=3)
+    assert entry.size == 5
+    assert index.lookup(key) == entry
+    assert [e.key for e in index.entries("BV1idx")] == [key]
+    assert index.entries("BV1other") == []
+    index.close()
+
+
+def test_lookup_drops_changed_or_missing_files(tmp_path):
+    index = make_index(tmp_path)
+    changed = write(tmp_path / "changed.mp3", b"12345")
+    missing = write(tmp_path / "missing.mp3", b"12345")
+    index.record("changed", "BV1idx", 1, "audio", changed)
+    index.record("missing", "BV1idx", 2, "audio", missing)
+
+    # 大小相同但内容不同：修改时间变化后比较校验和
+    write(changed, b"54321")
+    os.utime(changed, (1, 1))
+    os.remove(missing)
+    assert index.lookup("changed") is None
+    assert index.lookup("missing") is None
+    # 失效的记录已删除
+    assert index.entries() == []
+    index.close()
+
+
+def test_touched_file_with_same_content_stays_valid(tmp_path):
+    index = make_index(tmp_path)
+    path = write(tmp_path / "a.mp3", b"same")
+    index.record("key", "BV1idx", 1, "audio", path)
+    os.utime(path, (1, 1))
+    assert index.lookup("key") is not None
+    # 内容未变，记录中的修改时间已更新
+    assert index.get("key").mtime == os.stat(path).st_mtime
+    index.close()
+
+
+def test_prune_and_verify(tmp_path):
+    index = make_index(tmp_path)
+    kept = write(tmp_path / "kept.mp3", b"kept")
+    truncated = write(tmp_path / "truncated.mp3", b"truncated")
+    corrupted = write(tmp_path / "corrupted.mp3", b"corrupted")
+    for name, path in [
+        ("kept", kept),
+        ("truncated", truncated),
+        ("corrupted", corrupted),
+    ]:
+        index.record(name, "BV1idx", 1, "audio", path)
+
+    write(truncated, b"short")
+    write(corrupted, b"CORRUPTED")
+    # prune 只比较大小
+    assert [e.key for e in index.prune()] == ["truncated"]
+    assert [e.key for e in index.verify()] == ["corrupted"]
+    assert [e.key for e in index.entries()] == ["kept"]
+    index.close()
+
+
+def test_shared_between_instances(tmp_path):
+    first = make_index(tmp_path)
+    second = make_index(tmp_path)
+    path = write(tmp_path / "a.mp3", b"audio")
+    first.record("key", "BV1idx", 1, "audio", path)
+    assert second.lookup("key") is not None
+    first.close()
+    second.close()
@@ -0,0 +1,84 @@
+"""
+SQLiteJobQueue 测试
+"""
+
+import pickle
+import time
+
+import pytest
+
+from bilibili_downloader import DownloadResult, SQLiteJobQueue
+
+
+def make_queue(tmp_path, **kwargs):
+    return SQLiteJobQueue(str(tmp_path / "queue.db"), **kwargs)
+
+
+def test_put_and_claim_in_order(tmp_path):
+    queue = make_queue(tmp_path)
+    ids = queue.put_many(["u1", "u2"], "video", {"video_format": "mkv"})
+    first = queue.claim("w1", lease=60)
+    second = queue.claim("w2", lease=60)
+    assert [first.id, second.id] == ids
+    assert first.options == {"video_format": "mkv"}
+    assert first.status == "running" and first.worker == "w1" and first.attempts == 1
+    assert queue.claim("w3", lease=60) is None
+    assert queue.stats().running == 2
+    with pytest.raises(ValueError):
+        queue.put("u3", "image")
+    queue.close()
+
+
+def test_complete_requires_current_lease(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.put("u1")
+    queue.claim("w1", lease=60)
+    result = DownloadResult(success=True, message="ok", bytes_downloaded=10, elapsed=1)
+    assert not queue.complete(job_id, "w2", result)
+    assert queue.complete(job_id, "w1", result)
+    job = queue.get(job_id)
+    assert job.status == "succeeded"
+    assert job.result["bytes_downloaded"] == 10
+    stats = queue.stats()
+    assert (stats.succeeded, stats.bytes_downloaded, stats.unfinished) == (1, 10, 0)
+    queue.close()
+
+
+def test_expired_lease_is_requeued(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    job_id = queue.put("u1")
+    queue.claim("w1", lease=0.01)
+    time.sleep(0.05)
+    assert not queue.heartbeat(job_id, "w2", 60)
+    job = queue.claim("w2", lease=0.01)
+    assert job.id == job_id and job.attempts == 2
+    # 原worker的租约已被接管
+    assert not queue.heartbeat(job_id, "w1", 60)
+    time.sleep(0.05)
+    # 达到最大尝试次数后标记为失败
+    assert queue.claim("w3", lease=60) is None
+    assert queue.get(job_id).status == "failed"
+    assert queue.retry_failed() == 1
+    assert queue.get(job_id).attempts == 0
+    queue.close()
+
+
+def test_release_does_not_count_attempt(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.put("u1")
+    queue.claim("w1", lease=60)
+    queue.release(job_id, "w1")
+    job = queue.get(job_id)
+    assert job.status == "pending" and job.attempts == 0
+    queue.close()
+
+
+def test_pickle_reopens_same_file(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=5)
+    queue.put("u1")
+    copy = pickle.loads(pickle.dumps(queue))
+    assert copy.max_attempts == 5
+    assert copy.claim("w1", lease=60).url == "u1"
+    assert queue.stats().running == 1
+    copy.close()
+    queue.close()
@@ -0,0 +1,158 @@
+"""
+CDN镜像选择与切换测试
+"""
+
+import asyncio
+import socket
+
+import aiohttp
+import pytest
+
+from bilibili_downloader import mirrors as mirrors_module
+from bilibili_downloader.mirrors import MirrorSet, SpeedMonitor, rank_mirrors
+from bilibili_downloader.retry import RetryPolicy
+from stub_server import StubServer
+from test_downloader import make_downloader
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def unused_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/stream/x"
+
+
+def test_mirror_set_failover_order():
+    mirrors = MirrorSet(["a", "b", "a", None, "c"])
+    assert mirrors.urls == ["a", "b", "c"] and len(mirrors) == 3
+    mirrors.demote("a")
+    assert mirrors.current == "b"
+    mirrors.demote("b")
+    assert mirrors.urls == ["c", "a", "b"]
+    # 其他分段已经切换过的地址不再移动
+    mirrors.demote("unknown")
+    assert mirrors.urls == ["c", "a", "b"]
+    mirrors.replace(["x", "y"])
+    assert mirrors.urls == ["x", "y"]
+    mirrors.replace([None])
+    assert mirrors.urls == ["x", "y"]
+    with pytest.raises(ValueError):
+        MirrorSet([None, ""])
+
+
+def test_single_mirror_is_not_demoted():
+    mirrors = MirrorSet(["a"])
+    mirrors.demote("a")
+    assert mirrors.urls == ["a"]
+
+
+def test_speed_monitor(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(mirrors_module, "time", clock)
+    monitor = SpeedMonitor(min_speed=1000, window=2)
+    monitor.record(500)
+    clock.now += 1
+    # 统计窗口未结束时不判断
+    assert not monitor.too_slow()
+    clock.now += 1
+    assert monitor.too_slow()
+
+    # 新窗口重新计数，限速等待的时间不计入
+    monitor.record(2500)
+    clock.now += 4
+    monitor.pause(2)
+    assert not monitor.too_slow()
+
+    disabled = SpeedMonitor(min_speed=None, window=2)
+    clock.now += 10
+    assert not disabled.too_slow()
+
+
+def test_rank_mirrors_by_ttfb(stub_server):
+    server = stub_server(latency=0.3, mirrors=2, mirror_latency=0.01)
+    primary = f"{server.base_url}/stream/BV1rank0001/audio.m4s"
+    mirror = f"{server.base_url}/mirror/1/stream/BV1rank0001/audio.m4s"
+    dead = unused_url()
+
+    async def run(urls):
+        mirrors = MirrorSet(urls)
+        async with aiohttp.ClientSession() as session:
+            remote = await rank_mirrors(session, mirrors, {}, timeout=5)
+        return mirrors.urls, remote
+
+    urls, remote = asyncio.run(run([primary, dead, mirror]))
+    # 出错的镜像排在最后，仍可作为备用
+    assert urls == [mirror, primary, dead]
+    assert remote.size == server.stream_size and remote.accept_ranges
+
+    with pytest.raises(aiohttp.ClientError):
+        asyncio.run(run([dead, unused_url()]))
+
+
+class CountingServer(StubServer):
+    """分别统计主地址和镜像收到的数据请求"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = {"primary": 0, "mirror": 0}
+
+    async def _stream(self, request):
+        if request.headers.get("Range") != "bytes=0-0":
+            self.requests[
+                "mirror" if "mirror" in request.match_info else "primary"
+            ] += 1
+        return await super()._stream(request)
+
+
+def download(server, tmp_path, ffmpeg, bvid, **kwargs):
+    async def run():
+        downloader = make_downloader(
+            server, tmp_path, ffmpeg, probe_mirrors=False, **kwargs
+        )
+        downloader.MIRROR_SPEED_WINDOW = 0.2
+        async with downloader:
+            return await downloader.download_audio_async(
+                server.video_url(bvid), transcode=False
+            )
+
+    result = asyncio.run(run())
+    assert result.success, result.message
+    with open(result.file_path, "rb") as f:
+        assert f.read() == server.blob
+    return result
+
+
+def test_failover_to_mirror_on_error(stub_server, tmp_path, ffmpeg_stub):
+    server = stub_server(CountingServer, mirrors=1, server_errors=100)
+    download(
+        server,
+        tmp_path,
+        ffmpeg_stub,
+        "BV1fail0001",
+        retry_policy=RetryPolicy(max_attempts=1),
+        resume_downloads=False,
+    )
+    assert server.requests["mirror"] >= 1
+
+
+def test_switch_away_from_slow_mirror(stub_server, tmp_path, ffmpeg_stub):
+    # 主地址单连接只有64KiB/s，1MiB需要16秒；切换到镜像后很快完成
+    server = stub_server(
+        CountingServer,
+        mirrors=1,
+        stream_size=1024 * 1024,
+        per_connection_bandwidth=64 * 1024,
+    )
+    result = download(
+        server, tmp_path, ffmpeg_stub, "BV1slow0001", mirror_min_speed=256 * 1024
+    )
+    assert server.requests["primary"] >= 1 and server.requests["mirror"] >= 1
+    assert result.elapsed < 8
@@ -0,0 +1,40 @@
+"""
+包导入测试
+"""
+
+import subprocess
+import sys
+
+from conftest import ROOT
+
+CHECK_SCRIPT = """
+import sys
+import bilibili_downloader
+bilibili_downloader.BilibiliDownloader(download_dir=sys.argv[1], ffmpeg_path="ffmpeg")
+loaded = [
+    name
+    for name in ("sqlite3", "multiprocessing")
+    if name in sys.modules and type(sys.modules[name]).__name__ != "_LazyModule"
+]
+print(",".join(loaded))
+"""
+
+
+def test_import_does_not_load_sqlite_or_multiprocessing(tmp_path):
+    # 在新的解释器中检查，测试进程本身可能已经导入了这些模块
+    output = subprocess.run(
+        [sys.executable, "-c", CHECK_SCRIPT, str(tmp_path)],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert output.strip() == ""
+
+
+def test_lazy_exports():
+    import bilibili_downloader
+    from bilibili_downloader.jobqueue import SQLiteJobQueue
+
+    assert bilibili_downloader.SQLiteJobQueue is SQLiteJobQueue
+    assert set(bilibili_downloader.__all__) <= set(dir(bilibili_downloader))
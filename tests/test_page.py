@@ -0,0 +1,80 @@
+"""
+视频页面解析测试
+"""
+
+import json
+
+from bilibili_downloader.page import parse_watch_page
+from stub_server import build_playinfo, build_view, build_watch_page
+
+PLAYINFO = {"code": 0, "data": {"dash": {"video": [], "audio": []}}}
+
+
+def make_page(title_tags="", playinfo=PLAYINFO, state=None, tail=""):
+    scripts = ""
+    if playinfo is not None:
+        scripts += f"<script>window.__playinfo__={json.dumps(playinfo)}</script>"
+    if state is not None:
+        scripts += (
+            f"<script>window.__INITIAL_STATE__={json.dumps(state)};"
+            "(function(){var s;}());</script>"
+        )
+    return f"<html><head>{title_tags}</head><body>{scripts}{tail}</body></html>"
+
+
+def test_stub_page():
+    page = parse_watch_page(build_watch_page("BV1page0001"))
+    assert page.title == "测试视频 BV1page0001"
+    assert page.video_data == build_view("BV1page0001")["data"]
+    assert page.playinfo == build_playinfo("BV1page0001")
+    # str 和 bytes 结果相同
+    assert parse_watch_page(build_watch_page("BV1page0001").encode()) == page
+
+
+def test_title_fallback_order():
+    tags = (
+        '<meta property="og:title" content="meta标题">'
+        '<title data-vue-meta="true">title标题_哔哩哔哩_bilibili</title>'
+        '<h1 title="h1标题" class="video-title">h1标题</h1>'
+    )
+    # videoData 中的标题优先
+    state = {"videoData": {"title": "接口标题"}}
+    assert parse_watch_page(make_page(tags, state=state)).title == "接口标题"
+    assert parse_watch_page(make_page(tags, state={"videoData": {}})).title == "h1标题"
+    without_h1 = tags[: tags.index("<h1")]
+    assert (
+        parse_watch_page(make_page(without_h1)).title == "title标题_哔哩哔哩_bilibili"
+    )
+    only_meta = '<meta name="title" content="meta标题">'
+    assert parse_watch_page(make_page(only_meta)).title == "meta标题"
+    assert parse_watch_page(make_page()).title == ""
+
+
+def test_title_is_unescaped():
+    tags = '<h1 title="Tom &amp; Jerry &quot;1&quot; &#x6D4B;"></h1>'
+    assert parse_watch_page(make_page(tags)).title == 'Tom & Jerry "1" 测'
+
+
+def test_script_end_inside_json():
+    state = {"videoData": {"title": "标题", "desc": "a</script>b"}}
+    playinfo = {"code": 0, "data": {"note": "<\\/script>"}}
+    page = parse_watch_page(make_page(playinfo=playinfo, state=state))
+    assert page.video_data == state["videoData"]
+    assert page.playinfo == playinfo
+
+
+def test_missing_initial_state():
+    page = parse_watch_page(make_page('<h1 title="标题"></h1>'))
+    assert page.video_data is None
+    assert page.playinfo == PLAYINFO
+    assert page.title == "标题"
+
+
+def test_missing_playinfo():
+    state = {"videoData": {"title": "标题", "bvid": "BV1page0002"}}
+    page = parse_watch_page(make_page(playinfo=None, state=state))
+    assert page.playinfo is None
+    assert page.video_data == state["videoData"]
+    # 页面数据不完整或损坏时返回空结果而不是抛出异常
+    broken = "<script>window.__INITIAL_STATE__={broken</script>"
+    assert parse_watch_page(make_page(playinfo=None, tail=broken)).video_data is None
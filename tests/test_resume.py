@@ -0,0 +1,81 @@
+"""
+断点续传测试
+"""
+
+import asyncio
+
+from bilibili_downloader.resume import DownloadManifest, manifest_path, url_identity
+from bilibili_downloader.retry import RetryPolicy
+from test_downloader import make_downloader
+
+
+def test_add_range_merges_adjacent_and_overlapping(tmp_path):
+    manifest = DownloadManifest(str(tmp_path / "a.json"), "/a.m4s", 100)
+    manifest.add_range(10, 19)
+    manifest.add_range(20, 29)
+    manifest.add_range(50, 59)
+    manifest.add_range(55, 69)
+    manifest.add_range(5, 3)
+    assert manifest.completed == [(10, 29), (50, 69)]
+    assert manifest.missing_ranges() == [(0, 9), (30, 49), (70, 99)]
+    assert manifest.completed_bytes == 40
+
+    manifest.add_range(0, 9)
+    manifest.add_range(30, 49)
+    manifest.add_range(70, 99)
+    assert manifest.completed == [(0, 99)]
+    assert manifest.missing_ranges() == []
+    assert manifest.is_complete
+
+
+def test_save_load_and_matches(tmp_path):
+    path = manifest_path(str(tmp_path / "audio.m4s"))
+    manifest = DownloadManifest(path, "/a.m4s", 100, etag='"v1"')
+    manifest.add_range(0, 49)
+    manifest.save()
+
+    loaded = DownloadManifest.load(path)
+    assert loaded.completed == [(0, 49)]
+    assert loaded.missing_ranges() == [(50, 99)]
+    assert loaded.matches("/a.m4s", 100, '"v1"', None)
+    assert not loaded.matches("/a.m4s", 100, '"v2"', None)
+    assert not loaded.matches("/a.m4s", 200, '"v1"', None)
+    loaded.remove()
+    assert DownloadManifest.load(path) is None
+
+
+def test_url_identity_ignores_host_and_signature():
+    assert url_identity("https://a.cdn/x/1.m4s?deadline=1") == url_identity(
+        "https://b.cdn/x/1.m4s?deadline=2"
+    )
+
+
+def test_interrupted_download_resumes(stub_server, tmp_path, ffmpeg_stub):
+    # 一个分段传输到一半时断开，其余分段随之取消，已写盘的部分记录在清单中
+    size = 1024 * 1024
+    server = stub_server(stream_size=size, fail_after=192 * 1024, failures=1)
+    url = server.video_url("BV1resume01")
+
+    async def run():
+        downloader = make_downloader(
+            server,
+            tmp_path,
+            ffmpeg_stub,
+            download_segments=4,
+            min_segment_size=64 * 1024,
+            # 写盘块较小，断开前已收到的数据大部分已经写入
+            write_buffer_size=16 * 1024,
+            retry_policy=RetryPolicy(max_attempts=1),
+        )
+        async with downloader:
+            first = await downloader.download_audio_async(url, transcode=False)
+            second = await downloader.download_audio_async(url, transcode=False)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert not first.success
+    assert second.success, second.message
+    # 只下载缺失的部分
+    assert 0 < second.bytes_downloaded < size
+    with open(second.file_path, "rb") as f:
+        assert f.read() == server.blob
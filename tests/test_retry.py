@@ -0,0 +1,89 @@
+"""
+RetryPolicy 测试
+"""
+
+import asyncio
+
+import aiohttp
+import pytest
+
+from bilibili_downloader import RateLimitError, RetryPolicy
+from bilibili_downloader.retry import check_api_response, parse_retry_after
+
+
+def response_error(status, headers=None):
+    return aiohttp.ClientResponseError(
+        request_info=None, history=(), status=status, headers=headers
+    )
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=3.0)
+    for retry in range(1, 10):
+        assert 0 <= policy.backoff(retry) <= min(3.0, 2 ** (retry - 1))
+
+
+def test_delay_for_classifies_errors():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.1)
+    assert policy.delay_for(response_error(503), 1) is not None
+    assert policy.delay_for(aiohttp.ClientConnectionError(), 1) is not None
+    assert policy.delay_for(asyncio.TimeoutError(), 1) is not None
+    # 404 和非网络错误立即失败
+    assert policy.delay_for(response_error(404), 1) is None
+    assert policy.delay_for(ValueError(), 1) is None
+    # 达到最大尝试次数
+    assert policy.delay_for(response_error(503), 3) is None
+
+
+def test_retry_after_and_rate_limit():
+    policy = RetryPolicy(base_delay=0.1, rate_limit_delay=5.0, max_retry_after=60)
+    assert policy.delay_for(response_error(503, {"Retry-After": "7"}), 1) >= 7
+    assert policy.delay_for(response_error(429, {"Retry-After": "600"}), 1) is None
+    # 限流但没有 Retry-After 时至少等待 rate_limit_delay
+    assert policy.delay_for(response_error(412), 1) >= 5.0
+    assert policy.delay_for(RateLimitError("-412", retry_after=2.0), 1) >= 2.0
+    assert policy.is_rate_limit(response_error(429))
+    assert not policy.is_rate_limit(response_error(503))
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_check_api_response():
+    assert check_api_response({"code": 0}) == {"code": 0}
+    with pytest.raises(RateLimitError):
+        check_api_response({"code": -412, "message": "请求被拦截"})
+
+
+def test_run_retries_until_success():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+    attempts = []
+    retried = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise aiohttp.ClientConnectionError()
+        return "ok"
+
+    result = asyncio.run(policy.run(flaky, lambda e, delay: retried.append(delay)))
+    assert result == "ok"
+    assert len(attempts) == 3
+    assert len(retried) == 2
+
+
+def test_run_sync_raises_after_last_attempt():
+    policy = RetryPolicy(max_attempts=2, base_delay=0.001)
+    attempts = []
+
+    def failing():
+        attempts.append(1)
+        raise RateLimitError("-799", retry_after=0)
+
+    with pytest.raises(RateLimitError):
+        policy.run_sync(failing)
+    assert len(attempts) == 2
@@ -0,0 +1,57 @@
+"""
+分段切分测试
+"""
+
+import random
+
+from bilibili_downloader.segmented import split_missing_ranges, split_ranges
+
+
+def covered(ranges):
+    return {i for start, end in ranges for i in range(start, end + 1)}
+
+
+def test_split_ranges():
+    assert split_ranges(10, 3, 1) == [(0, 3), (4, 6), (7, 9)]
+    # 不足最小分段大小时减少段数
+    assert split_ranges(10, 4, 5) == [(0, 4), (5, 9)]
+    assert split_ranges(0, 4, 1) == []
+
+
+def test_missing_ranges_capped_at_segments():
+    missing = [(0, 99), (200, 299), (400, 499), (600, 699), (800, 999)]
+    ranges = split_missing_ranges(missing, 4, 1)
+    assert len(ranges) == 4
+    # 合并缺口时重新下载其间已完成的数据，缺失部分不能遗漏
+    assert covered(ranges) >= covered(missing)
+
+
+def test_missing_ranges_proportional_to_size():
+    ranges = split_missing_ranges([(0, 99), (1000, 1899)], 10, 1)
+    assert len(ranges) == 10
+    assert [r for r in ranges if r[1] < 100] == [(0, 99)]
+    assert covered(ranges) == covered([(0, 99), (1000, 1899)])
+
+
+def test_missing_ranges_respect_min_segment_size():
+    ranges = split_missing_ranges([(0, 99), (200, 299)], 8, 50)
+    assert len(ranges) == 4
+    assert all(end - start + 1 >= 50 for start, end in ranges)
+    assert split_missing_ranges([], 4, 1) == []
+
+
+def test_missing_ranges_random():
+    rng = random.Random(1)
+    for _ in range(200):
+        position, missing = 0, []
+        for _ in range(rng.randint(1, 8)):
+            start = position + rng.randint(0, 50)
+            end = start + rng.randint(0, 100)
+            missing.append((start, end))
+            position = end + 2
+        segments = rng.randint(1, 6)
+        ranges = split_missing_ranges(missing, segments, rng.randint(1, 40))
+        assert 1 <= len(ranges) <= segments
+        assert covered(ranges) >= covered(missing)
+        # 各段互不重叠
+        assert sum(end - start + 1 for start, end in ranges) == len(covered(ranges))
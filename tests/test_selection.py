@@ -0,0 +1,111 @@
+"""
+StreamPolicy 测试
+"""
+
+import pytest
+
+from bilibili_downloader.exceptions import BilibiliDownloadError
+from bilibili_downloader.selection import StreamPolicy
+
+
+def video(qn, height, codec, bandwidth):
+    prefix = {"avc": "avc1.640032", "hevc": "hev1.1.6.L150", "av1": "av01.0.08M"}
+    return {
+        "id": qn,
+        "height": height,
+        "codecs": prefix[codec],
+        "bandwidth": bandwidth,
+        "base_url": f"{height}-{codec}",
+    }
+
+
+VIDEO = [
+    video(80, 1080, "avc", 3_000_000),
+    video(80, 1080, "hevc", 2_000_000),
+    video(64, 720, "avc", 1_500_000),
+    video(64, 720, "hevc", 1_000_000),
+    video(64, 720, "av1", 800_000),
+    video(32, 480, "avc", 700_000),
+]
+AUDIO = [
+    {"id": 30216, "bandwidth": 64_000, "base_url": "64k"},
+    {"id": 30232, "bandwidth": 132_000, "base_url": "132k"},
+    {"id": 30280, "bandwidth": 192_000, "base_url": "192k"},
+]
+
+
+def test_highest_by_default():
+    assert StreamPolicy().select_video(VIDEO)["base_url"] == "1080-avc"
+
+
+def test_max_height_cap():
+    policy = StreamPolicy(max_height=720)
+    assert policy.select_video(VIDEO)["base_url"] == "720-avc"
+    # 缺少 height 字段时按画质编号推算
+    streams = [{k: v for k, v in s.items() if k != "height"} for s in VIDEO]
+    assert policy.select_video(streams)["base_url"] == "720-avc"
+
+
+def test_codec_priority():
+    policy = StreamPolicy(max_height=720, codecs=("av1", "hevc"))
+    assert policy.select_video(VIDEO)["base_url"] == "720-av1"
+    # 优先级最高的编码在限制内不存在时取下一个
+    policy = StreamPolicy(max_height=1080, codecs=["vp9", "hevc"])
+    assert policy.select_video(VIDEO)["base_url"] == "1080-hevc"
+    # 都不存在时不限制编码
+    policy = StreamPolicy(codecs=("vp9",))
+    assert policy.select_video(VIDEO)["base_url"] == "1080-avc"
+
+
+def test_prefer_smallest():
+    assert StreamPolicy(prefer="smallest").select_video(VIDEO)["base_url"] == "480-avc"
+    policy = StreamPolicy(min_height=720, prefer="smallest")
+    assert policy.select_video(VIDEO)["base_url"] == "720-av1"
+
+
+def test_fallback_when_nothing_matches():
+    # 全部超出上限时选最小的流
+    policy = StreamPolicy(max_height=360)
+    assert policy.select_video(VIDEO)["base_url"] == "480-avc"
+    policy = StreamPolicy(max_video_bandwidth=100)
+    assert policy.select_video(VIDEO)["base_url"] == "480-avc"
+    # 没有满足最小分辨率的流时选最大的
+    policy = StreamPolicy(max_height=720, min_height=2160)
+    assert policy.select_video(VIDEO)["base_url"] == "720-avc"
+    with pytest.raises(BilibiliDownloadError):
+        StreamPolicy().select_video([])
+
+
+def test_select_audio():
+    assert StreamPolicy().select_audio(AUDIO)["base_url"] == "64k"
+    assert StreamPolicy(audio="highest").select_audio(AUDIO)["base_url"] == "192k"
+    policy = StreamPolicy(audio="highest", max_audio_bandwidth=150_000)
+    assert policy.select_audio(AUDIO)["base_url"] == "132k"
+    # 全部超出码率上限时忽略上限
+    policy = StreamPolicy(audio="highest", max_audio_bandwidth=1)
+    assert policy.select_audio(AUDIO)["base_url"] == "192k"
+    with pytest.raises(BilibiliDownloadError):
+        StreamPolicy().select_audio([])
+
+
+def test_key():
+    assert StreamPolicy().key == StreamPolicy().key
+    keys = {
+        StreamPolicy().key,
+        StreamPolicy(max_height=720).key,
+        StreamPolicy(min_height=720).key,
+        StreamPolicy(codecs=("av1",)).key,
+        StreamPolicy(prefer="smallest").key,
+        StreamPolicy(audio="highest").key,
+        StreamPolicy(max_audio_bandwidth=64_000).key,
+    }
+    assert len(keys) == 7
+    # 列表和元组形式的编码优先级是同一策略
+    assert StreamPolicy(codecs=["avc"]).key == StreamPolicy(codecs=("avc",)).key
+
+
+def test_invalid_prefer():
+    with pytest.raises(ValueError):
+        StreamPolicy(prefer="fastest")
+    with pytest.raises(ValueError):
+        StreamPolicy(audio="lowest")
@@ -0,0 +1,51 @@
+"""
+HTTPSessionPool 测试
+"""
+
+import asyncio
+import threading
+
+from bilibili_downloader.session import HTTPSessionPool
+
+
+def test_one_session_per_loop():
+    pool = HTTPSessionPool()
+
+    async def get_twice():
+        first = await pool.get()
+        assert await pool.get() is first
+        return first
+
+    old = asyncio.run(get_twice())
+
+    async def run():
+        session = await pool.get()
+        # 旧事件循环已关闭，其会话不再保留
+        assert session is not old and list(pool._sessions.values()) == [session]
+        await pool.close()
+        return session
+
+    assert asyncio.run(run()).closed
+    assert pool._sessions == {}
+
+
+def test_close_sessions_of_other_loops():
+    pool = HTTPSessionPool()
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+    try:
+        remote = asyncio.run_coroutine_threadsafe(pool.get(), other).result(5)
+
+        async def run():
+            local = await pool.get()
+            assert local is not remote
+            await pool.close()
+            return local
+
+        assert asyncio.run(run()).closed
+        assert remote.closed
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join(5)
+        other.close()
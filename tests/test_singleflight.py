@@ -0,0 +1,104 @@
+"""
+SingleFlight 测试
+"""
+
+import asyncio
+
+import pytest
+
+from bilibili_downloader.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+    released = []
+    group = SingleFlight(release=released.append)
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def caller():
+        async with group.hold("key", work) as (value, shared):
+            await asyncio.sleep(0.01)
+            return value, shared
+
+    async def run():
+        return await asyncio.gather(*(caller() for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert [value for value, _ in results] == ["result"] * 3
+    assert [shared for _, shared in results] == [False, True, True]
+    # 最后一个调用方离开后才清理结果，并移除记录
+    assert released == ["result"]
+    assert len(group) == 0
+
+
+def test_failure_is_not_reused():
+    attempts = []
+    group = SingleFlight()
+
+    async def work():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("boom")
+        return "ok"
+
+    async def run():
+        with pytest.raises(ValueError):
+            async with group.hold("key", work):
+                pass
+        async with group.hold("key", work) as (value, shared):
+            return value, shared
+
+    assert asyncio.run(run()) == ("ok", False)
+    assert len(attempts) == 2
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    group = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        first = group.join("key", work)
+        second = group.join("key", work)
+        waiter = asyncio.ensure_future(first.wait())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        first.release()
+        try:
+            return await second.wait()
+        finally:
+            second.release()
+
+    assert asyncio.run(run()) == "done"
+    assert len(group) == 0
+
+
+def test_last_caller_leaving_cancels_call():
+    group = SingleFlight()
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        lease = group.join("key", work)
+        await asyncio.sleep(0)
+        lease.release()
+        # 重复 release 不影响计数
+        lease.release()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert cancelled == [True]
+    assert len(group) == 0
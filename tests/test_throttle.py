@@ -0,0 +1,72 @@
+"""
+令牌桶测试
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from bilibili_downloader.throttle import TokenBucket
+
+
+def test_request_larger_than_capacity_waits_for_debt():
+    bucket = TokenBucket(rate=1000, capacity=10)
+
+    async def run():
+        await bucket.acquire(10)
+        started = time.monotonic()
+        await bucket.acquire(300)
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.28
+
+
+def test_concurrent_waiters_share_rate():
+    bucket = TokenBucket(rate=2000, capacity=100)
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire(100) for _ in range(5)))
+        return time.monotonic() - started
+
+    # 第一块用满桶，其余400个令牌按2000/s补充
+    assert asyncio.run(run()) >= 0.18
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_burst_then_rate():
+    bucket = TokenBucket(rate=100, capacity=100)
+    started = time.monotonic()
+    # 满桶的100个令牌立即可用，其余按速率补充
+    bucket.acquire_sync(100)
+    assert time.monotonic() - started < 0.25
+    bucket.acquire_sync(30)
+    assert time.monotonic() - started >= 0.28
+
+
+def test_unlimited_does_not_wait():
+    bucket = TokenBucket(None)
+    started = time.monotonic()
+    bucket.acquire_sync(10**9)
+    asyncio.run(bucket.acquire(10**9))
+    assert time.monotonic() - started < 0.5
+
+
+def test_set_rate():
+    bucket = TokenBucket(rate=100)
+    bucket.acquire_sync(100)
+    # 提高速率后等待时间按新速率计算
+    bucket.set_rate(10000)
+    started = time.monotonic()
+    bucket.acquire_sync(500)
+    # 按原速率需要5秒
+    assert time.monotonic() - started < 1
+    bucket.set_rate(None)
+    assert bucket.rate is None
+    with pytest.raises(ValueError):
+        bucket.set_rate(0)
@@ -0,0 +1,72 @@
+"""
+Worker 租约测试
+"""
+
+import asyncio
+import time
+
+from bilibili_downloader import DownloadResult, SQLiteJobQueue, Worker
+
+
+def make_worker(queue, server, tmp_path, ffmpeg, **kwargs):
+    options = dict(
+        download_dir=str(tmp_path / "out"),
+        ffmpeg_path=ffmpeg,
+        download_segments=1,
+        resume_downloads=False,
+    )
+    return Worker(queue, options, concurrency=1, poll_interval=0.05, **kwargs)
+
+
+def test_crashed_worker_job_is_reclaimed(stub_server, tmp_path, ffmpeg_stub):
+    server = stub_server(stream_size=64 * 1024)
+    queue = SQLiteJobQueue(str(tmp_path / "queue.db"))
+    job_id = queue.put(server.video_url("BV1crash001"), "audio")
+    # 领取任务的worker崩溃，不再续约
+    queue.claim("dead", lease=0.3)
+
+    worker = make_worker(queue, server, tmp_path, ffmpeg_stub, name="alive")
+    assert asyncio.run(worker.run()) == 1
+    job = queue.get(job_id)
+    assert job.status == "succeeded", job.result
+    assert job.attempts == 2 and job.result["success"]
+    queue.close()
+
+
+def test_lost_lease_abandons_job(stub_server, tmp_path, ffmpeg_stub):
+    # 整个下载约需4秒，续约间隔长于租约，任务中途被其他worker接管
+    server = stub_server(stream_size=1024 * 1024, per_connection_bandwidth=256 * 1024)
+    queue = SQLiteJobQueue(str(tmp_path / "queue.db"))
+    job_id = queue.put(server.video_url("BV1lease001"), "audio")
+    worker = make_worker(
+        queue,
+        server,
+        tmp_path,
+        ffmpeg_stub,
+        name="slow",
+        lease_seconds=0.2,
+        heartbeat_interval=0.5,
+    )
+
+    async def take_over():
+        await asyncio.sleep(0.3)
+        job = queue.claim("other", lease=60)
+        assert job.id == job_id and job.attempts == 2
+        # 原worker在下一次续约时发现租约已被接管
+        await asyncio.sleep(0.5)
+        result = DownloadResult(success=True, message="ok", url=job.url)
+        assert queue.complete(job_id, "other", result)
+
+    async def run():
+        started = time.monotonic()
+        processed, _ = await asyncio.gather(worker.run(), take_over())
+        return processed, time.monotonic() - started
+
+    processed, elapsed = asyncio.run(run())
+    assert processed == 0
+    # 下载已被取消，没有等到完成
+    assert elapsed < 3
+    job = queue.get(job_id)
+    # 结果来自接管的worker
+    assert job.status == "succeeded" and job.result["message"] == "ok"
+    queue.close()